@@ -2,9 +2,11 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from app.core.database import get_db
-from app.core.security import verify_token
+from app.core.security import decode_token
 from app.core.config import settings
+from app.core.principal_cache import principal_cache
 from app.models.user import User, UserRole
+from app.services.token_revocation_service import token_revocations
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
@@ -18,14 +20,25 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    username = verify_token(token)
+    payload = decode_token(token)
+    username = payload.get("sub") if payload else None
     if username is None:
         raise credentials_exception
     
+    # 已登出的令牌，只查进程内吊销集合
+    if token_revocations.is_revoked(payload.get("jti")):
+        raise credentials_exception
+    
+    # 命中用户缓存时不查询数据库
+    user = principal_cache.get(username)
+    if user is not None:
+        return user
+    
     user = db.query(User).filter(User.username == username).first()
     if user is None:
         raise credentials_exception
     
+    principal_cache.remember(user)
     return user
 
 async def get_current_admin_user(
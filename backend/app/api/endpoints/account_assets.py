@@ -1,5 +1,5 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session, joinedload
 from app.core.database import get_db
 from app.models.account_asset import AccountAsset
@@ -10,13 +10,16 @@ from app.schemas.account_asset import (
     AccountAssetWithTerminal
 )
 from app.api.deps import get_current_user
+from app.utils.pagination import paginate
 
 router = APIRouter()
 
 @router.get("/", response_model=List[AccountAssetWithTerminal])
 async def get_account_assets(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="上一页响应头 X-Next-Cursor 中的分页游标，指定时忽略 skip"),
     region_code: Optional[str] = Query(None, description="按区域编码筛选"),
     terminal_id: Optional[int] = Query(None, description="按终端ID筛选"),
     db: Session = Depends(get_db),
@@ -30,7 +33,7 @@ async def get_account_assets(
     if terminal_id:
         query = query.filter(AccountAsset.terminal_id == terminal_id)
     
-    account_assets = query.offset(skip).limit(limit).all()
+    account_assets = paginate(query, [(AccountAsset.id, False)], limit, skip, cursor, response)
     
     # 转换为包含终端信息的响应格式
     result = []
@@ -175,6 +178,9 @@ async def update_account_asset(
     update_data = account_asset_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_account_asset, field, value)
+    # 手动绑定或解绑后不再按租约回收
+    if "terminal_id" in update_data:
+        db_account_asset.lease_expires_at = None
     
     db.commit()
     db.refresh(db_account_asset)
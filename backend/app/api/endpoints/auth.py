@@ -4,10 +4,12 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from app.core.database import get_db
-from app.core.security import create_access_token, verify_password
+from app.core.password_pool import PasswordPoolBusy
+from app.core.security import create_access_token, decode_token, verify_password_async
 from app.core.config import settings
 from app.models.user import User
 from app.schemas.auth import Token, UserLogin, LoginResponse, UserResponse
+from app.services.auth_service import AuthService
 
 logger = logging.getLogger(__name__)
 
@@ -20,23 +22,36 @@ async def login(
     db: Session = Depends(get_db)
 ):
     user = db.query(User).filter(User.username == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.password_hash):
+    # 等待bcrypt期间不占用数据库连接
+    db.close()
+    if not user or not await verify_password_async(form_data.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="用户名或密码错误",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        subject=user.username, expires_delta=access_token_expires
-    )
-    
-    return {
-        "access_token": access_token,
-        "token_type": "bearer",
-        "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
-    }
+    # 只签发令牌，不写会话表
+    return AuthService.create_user_session(user)
+
+@router.post("/logout")
+async def logout(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+):
+    """登出：吊销当前访问令牌，之后使用该令牌的请求返回401"""
+    payload = decode_token(token)
+    if payload is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="无效的认证凭据",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    try:
+        AuthService.revoke_token(db, payload)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return {"message": "已退出登录"}
 
 @router.post("/login-json", response_model=LoginResponse)
 async def login_json(
@@ -47,6 +62,8 @@ async def login_json(
     logger.info(f"登录请求参数: username={user_login.username}, password_length={len(user_login.password) if user_login.password else 0}")
     logger.debug(f"登录请求详细参数: {user_login.dict()}")
     user = db.query(User).filter(User.username == user_login.username).first()
+    # 等待bcrypt期间不占用数据库连接
+    db.close()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -60,13 +77,15 @@ async def login_json(
     print(f"Debug: 密码哈希长度: {len(user.password_hash)}")
     
     try:
-        password_valid = verify_password(user_login.password, user.password_hash)
+        password_valid = await verify_password_async(user_login.password, user.password_hash)
         print(f"Debug: 密码验证结果: {password_valid}")
         if not password_valid:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="密码错误",
             )
+    except PasswordPoolBusy:
+        raise
     except Exception as e:
         print(f"Debug: 密码验证异常: {str(e)}")
         raise HTTPException(
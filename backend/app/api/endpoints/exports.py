@@ -0,0 +1,140 @@
+from datetime import datetime
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from app.core.database import get_db
+from app.models.terminal import Terminal
+from app.models.user import User
+from app.api.deps import get_current_user
+from app.services.export_service import MEDIA_TYPES, ExportService
+
+router = APIRouter()
+
+ExportFormat = Literal["ndjson", "csv"]
+
+def _response(stmt, name: str, export_format: str, gzip: bool, **stream_options) -> StreamingResponse:
+    filename = f"{name}-{datetime.utcnow():%Y%m%d%H%M%S}.{export_format}"
+    media_type = MEDIA_TYPES[export_format]
+    if gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        ExportService.stream(stmt, export_format, gzip, **stream_options),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+def _account_records(
+    db: Session,
+    kind: str,
+    export_format: str,
+    gzip: bool,
+    account_id: Optional[str],
+    terminal_id: Optional[str],
+    region_code: Optional[str],
+    since: Optional[datetime],
+    until: Optional[datetime],
+    after_id: Optional[int]
+) -> StreamingResponse:
+    stmt = ExportService.account_records_statement(
+        db, kind, account_id=account_id, terminal_id=terminal_id, region_code=region_code,
+        since=since, until=until, after_id=after_id
+    )
+    return _response(stmt, kind, export_format, gzip)
+
+@router.get("/asset-records")
+async def export_asset_records(
+    export_format: ExportFormat = Query("ndjson", alias="format", description="导出格式：ndjson/csv"),
+    gzip: bool = Query(False, description="是否gzip压缩"),
+    account_id: Optional[str] = Query(None, description="账户ID"),
+    terminal_id: Optional[str] = Query(None, description="终端设备ID"),
+    region_code: Optional[str] = Query(None, description="游戏区域代码"),
+    since: Optional[datetime] = Query(None, description="入库时间下限（含）"),
+    until: Optional[datetime] = Query(None, description="入库时间上限（不含）"),
+    after_id: Optional[int] = Query(None, description="只导出ID大于该值的记录，用于断点续传"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """流式导出资产记录"""
+    return _account_records(db, "asset-records", export_format, gzip, account_id, terminal_id, region_code,
+                            since, until, after_id)
+
+@router.get("/inventory-records")
+async def export_inventory_records(
+    export_format: ExportFormat = Query("ndjson", alias="format", description="导出格式：ndjson/csv"),
+    gzip: bool = Query(False, description="是否gzip压缩"),
+    account_id: Optional[str] = Query(None, description="账户ID"),
+    terminal_id: Optional[str] = Query(None, description="终端设备ID"),
+    region_code: Optional[str] = Query(None, description="游戏区域代码"),
+    since: Optional[datetime] = Query(None, description="入库时间下限（含）"),
+    until: Optional[datetime] = Query(None, description="入库时间上限（不含）"),
+    after_id: Optional[int] = Query(None, description="只导出ID大于该值的记录，用于断点续传"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """流式导出背包快照记录（snapshot 存储模式下写入）"""
+    return _account_records(db, "inventory-records", export_format, gzip, account_id, terminal_id, region_code,
+                            since, until, after_id)
+
+@router.get("/inventory-changes")
+async def export_inventory_changes(
+    export_format: ExportFormat = Query("ndjson", alias="format", description="导出格式：ndjson/csv"),
+    gzip: bool = Query(False, description="是否gzip压缩"),
+    account_id: Optional[str] = Query(None, description="账户ID"),
+    terminal_id: Optional[str] = Query(None, description="终端设备ID"),
+    since: Optional[datetime] = Query(None, description="上报时间下限（含）"),
+    until: Optional[datetime] = Query(None, description="上报时间上限（不含）"),
+    after_id: Optional[int] = Query(None, description="只导出ID大于该值的记录，用于断点续传"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """流式导出背包变化记录（delta 存储模式下的背包历史）"""
+    return _account_records(db, "inventory-changes", export_format, gzip, account_id, terminal_id, None,
+                            since, until, after_id)
+
+@router.get("/login-records")
+async def export_login_records(
+    export_format: ExportFormat = Query("ndjson", alias="format", description="导出格式：ndjson/csv"),
+    gzip: bool = Query(False, description="是否gzip压缩"),
+    account_id: Optional[str] = Query(None, description="账户ID"),
+    terminal_id: Optional[str] = Query(None, description="终端设备ID"),
+    region_code: Optional[str] = Query(None, description="游戏区域代码"),
+    since: Optional[datetime] = Query(None, description="入库时间下限（含）"),
+    until: Optional[datetime] = Query(None, description="入库时间上限（不含）"),
+    after_id: Optional[int] = Query(None, description="只导出ID大于该值的记录，用于断点续传"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """流式导出登录记录"""
+    return _account_records(db, "login-records", export_format, gzip, account_id, terminal_id, region_code,
+                            since, until, after_id)
+
+@router.get("/terminal-data")
+async def export_terminal_data(
+    export_format: ExportFormat = Query("ndjson", alias="format", description="导出格式：ndjson/csv"),
+    gzip: bool = Query(False, description="是否gzip压缩"),
+    terminal_id: Optional[str] = Query(None, description="终端设备ID"),
+    data_type: Optional[str] = Query(None, description="数据类型"),
+    since: Optional[datetime] = Query(None, description="入库时间下限（含）"),
+    until: Optional[datetime] = Query(None, description="入库时间上限（不含）"),
+    after_id: Optional[int] = Query(None, description="只导出ID大于该值的记录，用于断点续传"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """流式导出终端原始数据，压缩保存的数据解压后输出"""
+    terminal_pk = None
+    if terminal_id:
+        terminal_pk = db.query(Terminal.id).filter(Terminal.terminal_id == terminal_id).scalar()
+        if terminal_pk is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="终端不存在"
+            )
+    stmt = ExportService.terminal_data_statement(
+        db, terminal_pk=terminal_pk, data_type=data_type, since=since, until=until, after_id=after_id
+    )
+    return _response(
+        stmt, "terminal-data", export_format, gzip,
+        transform=ExportService.decode_terminal_data, exclude=("data_compressed",)
+    )
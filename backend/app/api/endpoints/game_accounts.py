@@ -1,11 +1,18 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 from sqlalchemy import desc
 from app.core.database import get_db
-from app.models.game_account import GameAccount, GameAssetRecord, GameInventoryRecord, GameLoginRecord
+from app.models.game_account import (
+    GameAccount, GameAssetRecord, GameInventoryRecord, GameLoginRecord, GameAccountLatestAsset,
+    GameInventoryChange
+)
+from app.services.archive_service import ArchiveService
+from app.services.inventory_service import InventoryService
+from app.services.partition_service import PartitionService
 from app.models.user import User
 from app.api.deps import get_current_user
+from app.utils.pagination import paginate
 from pydantic import BaseModel
 from datetime import datetime
 from typing import Optional
@@ -51,6 +58,23 @@ class GameAssetRecordResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class GameAccountLatestAssetResponse(BaseModel):
+    account_id: str
+    record_id: int
+    terminal_id: str
+    region_code: Optional[str]
+    gold: Optional[int]
+    diamond: Optional[int]
+    energy: Optional[int]
+    experience: Optional[int]
+    level: Optional[int]
+    vip_level: Optional[int]
+    report_time: Optional[datetime]
+    updated_at: Optional[datetime]
+    
+    class Config:
+        from_attributes = True
+
 class GameInventoryRecordResponse(BaseModel):
     id: int
     account_id: str
@@ -64,19 +88,62 @@ class GameInventoryRecordResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class GameInventoryChangeResponse(BaseModel):
+    id: int
+    account_id: str
+    terminal_id: str
+    item_id: str
+    item_name: str
+    item_type: str
+    change_type: str
+    quantity_delta: int
+    quantity_after: int
+    report_time: datetime
+    
+    class Config:
+        from_attributes = True
+
 @router.get("/", response_model=List[GameAccountResponse])
 async def get_game_accounts(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="上一页响应头 X-Next-Cursor 中的分页游标，指定时忽略 skip"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     获取游戏账户列表
     """
-    accounts = db.query(GameAccount).order_by(desc(GameAccount.updated_at)).offset(skip).limit(limit).all()
+    accounts = paginate(
+        db.query(GameAccount), [(GameAccount.updated_at, True), (GameAccount.id, True)],
+        limit, skip, cursor, response
+    )
     return accounts
 
+# 批量查询最新资产时单次最多的账户数
+LATEST_ASSETS_MAX_ACCOUNTS = 500
+
+@router.get("/latest-assets", response_model=List[GameAccountLatestAssetResponse])
+async def get_latest_assets_bulk(
+    account_ids: List[str] = Query(..., description="账户ID列表，可重复传参"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    批量获取多个账户的最新资产快照，无资产记录的账户不出现在结果中
+    """
+    account_ids = list(dict.fromkeys(account_ids))
+    if len(account_ids) > LATEST_ASSETS_MAX_ACCOUNTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"单次最多查询 {LATEST_ASSETS_MAX_ACCOUNTS} 个账户"
+        )
+    
+    return db.query(GameAccountLatestAsset).filter(
+        GameAccountLatestAsset.account_id.in_(account_ids)
+    ).all()
+
 @router.get("/{account_id}", response_model=GameAccountResponse)
 async def get_game_account(
     account_id: str,
@@ -97,8 +164,12 @@ async def get_game_account(
 @router.get("/{account_id}/login-records", response_model=List[GameLoginRecordResponse])
 async def get_login_records(
     account_id: str,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="上一页响应头 X-Next-Cursor 中的分页游标，指定时忽略 skip"),
+    since: Optional[datetime] = Query(None, description="入库时间下限（含）"),
+    until: Optional[datetime] = Query(None, description="入库时间上限（不含）"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -113,17 +184,22 @@ async def get_login_records(
             detail="游戏账户不存在"
         )
     
-    records = db.query(GameLoginRecord).filter(
-        GameLoginRecord.account_id == account_id
-    ).order_by(desc(GameLoginRecord.login_time)).offset(skip).limit(limit).all()
+    query = db.query(GameLoginRecord).filter(GameLoginRecord.account_id == account_id)
+    # 指定时间窗口时只扫描覆盖该窗口的分区
+    query = PartitionService.prune(db, query, GameLoginRecord, since, until)
+    records = paginate(query, [(GameLoginRecord.login_time, True), (GameLoginRecord.id, True)], limit, skip, cursor, response)
     
     return records
 
 @router.get("/{account_id}/asset-records", response_model=List[GameAssetRecordResponse])
 async def get_asset_records(
     account_id: str,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="上一页响应头 X-Next-Cursor 中的分页游标，指定时忽略 skip"),
+    since: Optional[datetime] = Query(None, description="入库时间下限（含）"),
+    until: Optional[datetime] = Query(None, description="入库时间上限（不含）"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -138,17 +214,22 @@ async def get_asset_records(
             detail="游戏账户不存在"
         )
     
-    records = db.query(GameAssetRecord).filter(
-        GameAssetRecord.account_id == account_id
-    ).order_by(desc(GameAssetRecord.report_time)).offset(skip).limit(limit).all()
+    query = db.query(GameAssetRecord).filter(GameAssetRecord.account_id == account_id)
+    # 指定时间窗口时只扫描覆盖该窗口的分区
+    query = PartitionService.prune(db, query, GameAssetRecord, since, until)
+    records = paginate(query, [(GameAssetRecord.report_time, True), (GameAssetRecord.id, True)], limit, skip, cursor, response)
     
     return records
 
 @router.get("/{account_id}/inventory-records", response_model=List[GameInventoryRecordResponse])
 async def get_inventory_records(
     account_id: str,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="上一页响应头 X-Next-Cursor 中的分页游标，指定时忽略 skip"),
+    since: Optional[datetime] = Query(None, description="入库时间下限（含）"),
+    until: Optional[datetime] = Query(None, description="入库时间上限（不含）"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -163,12 +244,58 @@ async def get_inventory_records(
             detail="游戏账户不存在"
         )
     
-    records = db.query(GameInventoryRecord).filter(
-        GameInventoryRecord.account_id == account_id
-    ).order_by(desc(GameInventoryRecord.report_time)).offset(skip).limit(limit).all()
+    query = db.query(GameInventoryRecord).filter(GameInventoryRecord.account_id == account_id)
+    # 指定时间窗口时只扫描覆盖该窗口的分区
+    query = PartitionService.prune(db, query, GameInventoryRecord, since, until)
+    records = paginate(query, [(GameInventoryRecord.report_time, True), (GameInventoryRecord.id, True)], limit, skip, cursor, response)
     
     return records
 
+def _history(db: Session, model, account_id: str, since: Optional[datetime], until: Optional[datetime],
+             limit: int) -> list:
+    # 验证账户存在
+    account = db.query(GameAccount).filter(GameAccount.account_id == account_id).first()
+    if not account:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="游戏账户不存在"
+        )
+    try:
+        return ArchiveService.history(db, model, account_id, since, until, limit)
+    except RuntimeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
+        )
+
+@router.get("/{account_id}/asset-history", response_model=List[GameAssetRecordResponse])
+async def get_asset_history(
+    account_id: str,
+    since: Optional[datetime] = Query(None, description="入库时间下限（含）"),
+    until: Optional[datetime] = Query(None, description="入库时间上限（不含）"),
+    limit: int = Query(1000, ge=1, le=10000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    获取指定账户时间窗口内的资产记录，按上报时间升序，包含已归档的冷数据
+    """
+    return _history(db, GameAssetRecord, account_id, since, until, limit)
+
+@router.get("/{account_id}/inventory-history", response_model=List[GameInventoryRecordResponse])
+async def get_inventory_history(
+    account_id: str,
+    since: Optional[datetime] = Query(None, description="入库时间下限（含）"),
+    until: Optional[datetime] = Query(None, description="入库时间上限（不含）"),
+    limit: int = Query(1000, ge=1, le=10000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    获取指定账户时间窗口内的背包记录，按上报时间升序，包含已归档的冷数据
+    """
+    return _history(db, GameInventoryRecord, account_id, since, until, limit)
+
 @router.get("/{account_id}/latest-assets", response_model=GameAssetRecordResponse)
 async def get_latest_assets(
     account_id: str,
@@ -176,27 +303,35 @@ async def get_latest_assets(
     current_user: User = Depends(get_current_user)
 ):
     """
-    获取指定账户的最新资产记录
+    获取指定账户的最新资产记录（读取最新资产快照表）
     """
-    # 验证账户存在
-    account = db.query(GameAccount).filter(GameAccount.account_id == account_id).first()
-    if not account:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="游戏账户不存在"
-        )
-    
-    latest_record = db.query(GameAssetRecord).filter(
-        GameAssetRecord.account_id == account_id
-    ).order_by(desc(GameAssetRecord.report_time)).first()
-    
-    if not latest_record:
+    snapshot = db.get(GameAccountLatestAsset, account_id)
+    if not snapshot:
+        # 无快照时区分账户不存在与暂无资产记录
+        account = db.query(GameAccount.id).filter(GameAccount.account_id == account_id).first()
+        if not account:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="游戏账户不存在"
+            )
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="该账户暂无资产记录"
         )
     
-    return latest_record
+    return GameAssetRecordResponse(
+        id=snapshot.record_id,
+        account_id=snapshot.account_id,
+        terminal_id=snapshot.terminal_id,
+        gold=snapshot.gold,
+        diamond=snapshot.diamond,
+        energy=snapshot.energy,
+        experience=snapshot.experience,
+        level=snapshot.level,
+        vip_level=snapshot.vip_level,
+        report_time=snapshot.report_time,
+        created_at=snapshot.updated_at
+    )
 
 @router.get("/{account_id}/latest-inventory")
 async def get_latest_inventory(
@@ -215,6 +350,23 @@ async def get_latest_inventory(
             detail="游戏账户不存在"
         )
     
+    # 增量存储模式下直接读取当前背包
+    current = InventoryService.get_current(db, account_id)
+    if current is not None:
+        state, current_items = current
+        items = [{
+            "item_id": item.item_id,
+            "item_name": item.item_name,
+            "item_type": item.item_type,
+            "quantity": item.quantity
+        } for item in current_items]
+        return {
+            "account_id": account_id,
+            "items": items,
+            "report_time": state.report_time,
+            "total_items": len(items)
+        }
+    
     # 获取最新的上报时间
     latest_time = db.query(GameInventoryRecord.report_time).filter(
         GameInventoryRecord.account_id == account_id
@@ -234,6 +386,7 @@ async def get_latest_inventory(
     ).all()
     
     items = [{
+        "item_id": record.item_id,
         "item_name": record.item_name,
         "item_type": record.item_type,
         "quantity": record.quantity
@@ -244,4 +397,61 @@ async def get_latest_inventory(
         "items": items,
         "report_time": latest_time[0],
         "total_items": len(items)
-    }
\ No newline at end of file
+    }
+
+@router.get("/{account_id}/inventory-at")
+async def get_inventory_at(
+    account_id: str,
+    at: datetime = Query(..., description="要重建背包的时间点"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    重建指定账户在某一时刻的背包
+    """
+    # 验证账户存在
+    account = db.query(GameAccount).filter(GameAccount.account_id == account_id).first()
+    if not account:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="游戏账户不存在"
+        )
+    
+    inventory = InventoryService.reconstruct(db, account_id, at)
+    return {
+        "account_id": account_id,
+        "at": at,
+        "source": inventory["source"],
+        "report_time": inventory["report_time"],
+        "items": inventory["items"],
+        "total_items": len(inventory["items"])
+    }
+
+@router.get("/{account_id}/inventory-changes", response_model=List[GameInventoryChangeResponse])
+async def get_inventory_changes(
+    account_id: str,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = Query(None, description="上一页响应头 X-Next-Cursor 中的分页游标，指定时忽略 skip"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    获取指定账户的背包变化记录
+    """
+    # 验证账户存在
+    account = db.query(GameAccount).filter(GameAccount.account_id == account_id).first()
+    if not account:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="游戏账户不存在"
+        )
+    
+    changes = paginate(
+        db.query(GameInventoryChange).filter(GameInventoryChange.account_id == account_id),
+        [(GameInventoryChange.report_time, True), (GameInventoryChange.id, True)],
+        limit, skip, cursor, response
+    )
+    
+    return changes
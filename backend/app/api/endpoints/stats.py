@@ -1,36 +1,77 @@
-from fastapi import APIRouter, Depends
+from typing import Any, Callable, Literal, Optional
+from fastapi import APIRouter, Depends, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import case, func
 from datetime import datetime, timedelta
-from app.core.database import get_db
+from app.core.cache import cache_key, stats_cache
+from app.core.database import SessionLocal
 from app.models.user import User
-from app.models.terminal import Terminal
+from app.models.terminal import Terminal, TerminalStatus
 from app.models.task import Task, TaskExecution
+from app.models.stats_rollup import AccountAssetRollup, TaskExecutionRollup, TerminalReportRollup
 from app.api.deps import get_current_user
+from app.core.credential_cache import credential_cache
+from app.core.password_pool import password_pool
+from app.core.principal_cache import principal_cache
+from app.services.account_lease_service import account_lease_pool
+from app.services.archive_service import ArchiveService
+from app.services.ingest_queue import report_queue
+from app.services.partition_service import partition_scheduler
+from app.services.presence_service import presence_registry
+from app.services.retention_service import retention_scheduler
+from app.services.rollup_service import EXECUTION_ROLLUP_SOURCE, RollupService, rollup_scheduler
+from app.services.token_revocation_service import token_revocations
 
 router = APIRouter()
 
+def _unrolled_executions(db: Session, since: Optional[datetime] = None) -> int:
+    """尚未进入汇总的任务执行数量：执行中的，以及已结束但仍在汇总水位之后的"""
+    query = db.query(func.count(TaskExecution.id)).filter(
+        RollupService.unrolled_condition(db, EXECUTION_ROLLUP_SOURCE)
+    )
+    if since is not None:
+        query = query.filter(TaskExecution.started_at >= since)
+    return query.scalar() or 0
+
+async def _cached(name: str, compute: Callable[[Session], Any], **params) -> Any:
+    """
+    按接口名和参数读取响应缓存，未命中时在线程池中计算
+
+    计算使用独立的数据库会话：后台刷新时发起请求的会话已经关闭。
+    """
+    def load():
+        db = SessionLocal()
+        try:
+            return compute(db)
+        finally:
+            db.close()
+    
+    return await run_in_threadpool(stats_cache.get_or_compute, cache_key(name, **params), load)
+
 @router.get("/dashboard")
 async def get_dashboard_stats(
-    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
+    return await _cached("dashboard", _dashboard_stats)
+
+def _dashboard_stats(db: Session) -> dict:
     # 获取基础统计数据
     total_users = db.query(User).count()
     total_terminals = db.query(Terminal).count()
     total_tasks = db.query(Task).count()
     
-    # 在线终端数量
-    online_terminals = db.query(Terminal).filter(
-        Terminal.status == "online",
-        Terminal.last_heartbeat >= datetime.utcnow() - timedelta(minutes=5)
-    ).count()
+    # 在线终端数量（读取在线状态注册表）
+    online_terminals = presence_registry.count(TerminalStatus.online)
     
-    # 今日任务执行数量
-    today = datetime.utcnow().date()
-    today_executions = db.query(TaskExecution).filter(
-        func.date(TaskExecution.start_time) == today
-    ).count()
+    # 今日任务执行数量：已汇总的从日汇总读取，执行中和尚未汇总的实时统计
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    today_finished = db.query(func.sum(TaskExecutionRollup.execution_count)).filter(
+        TaskExecutionRollup.granularity == "day",
+        TaskExecutionRollup.dimension == "total",
+        TaskExecutionRollup.bucket_start == today
+    ).scalar() or 0
+    today_executions = today_finished + _unrolled_executions(db, since=today)
     
     # 任务状态分布
     task_status_stats = db.query(
@@ -41,19 +82,22 @@ async def get_dashboard_stats(
     task_status_distribution = {status: count for status, count in task_status_stats}
     
     # 最近7天的任务执行趋势
-    seven_days_ago = datetime.utcnow() - timedelta(days=7)
     daily_executions = db.query(
-        func.date(TaskExecution.start_time).label('date'),
-        func.count(TaskExecution.id).label('count')
+        TaskExecutionRollup.bucket_start,
+        func.sum(TaskExecutionRollup.execution_count).label('count')
     ).filter(
-        TaskExecution.start_time >= seven_days_ago
+        TaskExecutionRollup.granularity == "day",
+        TaskExecutionRollup.dimension == "total",
+        TaskExecutionRollup.bucket_start >= today - timedelta(days=7)
     ).group_by(
-        func.date(TaskExecution.start_time)
+        TaskExecutionRollup.bucket_start
+    ).order_by(
+        TaskExecutionRollup.bucket_start
     ).all()
     
     execution_trend = [
-        {"date": str(date), "count": count}
-        for date, count in daily_executions
+        {"date": str(bucket_start.date()), "count": count}
+        for bucket_start, count in daily_executions
     ]
     
     return {
@@ -68,28 +112,35 @@ async def get_dashboard_stats(
 
 @router.get("/terminals")
 async def get_terminal_stats(
-    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    # 终端状态分布
-    terminal_status_stats = db.query(
-        Terminal.status,
-        func.count(Terminal.id).label('count')
-    ).group_by(Terminal.status).all()
-    
-    status_distribution = {status: count for status, count in terminal_status_stats}
+    return await _cached("terminals", _terminal_stats)
+
+def _terminal_stats(db: Session) -> dict:
+    # 终端状态分布：在线、异常取自在线状态注册表，其余为离线
+    status_distribution = {
+        status: presence_registry.count(status) for status in (TerminalStatus.online, TerminalStatus.error)
+    }
+    status_distribution[TerminalStatus.offline] = db.query(Terminal).count() - sum(status_distribution.values())
     
-    # 最活跃的终端
+    # 最活跃的终端（按日汇总累计）
+    execution_counts = db.query(
+        TaskExecutionRollup.dimension_id,
+        func.sum(TaskExecutionRollup.execution_count).label('execution_count')
+    ).filter(
+        TaskExecutionRollup.granularity == "day",
+        TaskExecutionRollup.dimension == "terminal"
+    ).group_by(
+        TaskExecutionRollup.dimension_id
+    ).subquery()
     active_terminals = db.query(
         Terminal.terminal_id,
         Terminal.name,
-        func.count(TaskExecution.id).label('execution_count')
+        execution_counts.c.execution_count
     ).join(
-        TaskExecution, Terminal.id == TaskExecution.terminal_id
-    ).group_by(
-        Terminal.id, Terminal.terminal_id, Terminal.name
+        execution_counts, Terminal.id == execution_counts.c.dimension_id
     ).order_by(
-        func.count(TaskExecution.id).desc()
+        execution_counts.c.execution_count.desc()
     ).limit(10).all()
     
     top_terminals = [
@@ -108,40 +159,48 @@ async def get_terminal_stats(
 
 @router.get("/tasks")
 async def get_task_stats(
-    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
+    return await _cached("tasks", _task_stats)
+
+def _task_stats(db: Session) -> dict:
+    # 已结束的执行从日汇总读取
+    finished, successful, duration_count, duration_seconds = db.query(
+        func.sum(TaskExecutionRollup.execution_count),
+        func.sum(case((TaskExecutionRollup.status == "success", TaskExecutionRollup.execution_count), else_=0)),
+        func.sum(TaskExecutionRollup.duration_count),
+        func.sum(TaskExecutionRollup.duration_seconds)
+    ).filter(
+        TaskExecutionRollup.granularity == "day",
+        TaskExecutionRollup.dimension == "total"
+    ).one()
+    
     # 任务执行成功率
-    total_executions = db.query(TaskExecution).count()
-    successful_executions = db.query(TaskExecution).filter(
-        TaskExecution.result.like('%success%')
-    ).count()
+    total_executions = (finished or 0) + _unrolled_executions(db)
+    successful_executions = successful or 0
     
     success_rate = (successful_executions / total_executions * 100) if total_executions > 0 else 0
     
     # 平均执行时间
-    avg_execution_time = db.query(
-        func.avg(
-            func.timestampdiff(
-                'SECOND',
-                TaskExecution.start_time,
-                TaskExecution.end_time
-            )
-        )
-    ).filter(
-        TaskExecution.end_time.isnot(None)
-    ).scalar()
+    avg_execution_time = (duration_seconds / duration_count) if duration_count else 0
     
     # 最常执行的任务
+    execution_counts = db.query(
+        TaskExecutionRollup.dimension_id,
+        func.sum(TaskExecutionRollup.execution_count).label('execution_count')
+    ).filter(
+        TaskExecutionRollup.granularity == "day",
+        TaskExecutionRollup.dimension == "task"
+    ).group_by(
+        TaskExecutionRollup.dimension_id
+    ).subquery()
     popular_tasks = db.query(
         Task.name,
-        func.count(TaskExecution.id).label('execution_count')
+        execution_counts.c.execution_count
     ).join(
-        TaskExecution, Task.id == TaskExecution.task_id
-    ).group_by(
-        Task.id, Task.name
+        execution_counts, Task.id == execution_counts.c.dimension_id
     ).order_by(
-        func.count(TaskExecution.id).desc()
+        execution_counts.c.execution_count.desc()
     ).limit(10).all()
     
     top_tasks = [
@@ -157,4 +216,169 @@ async def get_task_stats(
         "success_rate": round(success_rate, 2),
         "avg_execution_time": round(avg_execution_time or 0, 2),
         "top_tasks": top_tasks
-    }
\ No newline at end of file
+    }
+
+@router.get("/report-trend")
+async def get_report_trend(
+    granularity: Literal["hour", "day"] = "hour",
+    days: int = Query(1, ge=1, le=90),
+    terminal_id: Optional[str] = Query(None, description="终端设备ID，不指定时统计全部终端"),
+    current_user: User = Depends(get_current_user)
+):
+    """按小时/天统计各类型上报次数"""
+    return await _cached(
+        "report-trend",
+        lambda db: _report_trend(db, granularity, days, terminal_id),
+        granularity=granularity, days=days, terminal_id=terminal_id
+    )
+
+def _report_trend(db: Session, granularity: str, days: int, terminal_id: Optional[str]) -> list:
+    query = db.query(
+        TerminalReportRollup.bucket_start,
+        TerminalReportRollup.report_type,
+        func.sum(TerminalReportRollup.report_count)
+    ).filter(
+        TerminalReportRollup.granularity == granularity,
+        TerminalReportRollup.bucket_start >= datetime.utcnow() - timedelta(days=days)
+    )
+    if terminal_id:
+        query = query.filter(TerminalReportRollup.terminal_id == terminal_id)
+    rows = query.group_by(
+        TerminalReportRollup.bucket_start, TerminalReportRollup.report_type
+    ).order_by(TerminalReportRollup.bucket_start).all()
+    
+    return [
+        {"bucket_start": bucket_start, "report_type": report_type, "count": count}
+        for bucket_start, report_type, count in rows
+    ]
+
+@router.get("/asset-trend")
+async def get_asset_trend(
+    granularity: Literal["hour", "day"] = "day",
+    days: int = Query(7, ge=1, le=365),
+    account_id: Optional[str] = Query(None, description="账户ID，不指定时统计全部账户"),
+    region_code: Optional[str] = Query(None, description="游戏区域代码"),
+    current_user: User = Depends(get_current_user)
+):
+    """按小时/天统计金子、元宝变化"""
+    return await _cached(
+        "asset-trend",
+        lambda db: _asset_trend(db, granularity, days, account_id, region_code),
+        granularity=granularity, days=days, account_id=account_id, region_code=region_code
+    )
+
+def _asset_trend(db: Session, granularity: str, days: int, account_id: Optional[str],
+                 region_code: Optional[str]) -> list:
+    query = db.query(
+        AccountAssetRollup.bucket_start,
+        func.sum(AccountAssetRollup.gold_delta),
+        func.sum(AccountAssetRollup.diamond_delta),
+        func.sum(AccountAssetRollup.report_count)
+    ).filter(
+        AccountAssetRollup.granularity == granularity,
+        AccountAssetRollup.bucket_start >= datetime.utcnow() - timedelta(days=days)
+    )
+    if account_id:
+        query = query.filter(AccountAssetRollup.account_id == account_id)
+    if region_code is not None:
+        query = query.filter(AccountAssetRollup.region_code == region_code)
+    rows = query.group_by(AccountAssetRollup.bucket_start).order_by(AccountAssetRollup.bucket_start).all()
+    
+    return [
+        {
+            "bucket_start": bucket_start,
+            "gold_delta": gold_delta,
+            "diamond_delta": diamond_delta,
+            "report_count": report_count
+        }
+        for bucket_start, gold_delta, diamond_delta, report_count in rows
+    ]
+
+@router.get("/rollups")
+async def get_rollup_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """统计汇总各源表的水位与延迟"""
+    return rollup_scheduler.stats()
+
+@router.get("/cache")
+async def get_stats_cache_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """统计接口响应缓存的命中率与重新计算耗时"""
+    return stats_cache.stats()
+
+@router.get("/credential-cache")
+async def get_credential_cache_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """开放API凭据校验缓存命中统计"""
+    return credential_cache.stats()
+
+@router.get("/user-cache")
+async def get_user_cache_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """管理后台JWT认证用户缓存命中统计"""
+    return principal_cache.stats()
+
+@router.get("/password-pool")
+async def get_password_pool_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """密码哈希线程池的排队时间与拒绝统计"""
+    return password_pool.stats()
+
+@router.get("/token-revocations")
+async def get_token_revocation_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """访问令牌吊销列表的大小、同步与拒绝统计"""
+    return token_revocations.stats()
+
+@router.get("/account-leases")
+async def get_account_lease_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """账号租约分配统计：进程内空闲队列长度、领取冲突与回收数量"""
+    return account_lease_pool.stats()
+
+
+@router.get("/report-queue")
+async def get_report_queue_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """上报写后队列深度、写库耗时与拒绝统计"""
+    return report_queue.stats()
+
+
+@router.get("/presence")
+async def get_presence_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """终端在线状态注册表的在线数量与批量写回统计"""
+    return presence_registry.stats()
+
+
+@router.get("/retention")
+async def get_retention_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """最近一次数据保留清理各表的删除行数与删除速率"""
+    return retention_scheduler.stats()
+
+
+@router.get("/partitions")
+async def get_partition_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """最近一次分区维护各表新建的未来分区"""
+    return partition_scheduler.stats()
+
+
+@router.get("/archive")
+async def get_archive_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """各表已归档冷数据的天数、文件数与占用空间"""
+    return ArchiveService.summary()
@@ -9,6 +9,7 @@ from app.schemas.system_config import (
     RegionCreate, RegionUpdate, Region as RegionSchema
 )
 from app.api.deps import get_current_user
+from app.services.terminal_data_service import TerminalDataService
 
 router = APIRouter()
 
@@ -43,6 +44,7 @@ async def create_system_config(
     db.add(db_config)
     db.commit()
     db.refresh(db_config)
+    TerminalDataService.invalidate_policies()
     return db_config
 
 @router.get("/configs/{config_id}", response_model=SystemConfigSchema)
@@ -81,6 +83,7 @@ async def update_system_config(
     
     db.commit()
     db.refresh(config)
+    TerminalDataService.invalidate_policies()
     return config
 
 @router.delete("/configs/{config_id}")
@@ -99,6 +102,7 @@ async def delete_system_config(
     
     db.delete(config)
     db.commit()
+    TerminalDataService.invalidate_policies()
     return {"message": "配置删除成功"}
 
 # 区域管理相关接口
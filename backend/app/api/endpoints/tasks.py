@@ -1,5 +1,5 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 from datetime import datetime
 from app.core.database import get_db
@@ -11,17 +11,20 @@ from app.schemas.task import (
     TaskExecutionCreate, TaskExecutionUpdate
 )
 from app.api.deps import get_current_user
+from app.utils.pagination import paginate
 
 router = APIRouter()
 
 @router.get("/", response_model=List[TaskSchema])
 async def get_tasks(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="上一页响应头 X-Next-Cursor 中的分页游标，指定时忽略 skip"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    tasks = db.query(Task).offset(skip).limit(limit).all()
+    tasks = paginate(db.query(Task), [(Task.id, False)], limit, skip, cursor, response)
     return tasks
 
 @router.post("/", response_model=TaskSchema)
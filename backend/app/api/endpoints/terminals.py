@@ -1,73 +1,48 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional, Union
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
-from sqlalchemy import or_, func
-from app.core.database import get_db
-from app.models.terminal import Terminal, TerminalData
+from sqlalchemy import or_, func, select
+from app.core.config import settings
+from app.core.database import SessionLocal, get_db, get_async_db
+from app.models.terminal import Terminal
 from app.models.user import User
 from app.models.game_account import GameAccount, GameAssetRecord, GameInventoryRecord, GameLoginRecord
 from app.models.account_asset import AccountAsset
 from app.schemas.terminal import (
-    TerminalCreate, TerminalUpdate, Terminal as TerminalSchema,
+    TerminalCreate, TerminalUpdate, Terminal as TerminalSchema, TerminalApiKeyInfo, TerminalApiKeyIssued,
     TerminalHeartbeat, TerminalDataCreate, TerminalReportData,
-    AccountInfoResponse, AccountResponse, LoginReportData, AssetsReportData, InventoryReportData
+    AccountInfoResponse, AccountResponse, AccountLeaseResponse, LoginReportData, AssetsReportData, InventoryReportData,
+    BatchReportData
 )
 from app.api.deps import get_current_user
-from app.api.open_api_deps import verify_user_credentials
+from app.api.open_api_deps import optional_user_credentials, verify_terminal_credentials
+from app.services.account_lease_service import AccountLeasePool, account_lease_pool
+from app.services.presence_service import PresenceService, presence_registry
+from app.services.report_service import ReportService
+from app.services.terminal_key_service import CachedKey, TerminalKeyService
+from app.services.terminal_data_service import TerminalDataService
+from app.services.ingest_queue import report_queue
+from app.utils.pagination import paginate
 
 router = APIRouter()
 
 @router.get("/", response_model=List[TerminalSchema])
 async def get_terminals(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="上一页响应头 X-Next-Cursor 中的分页游标，指定时忽略 skip"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    terminals = db.query(Terminal).offset(skip).limit(limit).all()
+    terminals = paginate(db.query(Terminal), [(Terminal.id, False)], limit, skip, cursor, response)
     
-    # 基于数据上报时间判断在线状态（5分钟内有数据上报视为在线）
-    five_minutes_ago = datetime.utcnow() - timedelta(minutes=5)
-    
-    for terminal in terminals:
-        # 检查最近5分钟内是否有登录记录或资产记录上报
-        recent_login = db.query(GameLoginRecord).filter(
-            GameLoginRecord.terminal_id == terminal.terminal_id,
-            GameLoginRecord.created_at >= five_minutes_ago
-        ).first()
-        
-        recent_asset = db.query(GameAssetRecord).filter(
-            GameAssetRecord.terminal_id == terminal.terminal_id,
-            GameAssetRecord.created_at >= five_minutes_ago
-        ).first()
-        
-        recent_inventory = db.query(GameInventoryRecord).filter(
-            GameInventoryRecord.terminal_id == terminal.terminal_id,
-            GameInventoryRecord.created_at >= five_minutes_ago
-        ).first()
-        
-        # 如果有任何一种数据在5分钟内上报过，则认为在线
-        if recent_login or recent_asset or recent_inventory:
-            terminal.status = "online"
-            # 更新最后心跳时间为最近的数据上报时间
-            latest_time = None
-            if recent_login:
-                latest_time = recent_login.created_at
-            if recent_asset and (not latest_time or recent_asset.created_at > latest_time):
-                latest_time = recent_asset.created_at
-            if recent_inventory and (not latest_time or recent_inventory.created_at > latest_time):
-                latest_time = recent_inventory.created_at
-            
-            # 持久化更新到数据库
-            if latest_time and terminal.last_heartbeat != latest_time:
-                terminal.last_heartbeat = latest_time
-                db.add(terminal)
-        else:
-            terminal.status = "offline"
-    
-    # 提交所有更改
-    db.commit()
+    # 在线状态读取内存中的注册表（心跳和数据上报时更新），不查询上报记录表
+    PresenceService.apply_presence(terminals)
     
     return terminals
 
@@ -103,6 +78,7 @@ async def get_terminal(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="终端不存在"
         )
+    PresenceService.apply_presence([terminal])
     return terminal
 
 @router.put("/{terminal_id}", response_model=TerminalSchema)
@@ -142,13 +118,81 @@ async def delete_terminal(
     
     db.delete(terminal)
     db.commit()
+    presence_registry.discard(terminal.terminal_id)
+    TerminalKeyService.revoke(db, terminal.terminal_id)
     return {"message": "终端删除成功"}
 
+@router.get("/{terminal_id}/api-keys", response_model=List[TerminalApiKeyInfo])
+async def get_terminal_api_keys(
+    terminal_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    terminal = _get_terminal_or_404(db, terminal_id)
+    return TerminalKeyService.list_keys(db, terminal.terminal_id)
+
+@router.post("/{terminal_id}/api-keys", response_model=TerminalApiKeyIssued)
+async def issue_terminal_api_key(
+    terminal_id: int,
+    revoke_existing: bool = Query(True, description="同时吊销该终端现有的密钥"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """签发新的终端API密钥，secret 只在本次响应中返回"""
+    terminal = _get_terminal_or_404(db, terminal_id)
+    if not TerminalKeyService.enabled():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="服务器未配置 TERMINAL_KEY_MASTER，无法签发终端API密钥"
+        )
+    if revoke_existing:
+        TerminalKeyService.revoke(db, terminal.terminal_id)
+    api_key = TerminalKeyService.issue(db, terminal.terminal_id)
+    db.commit()
+    return api_key
+
+@router.delete("/{terminal_id}/api-keys/{key_id}")
+async def revoke_terminal_api_key(
+    terminal_id: int,
+    key_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    terminal = _get_terminal_or_404(db, terminal_id)
+    if not TerminalKeyService.revoke(db, terminal.terminal_id, key_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="密钥不存在或已吊销"
+        )
+    return {"message": "密钥已吊销"}
+
+def _get_terminal_or_404(db: Session, terminal_id: int) -> Terminal:
+    terminal = db.query(Terminal).filter(Terminal.id == terminal_id).first()
+    if not terminal:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="终端不存在"
+        )
+    return terminal
+
+def _ensure_key_for(operator: Optional[User], db: Session, terminal_id: str) -> Optional[dict]:
+    """无需认证的注册、上报接口只在携带有效操作员凭据时签发终端API密钥"""
+    if operator is None:
+        return None
+    return TerminalKeyService.ensure_key(db, terminal_id)
+
+def _with_api_key(response: dict, api_key: Optional[dict]) -> dict:
+    """首次签发的终端API密钥随注册响应返回"""
+    if api_key is not None:
+        response["api_key"] = api_key
+    return response
+
 # 开放API端点
 @router.post("/register")
 async def register_terminal(
     terminal: TerminalCreate,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    operator: Optional[User] = Depends(optional_user_credentials)
 ):
     # 检查终端是否已存在
     db_terminal = db.query(Terminal).filter(Terminal.terminal_id == terminal.terminal_id).first()
@@ -158,17 +202,19 @@ async def register_terminal(
         db_terminal.ip_address = terminal.ip_address
         db_terminal.config = terminal.config
         db_terminal.last_heartbeat = datetime.utcnow()
+        api_key = _ensure_key_for(operator, db, db_terminal.terminal_id)
         db.commit()
         db.refresh(db_terminal)
-        return {"message": "终端信息更新成功", "terminal_id": db_terminal.id}
+        return _with_api_key({"message": "终端信息更新成功", "terminal_id": db_terminal.id}, api_key)
     else:
         # 创建新终端
         db_terminal = Terminal(**terminal.dict())
         db_terminal.last_heartbeat = datetime.utcnow()
         db.add(db_terminal)
+        api_key = _ensure_key_for(operator, db, db_terminal.terminal_id)
         db.commit()
         db.refresh(db_terminal)
-        return {"message": "终端注册成功", "terminal_id": db_terminal.id}
+        return _with_api_key({"message": "终端注册成功", "terminal_id": db_terminal.id}, api_key)
 
 @router.post("/{terminal_id}/heartbeat")
 async def terminal_heartbeat(
@@ -176,21 +222,16 @@ async def terminal_heartbeat(
     heartbeat: TerminalHeartbeat,
     db: Session = Depends(get_db)
 ):
-    terminal = db.query(Terminal).filter(Terminal.terminal_id == terminal_id).first()
-    if not terminal:
+    # 心跳只记录到在线状态注册表，由后台合并写回；注册表中没有的终端查询一次确认存在
+    if not presence_registry.exists(db, terminal_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="终端不存在"
         )
     
-    terminal.status = heartbeat.status
-    terminal.last_heartbeat = datetime.utcnow()
-    if heartbeat.ip_address:
-        terminal.ip_address = heartbeat.ip_address
-    if heartbeat.config:
-        terminal.config = heartbeat.config
-    
-    db.commit()
+    presence_registry.touch(
+        terminal_id, heartbeat.status, ip_address=heartbeat.ip_address, config=heartbeat.config
+    )
     return {"message": "心跳更新成功"}
 
 @router.post("/{terminal_id}/data")
@@ -206,24 +247,21 @@ async def upload_terminal_data(
             detail="终端不存在"
         )
     
-    terminal_data = TerminalData(
-        terminal_id=terminal.id,
-        data_type=data.data_type,
-        data_content=data.data_content
-    )
-    db.add(terminal_data)
+    TerminalDataService.record(db, terminal.id, data.data_type, data.data_content)
     db.commit()
+    presence_registry.touch(terminal_id)
     
     return {"message": "数据上传成功"}
 
 @router.post("/report", status_code=status.HTTP_201_CREATED)
 async def terminal_auto_report(
     report_data: TerminalReportData,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    operator: Optional[User] = Depends(optional_user_credentials)
 ):
     """
     终端自动上报接口
-    用于终端首次运行时自动提交设备信息
+    用于终端首次运行时自动提交设备信息；携带有效操作员Basic凭据时为没有密钥的终端签发API密钥
     """
     # 数据校验
     if not report_data.terminal_id or len(report_data.terminal_id.strip()) == 0:
@@ -251,8 +289,9 @@ async def terminal_auto_report(
     
     if existing_terminal:
         # 更新现有终端信息
+        now = datetime.utcnow()
         existing_terminal.ip_address = report_data.ip_address
-        existing_terminal.last_heartbeat = datetime.utcnow()
+        existing_terminal.last_heartbeat = now
         existing_terminal.status = "online"
         
         # 更新配置信息
@@ -267,31 +306,27 @@ async def terminal_auto_report(
         }
         existing_terminal.config = config_data
         
+        # 按策略记录上报数据，与终端信息在同一事务中提交
+        TerminalDataService.record(db, existing_terminal.id, "auto_report", {
+            "system_version": report_data.system_version,
+            "is_rooted": report_data.is_rooted,
+            "imei": report_data.imei,
+            "ip_address": report_data.ip_address,
+            "device_model": report_data.device_model,
+            "device_brand": report_data.device_brand,
+            "android_id": report_data.android_id,
+            "report_type": "update"
+        })
+        api_key = _ensure_key_for(operator, db, report_data.terminal_id)
         db.commit()
+        presence_registry.touch(report_data.terminal_id, seen_at=now, persisted=True,
+                                ip_address=report_data.ip_address, config=config_data)
         
-        # 记录上报数据
-        terminal_data = TerminalData(
-            terminal_id=existing_terminal.id,
-            data_type="auto_report",
-            data_content={
-                "system_version": report_data.system_version,
-                "is_rooted": report_data.is_rooted,
-                "imei": report_data.imei,
-                "ip_address": report_data.ip_address,
-                "device_model": report_data.device_model,
-                "device_brand": report_data.device_brand,
-                "android_id": report_data.android_id,
-                "report_type": "update"
-            }
-        )
-        db.add(terminal_data)
-        db.commit()
-        
-        return {
+        return _with_api_key({
             "message": "终端信息更新成功",
             "terminal_id": report_data.terminal_id,
             "status": "updated"
-        }
+        }, api_key)
     else:
         # 创建新终端
         config_data = {
@@ -304,6 +339,7 @@ async def terminal_auto_report(
             "first_report_time": datetime.utcnow().isoformat()
         }
         
+        now = datetime.utcnow()
         new_terminal = Terminal(
             terminal_id=report_data.terminal_id,
             name=f"Terminal-{report_data.terminal_id[:8]}",
@@ -311,462 +347,358 @@ async def terminal_auto_report(
             status="online",
             ip_address=report_data.ip_address,
             config=config_data,
-            last_heartbeat=datetime.utcnow()
+            last_heartbeat=now
         )
         
         db.add(new_terminal)
+        api_key = _ensure_key_for(operator, db, report_data.terminal_id)
         db.commit()
         db.refresh(new_terminal)
+        presence_registry.touch(report_data.terminal_id, seen_at=now, persisted=True,
+                                ip_address=report_data.ip_address, config=config_data)
         
-        # 记录首次上报数据
-        terminal_data = TerminalData(
-            terminal_id=new_terminal.id,
-            data_type="auto_report",
-            data_content={
-                "system_version": report_data.system_version,
-                "is_rooted": report_data.is_rooted,
-                "imei": report_data.imei,
-                "ip_address": report_data.ip_address,
-                "device_model": report_data.device_model,
-                "device_brand": report_data.device_brand,
-                "android_id": report_data.android_id,
-                "report_type": "first_time"
-            }
-        )
-        db.add(terminal_data)
+        # 按策略记录上报数据
+        TerminalDataService.record(db, new_terminal.id, "auto_report", {
+            "system_version": report_data.system_version,
+            "is_rooted": report_data.is_rooted,
+            "imei": report_data.imei,
+            "ip_address": report_data.ip_address,
+            "device_model": report_data.device_model,
+            "device_brand": report_data.device_brand,
+            "android_id": report_data.android_id,
+            "report_type": "first_time"
+        })
         db.commit()
         
-        return {
+        return _with_api_key({
             "message": "终端注册成功",
             "terminal_id": report_data.terminal_id,
             "status": "created"
-        }
+        }, api_key)
 
-@router.get("/{terminal_id}/account-info", response_model=AccountInfoResponse)
-async def get_account_info(
-    terminal_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(verify_user_credentials)
-):
-    """
-    获取登录账号信息接口
-    动态返回账户信息：
-    1. 如果终端已绑定账户，返回绑定的账户信息
-    2. 如果终端未绑定账户，返回一个未绑定的账户
-    """
-    from app.models.account_asset import AccountAsset
-    
+def _get_terminal_by_code_or_404(db: Session, terminal_id: str) -> Terminal:
     terminal = db.query(Terminal).filter(Terminal.terminal_id == terminal_id).first()
     if not terminal:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="终端不存在"
         )
+    return terminal
+
+def _allocate_account(terminal_id: str, region_code: Optional[str]) -> Optional[AccountAsset]:
+    """
+    为终端分配账号，返回脱离会话的账号
     
-    # 检查该终端是否已绑定账户
-    bound_account = db.query(AccountAsset).filter(AccountAsset.terminal_id == terminal.id).first()
-    
-    if bound_account:
-        # 返回已绑定的账户信息
-        return AccountInfoResponse(
-            username=bound_account.character_name or bound_account.account,
-            password="abc123456",
-            region_info={
-                "region_id": "server_01",
-                "region_name": bound_account.server_name or "华东一区",
-                "server_ip": "192.168.1.100",
-                "server_port": 8080
-            },
-            account_status="active",
-            last_login_time=datetime.utcnow().isoformat(),
-            created_at=datetime.utcnow().isoformat(),
-            updated_at=datetime.utcnow().isoformat()
-        )
-    else:
-        # 查找一个未绑定的账户
-        unbound_account = db.query(AccountAsset).filter(AccountAsset.terminal_id.is_(None)).first()
-        
-        if unbound_account:
-            # 返回未绑定账户的信息（但不立即绑定）
-            return AccountInfoResponse(
-                username=unbound_account.character_name or unbound_account.account,
-                password="abc123456",
-                region_info={
-                    "region_id": "server_01",
-                    "region_name": unbound_account.server_name or "华东一区",
-                    "server_ip": "192.168.1.100",
-                    "server_port": 8080
-                },
-                account_status="active",
-                last_login_time=datetime.utcnow().isoformat(),
-                created_at=datetime.utcnow().isoformat(),
-                updated_at=datetime.utcnow().isoformat()
-            )
-        else:
-            # 没有可用的未绑定账户，返回默认信息
-            return AccountInfoResponse(
-                username=f"Player_{terminal_id[:6]}",
-                password="abc123456",
-                region_info={
-                    "region_id": "server_01",
-                    "region_name": "华东一区",
-                    "server_ip": "192.168.1.100",
-                    "server_port": 8080
-                },
-                account_status="active",
-                last_login_time=datetime.utcnow().isoformat(),
-                created_at=datetime.utcnow().isoformat(),
-                updated_at=datetime.utcnow().isoformat()
+    在线程池中使用独立会话执行，返回前关闭会话：并发请求较多时不在事件循环中等待或占用数据库连接。
+    """
+    db = SessionLocal()
+    try:
+        terminal = _get_terminal_by_code_or_404(db, terminal_id)
+        try:
+            return account_lease_pool.allocate(db, terminal.id, region_code)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    finally:
+        db.close()
+
+def _bound_or_allocated_account(terminal_id: str) -> AccountAsset:
+    """
+    终端当前绑定的账号，已绑定时只读、不续期租约；未绑定时通过租约池领取一个空闲账号
+
+    没有空闲账号时返回409，不返回虚构的账号信息。
+    """
+    db = SessionLocal()
+    try:
+        terminal = _get_terminal_by_code_or_404(db, terminal_id)
+        account = AccountLeasePool.bound_account(db, terminal.id)
+        if account is None:
+            account = account_lease_pool.allocate(db, terminal.id)
+        if account is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="终端未绑定账号且没有可分配的空闲账号，请稍后重试"
             )
+        return account
+    finally:
+        db.close()
+
+@router.post("/{terminal_id}/account-lease", response_model=AccountLeaseResponse)
+async def lease_account(
+    terminal_id: str,
+    region_code: Optional[str] = Query(None, description="账号所属区域编码，不指定时不限区域"),
+    credential: Union[CachedKey, User] = Depends(verify_terminal_credentials)
+):
+    """
+    为终端分配账号
+    已绑定账号时续期租约并返回原账号，否则领取一个空闲账号；租约到期未续期或主动释放后账号回收。
+    已绑定其他区域的账号时返回409，需先释放
+    """
+    account = await run_in_threadpool(_allocate_account, terminal_id, region_code)
+    if account is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="没有可分配的空闲账号"
+        )
+    return AccountLeaseResponse(
+        account_asset_id=account.id,
+        account=account.account,
+        password=account.password,
+        region_code=account.region_code,
+        server_name=account.server_name,
+        character_name=account.character_name,
+        lease_expires_at=account.lease_expires_at
+    )
+
+@router.delete("/{terminal_id}/account-lease")
+async def release_account_lease(
+    terminal_id: str,
+    db: Session = Depends(get_db),
+    credential: Union[CachedKey, User] = Depends(verify_terminal_credentials)
+):
+    """终端释放租约账号，管理员手动绑定的账号不受影响"""
+    terminal = _get_terminal_by_code_or_404(db, terminal_id)
+    released = account_lease_pool.release(db, terminal.id)
+    return {"message": "账号租约已释放", "released": released}
+
+@router.get("/{terminal_id}/account-info", response_model=AccountInfoResponse)
+async def get_account_info(
+    terminal_id: str,
+    credential: Union[CachedKey, User] = Depends(verify_terminal_credentials)
+):
+    """
+    获取登录账号信息接口
+    动态返回账户信息：
+    1. 如果终端已绑定账户，返回绑定的账户信息（不续期租约）
+    2. 如果终端未绑定账户，通过租约池领取一个空闲账号并返回；没有空闲账号时返回409
+    """
+    account = await run_in_threadpool(_bound_or_allocated_account, terminal_id)
+    
+    return AccountInfoResponse(
+        username=account.character_name or account.account,
+        password="abc123456",
+        region_info={
+            "region_id": "server_01",
+            "region_name": account.server_name or "华东一区",
+            "server_ip": "192.168.1.100",
+            "server_port": 8080
+        },
+        account_status="active",
+        last_login_time=datetime.utcnow().isoformat(),
+        created_at=datetime.utcnow().isoformat(),
+        updated_at=datetime.utcnow().isoformat()
+    )
 
 @router.get("/{terminal_id}/account", response_model=AccountResponse)
 async def get_account(
     terminal_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(verify_user_credentials)
+    credential: Union[CachedKey, User] = Depends(verify_terminal_credentials)
 ):
     """
     获取登录账号信息接口（不包含account_id）
     动态返回账户信息：
-    1. 如果终端已绑定账户，返回绑定的账户信息
-    2. 如果终端未绑定账户，返回一个未绑定的账户
+    1. 如果终端已绑定账户，返回绑定的账户信息（不续期租约）
+    2. 如果终端未绑定账户，通过租约池领取一个空闲账号并返回；没有空闲账号时返回409
     """
-    from app.models.account_asset import AccountAsset
+    account = await run_in_threadpool(_bound_or_allocated_account, terminal_id)
     
-    terminal = db.query(Terminal).filter(Terminal.terminal_id == terminal_id).first()
+    return AccountResponse(
+        username=account.character_name or account.account,
+        level=account.level or 1,
+        server_name=account.server_name or "默认服务器",
+        last_login_time=datetime.utcnow().isoformat()
+    )
+
+def _validate_login_report(login_data: LoginReportData) -> None:
+    if not login_data.username or len(login_data.username.strip()) == 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="用户名不能为空"
+        )
+
+def _validate_assets_report(assets_data: AssetsReportData) -> None:
+    if assets_data.gold < 0 or assets_data.diamond < 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="资产数量不能为负数"
+        )
+
+def _validate_inventory_report(inventory_data: InventoryReportData) -> None:
+    if not inventory_data.items or len(inventory_data.items) == 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="背包物品列表不能为空"
+        )
+    
+    # 验证物品数据
+    for item in inventory_data.items:
+        if item.quantity < 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"物品 {item.item_name} 数量不能为负数"
+            )
+
+REPORT_VALIDATORS = {
+    "login": _validate_login_report,
+    "assets": _validate_assets_report,
+    "inventory": _validate_inventory_report,
+}
+
+async def _enqueue_reports(terminal_id: str, reports: list, content: dict) -> JSONResponse:
+    """写后模式下将上报放入队列，返回202（入队会追加写spool文件，放到线程池执行）"""
+    if not await run_in_threadpool(report_queue.submit_many, terminal_id, reports):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="上报队列已满，请稍后重试",
+            headers={"Retry-After": "1"}
+        )
+    return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=content)
+
+async def _get_terminal_async(db: AsyncSession, terminal_id: str) -> Terminal:
+    """异步查询终端，不存在时返回404"""
+    result = await db.execute(select(Terminal).where(Terminal.terminal_id == terminal_id))
+    terminal = result.scalars().first()
     if not terminal:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="终端不存在"
         )
-    
-    # 检查该终端是否已绑定账户
-    bound_account = db.query(AccountAsset).filter(AccountAsset.terminal_id == terminal.id).first()
-    
-    if bound_account:
-        # 返回已绑定的账户信息
-        return AccountResponse(
-            username=bound_account.character_name or bound_account.account,
-            level=bound_account.level or 1,
-            server_name=bound_account.server_name or "默认服务器",
-            last_login_time=datetime.utcnow().isoformat()
-        )
-    else:
-        # 查找一个未绑定的账户
-        unbound_account = db.query(AccountAsset).filter(AccountAsset.terminal_id.is_(None)).first()
-        
-        if unbound_account:
-            # 返回未绑定账户的信息（但不立即绑定）
-            return AccountResponse(
-                username=unbound_account.character_name or unbound_account.account,
-                level=unbound_account.level or 1,
-                server_name=unbound_account.server_name or "默认服务器",
-                last_login_time=datetime.utcnow().isoformat()
-            )
-        else:
-            # 没有可用的未绑定账户，返回默认信息
-            return AccountResponse(
-                username=f"Player_{terminal_id[:6]}",
-                level=1,
-                server_name="默认服务器",
-                last_login_time=datetime.utcnow().isoformat()
-            )
+    return terminal
 
 @router.post("/{terminal_id}/login-report", status_code=status.HTTP_201_CREATED)
 async def report_login(
     terminal_id: str,
     login_data: LoginReportData,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(verify_user_credentials)
+    db: AsyncSession = Depends(get_async_db),
+    credential: Union[CachedKey, User] = Depends(verify_terminal_credentials)
 ):
     """
     账户登录信息上报接口
     """
-    terminal = db.query(Terminal).filter(Terminal.terminal_id == terminal_id).first()
-    if not terminal:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="终端不存在"
-        )
+    terminal = await _get_terminal_async(db, terminal_id)
     
     # 数据校验
-    if not login_data.username or len(login_data.username.strip()) == 0:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="用户名不能为空"
-        )
+    _validate_login_report(login_data)
+    presence_registry.touch(terminal_id)
     
-    # 转换登录时间
-    login_time = None
-    if hasattr(login_data, 'login_time') and login_data.login_time:
-        try:
-            if isinstance(login_data.login_time, str):
-                login_time = datetime.fromisoformat(login_data.login_time.replace('Z', '+00:00'))
-            else:
-                login_time = login_data.login_time
-        except ValueError:
-            login_time = datetime.utcnow()
-    else:
-        login_time = datetime.utcnow()
-    
-    # 创建或更新游戏账户
-    game_account = None
-    if login_data.character_id:
-        game_account = db.query(GameAccount).filter(
-            GameAccount.account_id == login_data.character_id
-        ).first()
-        
-        if not game_account:
-            # 创建新的游戏账户
-            game_account = GameAccount(
-                account_id=login_data.character_id,
-                username=login_data.username,
-                server_name=login_data.game_server,
-                last_terminal_id=terminal_id,
-                last_login_time=login_time
-            )
-            db.add(game_account)
-        else:
-            # 更新现有账户信息
-            game_account.username = login_data.username or game_account.username
-            game_account.server_name = login_data.game_server or game_account.server_name
-            game_account.last_terminal_id = terminal_id
-            game_account.last_login_time = login_time
-    
-    # 记录登录记录
-    login_record = GameLoginRecord(
-        account_id=login_data.character_id,
-        terminal_id=terminal_id,
-        region_code=login_data.region_code,
-        character_id=login_data.character_id,
-        username=login_data.username,
-        login_time=login_time,
-        login_ip=login_data.login_ip,
-        login_device=login_data.login_device,
-        game_server=login_data.game_server,
-        login_status='success'
-    )
-    db.add(login_record)
-    
-    # 记录原有的终端数据
-    terminal_data = TerminalData(
-        terminal_id=terminal.id,
-        data_type="login_report",
-        data_content={
-            "username": login_data.username,
-            "login_time": login_time.isoformat() if login_time else None,
-            "login_ip": login_data.login_ip,
-            "login_device": login_data.login_device,
-            "game_server": login_data.game_server,
-            "region_code": login_data.region_code,
-            "character_id": login_data.character_id
-        }
-    )
-    db.add(terminal_data)
-    db.commit()
-    
-    return {
+    response = {
         "message": "登录信息上报成功",
         "terminal_id": terminal_id
     }
+    if report_queue.enabled:
+        return await _enqueue_reports(terminal_id, [("login", login_data)], response)
+    
+    await db.run_sync(ReportService.save_login_report, terminal, login_data)
+    await db.commit()
+    
+    return response
 
 @router.post("/{terminal_id}/assets-report", status_code=status.HTTP_201_CREATED)
 async def report_assets(
     terminal_id: str,
     assets_data: AssetsReportData,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(verify_user_credentials)
+    db: AsyncSession = Depends(get_async_db),
+    credential: Union[CachedKey, User] = Depends(verify_terminal_credentials)
 ):
     """
     资产信息上报接口
     """
-    terminal = db.query(Terminal).filter(Terminal.terminal_id == terminal_id).first()
-    if not terminal:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="终端不存在"
-        )
+    terminal = await _get_terminal_async(db, terminal_id)
     
     # 数据校验
-    if assets_data.gold < 0 or assets_data.diamond < 0:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="资产数量不能为负数"
-        )
-    
-    # 转换报告时间
-    report_time = None
-    if hasattr(assets_data, 'report_time') and assets_data.report_time:
-        try:
-            if isinstance(assets_data.report_time, str):
-                report_time = datetime.fromisoformat(assets_data.report_time.replace('Z', '+00:00'))
-            else:
-                report_time = assets_data.report_time
-        except ValueError:
-            report_time = datetime.utcnow()
-    else:
-        report_time = datetime.utcnow()
-    
-
+    _validate_assets_report(assets_data)
+    presence_registry.touch(terminal_id)
     
-    # 创建或更新游戏账户
-    game_account = None
-    if assets_data.character_id:
-        game_account = db.query(GameAccount).filter(
-            GameAccount.account_id == assets_data.character_id
-        ).first()
-        
-        if not game_account:
-            # 创建新的游戏账户
-            game_account = GameAccount(
-                account_id=assets_data.character_id,
-                level=assets_data.level,
-                last_terminal_id=terminal_id
-            )
-            db.add(game_account)
-        else:
-            # 更新现有账户信息
-            if assets_data.level:
-                game_account.level = assets_data.level
-            game_account.last_terminal_id = terminal_id
-    
-    # 记录资产记录
-    asset_record = GameAssetRecord(
-        account_id=assets_data.character_id,
-        terminal_id=terminal_id,
-        region_code=assets_data.region_code,
-        character_id=assets_data.character_id,
-        gold=assets_data.gold,
-        diamond=assets_data.diamond,
-        energy=assets_data.energy,
-        experience=assets_data.experience,
-        level=assets_data.level,
-        vip_level=assets_data.vip_level,
-        report_time=report_time
-    )
-    db.add(asset_record)
-    
-    # 记录原有的终端数据
-    terminal_data = TerminalData(
-        terminal_id=terminal.id,
-        data_type="assets_report",
-        data_content={
-            "gold": assets_data.gold,
-            "diamond": assets_data.diamond,
-            "energy": assets_data.energy,
-            "experience": assets_data.experience,
-            "level": assets_data.level,
-            "vip_level": assets_data.vip_level,
-            "report_time": report_time.isoformat() if report_time else None,
-            "region_code": assets_data.region_code,
-            "character_id": assets_data.character_id
-        }
-    )
-    db.add(terminal_data)
-    db.commit()
-    
-    return {
+    response = {
         "message": "资产信息上报成功"
     }
+    if report_queue.enabled:
+        return await _enqueue_reports(terminal_id, [("assets", assets_data)], response)
+    
+    await db.run_sync(ReportService.save_assets_report, terminal, assets_data)
+    await db.commit()
+    
+    return response
 
 @router.post("/{terminal_id}/inventory-report", status_code=status.HTTP_201_CREATED)
 async def report_inventory(
     terminal_id: str,
     inventory_data: InventoryReportData,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(verify_user_credentials)
+    db: AsyncSession = Depends(get_async_db),
+    credential: Union[CachedKey, User] = Depends(verify_terminal_credentials)
 ):
     """
     背包材料上报接口
     """
-    terminal = db.query(Terminal).filter(Terminal.terminal_id == terminal_id).first()
-    if not terminal:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="终端不存在"
-        )
+    terminal = await _get_terminal_async(db, terminal_id)
     
     # 数据校验
-    if not inventory_data.items or len(inventory_data.items) == 0:
+    _validate_inventory_report(inventory_data)
+    presence_registry.touch(terminal_id)
+    
+    response = {
+        "message": "背包信息上报成功",
+        "items_count": len(inventory_data.items)
+    }
+    if report_queue.enabled:
+        return await _enqueue_reports(terminal_id, [("inventory", inventory_data)], response)
+    
+    await db.run_sync(ReportService.save_inventory_report, terminal, inventory_data)
+    await db.commit()
+    
+    return response
+
+@router.post("/{terminal_id}/batch-report", status_code=status.HTTP_201_CREATED)
+async def report_batch(
+    terminal_id: str,
+    batch_data: BatchReportData,
+    db: AsyncSession = Depends(get_async_db),
+    credential: Union[CachedKey, User] = Depends(verify_terminal_credentials)
+):
+    """
+    批量上报接口
+    一次请求提交多条登录/资产/背包记录，只认证一次、查询一次终端并在一个事务内提交
+    """
+    terminal = await _get_terminal_async(db, terminal_id)
+    
+    # 数据校验
+    if not batch_data.reports:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="背包物品列表不能为空"
+            detail="上报记录列表不能为空"
+        )
+    if len(batch_data.reports) > settings.REPORT_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"单次最多上报 {settings.REPORT_BATCH_MAX_ITEMS} 条记录"
         )
     
-    # 验证物品数据
-    for item in inventory_data.items:
-        if item.quantity < 0:
+    counts = {report_type: 0 for report_type in REPORT_VALIDATORS}
+    for index, report in enumerate(batch_data.reports):
+        try:
+            REPORT_VALIDATORS[report.report_type](report.data)
+        except HTTPException as e:
             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"物品 {item.item_name} 数量不能为负数"
+                status_code=e.status_code,
+                detail=f"第 {index + 1} 条记录: {e.detail}"
             )
+        counts[report.report_type] += 1
+    presence_registry.touch(terminal_id)
+    
+    reports = [(report.report_type, report.data) for report in batch_data.reports]
+    response = {
+        "message": "批量上报成功",
+        "terminal_id": terminal_id,
+        "accepted": len(reports),
+        "counts": counts
+    }
+    if report_queue.enabled:
+        return await _enqueue_reports(terminal_id, reports, response)
     
-
+    def save_all(sync_db: Session) -> None:
+        for report_type, data in reports:
+            ReportService.save_report(sync_db, terminal, report_type, data)
     
-    # 转换报告时间
-    report_time = None
-    if hasattr(inventory_data, 'report_time') and inventory_data.report_time:
-        try:
-            if isinstance(inventory_data.report_time, str):
-                report_time = datetime.fromisoformat(inventory_data.report_time.replace('Z', '+00:00'))
-            else:
-                report_time = inventory_data.report_time
-        except ValueError:
-            report_time = datetime.utcnow()
-    else:
-        report_time = datetime.utcnow()
-    
-    # 创建或更新游戏账户
-    game_account = None
-    if inventory_data.character_id:
-        game_account = db.query(GameAccount).filter(
-            GameAccount.account_id == inventory_data.character_id
-        ).first()
-        
-        if not game_account:
-            # 创建新的游戏账户
-            game_account = GameAccount(
-                account_id=inventory_data.character_id,
-                last_terminal_id=terminal_id
-            )
-            db.add(game_account)
-        else:
-            # 更新现有账户信息
-            game_account.last_terminal_id = terminal_id
+    await db.run_sync(save_all)
+    await db.commit()
     
-    # 记录背包物品记录
-    for item in inventory_data.items:
-        inventory_record = GameInventoryRecord(
-            account_id=inventory_data.character_id,
-            terminal_id=terminal_id,
-            region_code=inventory_data.region_code,
-            character_id=inventory_data.character_id,
-            item_id=item.item_id,
-            item_name=item.item_name,
-            item_type=item.item_type,
-            quantity=item.quantity,
-            quality=item.quality,
-            description=item.description,
-            report_time=report_time
-        )
-        db.add(inventory_record)
-    
-    # 记录原有的终端数据
-    terminal_data = TerminalData(
-        terminal_id=terminal.id,
-        data_type="inventory_report",
-        data_content={
-            "items": [item.dict() for item in inventory_data.items],
-            "report_time": inventory_data.report_time.isoformat() if isinstance(inventory_data.report_time, datetime) else inventory_data.report_time,
-            "total_items": len(inventory_data.items),
-            "region_code": inventory_data.region_code if hasattr(inventory_data, 'region_code') else None,
-            "character_id": inventory_data.character_id if hasattr(inventory_data, 'character_id') else None
-        }
-    )
-    db.add(terminal_data)
-    db.commit()
-    
-    return {
-        "message": "背包信息上报成功",
-        "items_count": len(inventory_data.items)
-    }
\ No newline at end of file
+    return response
\ No newline at end of file
@@ -1,22 +1,27 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 from app.core.database import get_db
-from app.core.security import get_password_hash
+from app.core.security import get_password_hash_async
+from app.core.credential_cache import credential_cache
+from app.core.principal_cache import principal_cache
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate, User as UserSchema
 from app.api.deps import get_current_user, get_current_admin_user
+from app.utils.pagination import paginate
 
 router = APIRouter()
 
 @router.get("/", response_model=List[UserSchema])
 async def get_users(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="上一页响应头 X-Next-Cursor 中的分页游标，指定时忽略 skip"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    users = db.query(User).offset(skip).limit(limit).all()
+    users = paginate(db.query(User), [(User.id, False)], limit, skip, cursor, response)
     return users
 
 @router.post("/", response_model=UserSchema)
@@ -42,7 +47,7 @@ async def create_user(
                 detail="邮箱已存在"
             )
     
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
     db_user = User(
         username=user.username,
         email=user.email,
@@ -82,14 +87,20 @@ async def update_user(
             detail="用户不存在"
         )
     
+    previous_username = user.username
     update_data = user_update.dict(exclude_unset=True)
     if "password" in update_data:
-        update_data["password_hash"] = get_password_hash(update_data.pop("password"))
+        update_data["password_hash"] = await get_password_hash_async(update_data.pop("password"))
+    
+    # 密码或用户名变更后清除开放API凭据缓存
+    if "password_hash" in update_data or "username" in update_data:
+        credential_cache.invalidate_user(user.username)
     
     for field, value in update_data.items():
         setattr(user, field, value)
     
     db.commit()
+    principal_cache.invalidate(previous_username)
     db.refresh(user)
     return user
 
@@ -108,4 +119,6 @@ async def delete_user(
     
     db.delete(user)
     db.commit()
+    credential_cache.invalidate_user(user.username)
+    principal_cache.invalidate(user.username)
     return {"message": "用户删除成功"}
\ No newline at end of file
@@ -1,16 +1,40 @@
-from typing import Optional
-from fastapi import Depends, HTTPException, status, Header
+from typing import Optional, Union
+from fastapi import Depends, HTTPException, Request, status, Header
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import SessionLocal, get_db
 from app.models.account_asset import AccountAsset
 from app.models.user import User
-from app.core.security import verify_password
+from app.core.security import verify_password_async
+from app.core.credential_cache import credential_cache
+from app.services.terminal_key_service import (
+    CachedKey, KEY_ID_HEADER, SIGNATURE_HEADER, TIMESTAMP_HEADER, TerminalKeyService
+)
 import base64
 
 
-def verify_user_credentials(
-    authorization: Optional[str] = Header(None),
-    db: Session = Depends(get_db)
+def _load_user(username: str) -> Optional[User]:
+    """在线程池中使用独立会话查询用户，返回前关闭会话，等待bcrypt期间不占用数据库连接"""
+    db = SessionLocal()
+    try:
+        return db.query(User).filter(User.username == username).first()
+    finally:
+        db.close()
+
+
+def _verify_key(terminal_id: str, key_id: str, timestamp: Optional[str], signature: Optional[str],
+                method: str, path: str, body: bytes) -> CachedKey:
+    """在线程池中使用独立会话校验终端API密钥签名，缓存未命中时需查询数据库"""
+    db = SessionLocal()
+    try:
+        return TerminalKeyService.verify(db, terminal_id, key_id, timestamp, signature, method, path, body)
+    finally:
+        db.close()
+
+
+async def verify_user_credentials(
+    authorization: Optional[str] = Header(None)
 ) -> User:
     """
     验证开放API接口的用户认证（使用用户管理系统账户）
@@ -20,7 +44,6 @@ def verify_user_credentials(
     
     Args:
         authorization: HTTP Authorization头
-        db: 数据库会话
         
     Returns:
         User: 验证成功的用户对象
@@ -58,18 +81,87 @@ def verify_user_credentials(
     except (IndexError, ValueError, UnicodeDecodeError):
         raise credentials_exception
     
-    # 在数据库中验证用户名和密码
-    user = db.query(User).filter(User.username == username).first()
+    # 在数据库中验证用户名和密码，同步查询放到线程池中执行，不阻塞事件循环
+    user = await run_in_threadpool(_load_user, username)
     
-    if not user or not verify_password(password, user.password_hash):
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="用户名或密码错误"
         )
     
+    # 命中凭据缓存时跳过bcrypt校验
+    if credential_cache.is_verified(username, password, user.password_hash):
+        return user
+    
+    if not await verify_password_async(password, user.password_hash):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="用户名或密码错误"
+        )
+    
+    credential_cache.remember(username, password, user.password_hash)
     return user
 
 
+async def optional_user_credentials(
+    authorization: Optional[str] = Header(None)
+) -> Optional[User]:
+    """
+    可选的用户Basic认证：未携带Authorization时返回None，携带时按 verify_user_credentials 校验
+    
+    用于注册、自动上报等无需认证的接口，只有携带有效操作员凭据的请求才会签发终端API密钥。
+    """
+    if not authorization:
+        return None
+    return await verify_user_credentials(authorization)
+
+
+async def verify_terminal_credentials(
+    terminal_id: str,
+    request: Request,
+    authorization: Optional[str] = Header(None),
+    key_id: Optional[str] = Header(None, alias=KEY_ID_HEADER),
+    timestamp: Optional[str] = Header(None, alias=TIMESTAMP_HEADER),
+    signature: Optional[str] = Header(None, alias=SIGNATURE_HEADER)
+) -> Union[CachedKey, User]:
+    """
+    验证终端上报接口的请求
+    
+    携带 X-Terminal-Key-Id 时按终端API密钥校验请求签名（见 TerminalKeyService），
+    密钥须属于路径中的终端；否则在 TERMINAL_BASIC_AUTH_ENABLED 时回退到用户Basic认证。
+    
+    Returns:
+        CachedKey 或 User: 通过校验的终端密钥或用户
+        
+    Raises:
+        HTTPException: 认证失败时抛出401错误
+    """
+    if key_id:
+        if not TerminalKeyService.enabled():
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="服务器未配置 TERMINAL_KEY_MASTER，暂不接受终端API密钥"
+            )
+        body = await request.body()
+        try:
+            return await run_in_threadpool(
+                _verify_key, terminal_id, key_id, timestamp, signature, request.method, request.url.path, body
+            )
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail=str(e)
+            )
+    
+    if not settings.TERMINAL_BASIC_AUTH_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="请使用终端API密钥签名认证"
+        )
+    return await verify_user_credentials(authorization)
+
+
 def verify_account_credentials(
     authorization: Optional[str] = Header(None),
     db: Session = Depends(get_db)
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from .endpoints import auth, users, terminals, tasks, stats, account_assets, system_config, game_accounts
+from .endpoints import auth, users, terminals, tasks, stats, account_assets, system_config, game_accounts, exports
 
 api_router = APIRouter()
 
@@ -10,4 +10,5 @@ api_router.include_router(tasks.router, prefix="/tasks", tags=["tasks"])
 api_router.include_router(stats.router, prefix="/statistics", tags=["statistics"])
 api_router.include_router(account_assets.router, prefix="/account-assets", tags=["account-assets"])
 api_router.include_router(system_config.router, prefix="/system-config", tags=["system-config"])
-api_router.include_router(game_accounts.router, prefix="/game-accounts", tags=["game-accounts"])
\ No newline at end of file
+api_router.include_router(game_accounts.router, prefix="/game-accounts", tags=["game-accounts"])
+api_router.include_router(exports.router, prefix="/exports", tags=["exports"])
\ No newline at end of file
@@ -0,0 +1,274 @@
+import json
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, NamedTuple, Optional
+from urllib.parse import urlencode
+from fastapi.encoders import jsonable_encoder
+from app.core.config import settings
+from app.core.shared_state import RedisSharedState
+from app.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class CacheEntry(NamedTuple):
+    value: Any
+    computed_at: float  # 计算完成时的时间戳（time.time()，多进程间可比较）
+
+
+def cache_key(name: str, **params) -> str:
+    """按接口名和参数生成缓存键，参数顺序无关；值为 None 的参数不计入（与空串区分）"""
+    query = urlencode(sorted((key, value) for key, value in params.items() if value is not None))
+    return f"{name}?{query}" if query else name
+
+
+class MemoryCacheBackend:
+    """进程内LRU缓存后端"""
+    name = "memory"
+
+    def __init__(self, maxsize: int):
+        self._cache = TTLCache(maxsize, ttl=0)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        return self._cache.get(key)
+
+    def set(self, key: str, entry: CacheEntry, expire: float) -> None:
+        self._cache.set(key, entry, ttl=expire)
+
+    def delete(self, key: str) -> None:
+        self._cache.pop(key)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def acquire_lock(self, key: str, timeout: float) -> Optional[str]:
+        # 进程内已由 single-flight 保证同一键只有一个线程在计算
+        return "local"
+
+    def release_lock(self, key: str, token: str) -> None:
+        pass
+
+
+class RedisCacheBackend:
+    """Redis缓存后端，多个服务进程共享缓存；基于 RedisSharedState 的键和锁，值以JSON保存"""
+    name = "redis"
+
+    def __init__(self, state: RedisSharedState):
+        self._state = state
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        raw = self._state.get(key)
+        if raw is None:
+            return None
+        data = json.loads(raw)
+        return CacheEntry(data["value"], data["computed_at"])
+
+    def set(self, key: str, entry: CacheEntry, expire: float) -> None:
+        payload = json.dumps(
+            {"value": jsonable_encoder(entry.value), "computed_at": entry.computed_at},
+            ensure_ascii=False
+        )
+        self._state.set(key, payload, ttl=expire)
+
+    def delete(self, key: str) -> None:
+        self._state.delete(key)
+
+    def clear(self) -> None:
+        self._state.clear()
+
+    def acquire_lock(self, key: str, timeout: float) -> Optional[str]:
+        """获得锁时返回锁令牌，锁已被其他进程持有时返回None"""
+        return self._state.acquire_lock("lock:" + key, timeout)
+
+    def release_lock(self, key: str, token: str) -> None:
+        self._state.release_lock("lock:" + key, token)
+
+
+class ResponseCache:
+    """
+    接口响应缓存
+
+    条目在 ttl 秒内直接返回；过期后 stale 秒内仍返回旧值，同时在后台线程刷新（stale-while-revalidate）。
+    同一进程内同一键同时只有一个线程重新计算，其余请求等待其结果（single-flight）；
+    Redis 后端另以 SET NX 锁保证多个进程间同一键只有一个在计算，其余进程等待结果写入。
+    缓存后端读写失败时直接计算，不影响接口可用性。
+    """
+
+    def __init__(self, backend, ttl: float, stale: float, lock_timeout: float = 30, error_cooldown: float = 5):
+        self.backend = backend
+        self.ttl = ttl
+        self.stale = stale
+        self.lock_timeout = lock_timeout
+        self.error_cooldown = error_cooldown
+        self._backend_down_until = 0.0
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self._refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cache-refresh")
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.errors = 0
+        self._recompute_stats: Dict[str, dict] = {}
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """返回缓存值，未命中时计算并写入缓存；ttl<=0 表示不缓存"""
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return compute()
+
+        entry = self._read(key)
+        if entry is not None:
+            age = time.time() - entry.computed_at
+            if age < ttl:
+                self._count("hits")
+                return entry.value
+            if age < ttl + self.stale:
+                self._count("stale_hits")
+                self._refresh_in_background(key, compute, ttl)
+                return entry.value
+
+        self._count("misses")
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result()
+        return self._lead(key, compute, ttl, future)
+
+    def invalidate(self, key: str) -> None:
+        self._call_backend("delete", self.backend.delete, key)
+
+    def clear(self) -> None:
+        self._call_backend("clear", self.backend.clear)
+
+    def _refresh_in_background(self, key: str, compute: Callable[[], Any], ttl: float) -> None:
+        with self._lock:
+            if key in self._inflight:
+                return
+            future = self._inflight[key] = Future()
+        self._refresher.submit(self._refresh, key, compute, ttl, future)
+
+    def _refresh(self, key: str, compute: Callable[[], Any], ttl: float, future: Future) -> None:
+        try:
+            self._lead(key, compute, ttl, future)
+        except Exception:
+            logger.exception("后台刷新缓存失败: %s", key)
+
+    def _lead(self, key: str, compute: Callable[[], Any], ttl: float, future: Future) -> Any:
+        """由获得计算权的线程执行：计算、写入缓存并把结果交给等待的线程"""
+        try:
+            value = self._recompute(key, compute, ttl)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _recompute(self, key: str, compute: Callable[[], Any], ttl: float) -> Any:
+        # 后端不可用时视为已获得锁（空令牌，无需释放），由本进程计算
+        token = self._call_backend("lock", self.backend.acquire_lock, key, self.lock_timeout, default="")
+        if token is None:
+            # 其他进程正在计算同一键：等待其写入结果，超时后自行计算
+            entry = self._wait_for_peer(key, ttl)
+            if entry is not None:
+                return entry.value
+
+        start = time.perf_counter()
+        try:
+            value = compute()
+        finally:
+            if token:
+                self._call_backend("unlock", self.backend.release_lock, key, token)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self._record_recompute(key, elapsed_ms)
+
+        self._call_backend("set", self.backend.set, key, CacheEntry(value, time.time()), ttl + self.stale)
+        return value
+
+    def _wait_for_peer(self, key: str, ttl: float) -> Optional[CacheEntry]:
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            entry = self._read(key)
+            if entry is not None and time.time() - entry.computed_at < ttl:
+                return entry
+        return None
+
+    def _read(self, key: str) -> Optional[CacheEntry]:
+        return self._call_backend("get", self.backend.get, key)
+
+    def _call_backend(self, operation: str, fn: Callable, *args, default: Any = None) -> Any:
+        """调用缓存后端；失败后 error_cooldown 秒内不再访问后端，避免每个请求都等待连接超时"""
+        if time.monotonic() < self._backend_down_until:
+            return default
+        try:
+            return fn(*args)
+        except Exception as e:
+            self._count("errors")
+            self._backend_down_until = time.monotonic() + self.error_cooldown
+            logger.warning("缓存后端%s失败，%s秒内直接计算: %s", operation, self.error_cooldown, e)
+            return default
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _record_recompute(self, key: str, elapsed_ms: float) -> None:
+        # 按接口名（键中?之前的部分）汇总，避免参数组合过多
+        name = key.split("?", 1)[0]
+        with self._lock:
+            item = self._recompute_stats.setdefault(name, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            item["count"] += 1
+            item["total_ms"] += elapsed_ms
+            item["max_ms"] = max(item["max_ms"], elapsed_ms)
+            item["last_ms"] = elapsed_ms
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            recomputes = {
+                name: {
+                    "count": item["count"],
+                    "avg_ms": round(item["total_ms"] / item["count"], 2),
+                    "max_ms": round(item["max_ms"], 2),
+                    "last_ms": round(item["last_ms"], 2)
+                }
+                for name, item in self._recompute_stats.items()
+            }
+            return {
+                "backend": self.backend.name,
+                "ttl": self.ttl,
+                "stale_seconds": self.stale,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "errors": self.errors,
+                "hit_ratio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0,
+                "inflight": len(self._inflight),
+                "recomputes": recomputes
+            }
+
+
+def create_backend(kind: str, redis_url: str, maxsize: int):
+    if kind == "redis":
+        return RedisCacheBackend(RedisSharedState(redis_url, prefix="wlweb:cache:"))
+    return MemoryCacheBackend(maxsize)
+
+
+stats_cache = ResponseCache(
+    create_backend(settings.STATS_CACHE_BACKEND, settings.REDIS_URL, settings.STATS_CACHE_MAX_ENTRIES),
+    ttl=settings.STATS_CACHE_TTL,
+    stale=settings.STATS_CACHE_STALE_SECONDS
+)
@@ -44,6 +44,104 @@ class Settings(BaseSettings):
         # 使用配置的MySQL连接
         return f"mysql+pymysql://{self.MYSQL_USER}:{self.MYSQL_PASSWORD}@{self.MYSQL_SERVER}:{self.MYSQL_PORT}/{self.MYSQL_DB}"
     
+    # 开放API凭据校验缓存
+    OPEN_API_AUTH_CACHE_SIZE: int = 10000  # 最大缓存条目数，0表示禁用
+    OPEN_API_AUTH_CACHE_TTL: int = 300  # 缓存有效期（秒）
+    
+    # 终端API密钥签名认证：派生密钥的主密钥（独立于SECRET_KEY，无默认值，未配置时不签发也不接受API密钥，
+    # 更换会使已签发的密钥全部失效）、时间戳允许的偏差（秒）、密钥缓存时间（秒）。
+    # 吊销通过共享状态通知其他进程：PRESENCE_BACKEND=redis 时立即生效，memory 时其他进程最迟在缓存时间后生效
+    TERMINAL_KEY_MASTER: str = ""
+    TERMINAL_SIGNATURE_MAX_SKEW: int = 300
+    TERMINAL_API_KEY_CACHE_TTL: int = 60
+    TERMINAL_BASIC_AUTH_ENABLED: bool = True  # 为False时终端上报接口只接受API密钥签名
+    
+    # 管理后台JWT认证的用户缓存，用户修改或删除时清除
+    AUTH_USER_CACHE_SIZE: int = 1000  # 最大缓存用户数，0表示禁用
+    AUTH_USER_CACHE_TTL: int = 30  # 缓存有效期（秒），多进程部署时其他进程最迟在该时间后看到用户变更
+    
+    # 密码哈希（bcrypt）线程池：线程数（0表示按CPU核数），排队及执行中的最大任务数（超出时返回503）
+    PASSWORD_HASH_WORKERS: int = 0
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    
+    # 访问令牌吊销列表：后台同步其他进程吊销记录的间隔（秒），多进程部署时登出最迟在该时间后在其他进程生效
+    TOKEN_REVOCATION_SYNC_SECONDS: int = 5
+    
+    # 上报数据批量写入每条INSERT语句的最大行数
+    REPORT_INSERT_CHUNK_SIZE: int = 500
+    
+    # 上报写后队列：开启后上报接口入队即返回202，由后台线程批量写库
+    REPORT_WRITE_BEHIND_ENABLED: bool = False
+    REPORT_QUEUE_MAX_SIZE: int = 10000  # 队列上限，超出时返回503
+    REPORT_FLUSH_INTERVAL_MS: int = 200  # 最长写库间隔（毫秒）
+    REPORT_FLUSH_BATCH_SIZE: int = 500  # 每批写库的最大条数
+    REPORT_SPOOL_PATH: str = ""  # 本地spool文件路径前缀，为空时不落盘；写入失败的上报移入 {路径}.dead
+    REPORT_SPOOL_SEGMENT_BYTES: int = 4 * 1024 * 1024  # 单个spool分段文件大小上限，分段数据全部落库后删除
+    
+    # 批量上报接口单次请求允许的最大记录数
+    REPORT_BATCH_MAX_ITEMS: int = 500
+    
+    # 背包存储模式：delta 仅保存当前背包和变化记录，snapshot 每次上报保存全部物品
+    INVENTORY_STORAGE_MODE: str = "delta"
+    
+    # 终端原始数据写入策略（按data_type在系统配置中设置）的缓存时间（秒）及zlib压缩级别
+    TERMINAL_DATA_POLICY_CACHE_TTL: int = 30
+    TERMINAL_DATA_COMPRESS_LEVEL: int = 6
+    
+    # 历史数据保留清理：按主键范围分块删除，块之间休眠
+    RETENTION_ENABLED: bool = False
+    RETENTION_INTERVAL_SECONDS: int = 3600  # 定时清理间隔（秒）
+    RETENTION_CHUNK_SIZE: int = 5000  # 每块覆盖的主键范围
+    RETENTION_CHUNK_SLEEP_MS: int = 100  # 块之间的休眠（毫秒）
+    RETENTION_TERMINAL_DATA_DAYS: int = 30
+    RETENTION_REPORT_RECORD_DAYS: int = 90  # 登录、资产、背包记录
+    RETENTION_TASK_EXECUTION_DAYS: int = 90
+    
+    # MySQL上报历史表分区：分区周期（day/month）及预先创建的未来分区数
+    # 启动时及之后每隔 PARTITION_INTERVAL_SECONDS 秒预建未来分区，与保留清理无关；过期分区随保留清理删除
+    PARTITION_ENABLED: bool = True
+    PARTITION_INTERVAL_SECONDS: int = 3600
+    PARTITION_PERIOD: str = "day"
+    PARTITION_PRECREATE: int = 7
+    
+    # 冷数据归档：入库早于 ARCHIVE_AFTER_DAYS 天的资产、背包记录按天写入列式文件后从数据库删除，随保留清理任务执行
+    ARCHIVE_ENABLED: bool = False
+    ARCHIVE_AFTER_DAYS: int = 30  # 应小于 RETENTION_REPORT_RECORD_DAYS，否则数据先被清理
+    ARCHIVE_DIR: str = "archive"
+    ARCHIVE_FORMAT: str = "parquet"  # parquet 或 arrow（Arrow IPC），需安装 pyarrow
+    ARCHIVE_BATCH_SIZE: int = 50000  # 每批读取并写入归档文件的行数
+    
+    # 统计汇总：后台按水位增量汇总任务执行和上报数据，/statistics 接口从汇总表读取
+    ROLLUP_ENABLED: bool = True
+    ROLLUP_INTERVAL_SECONDS: int = 60
+    ROLLUP_BATCH_SIZE: int = 5000  # 每批汇总的源表行数
+    ROLLUP_SETTLE_SECONDS: int = 30  # 只汇总入库早于该秒数的数据，避免跳过尚未提交的事务
+    ROLLUP_GAP_SECONDS: int = 3600  # 水位之前缺失的主键（更久未提交的事务）重新检查的时长
+    ROLLUP_MAX_GAPS: int = 1000  # 每张源表最多记录的缺失主键数
+    
+    # Redis连接（多进程部署时共享缓存）
+    REDIS_URL: str = "redis://localhost:6379/0"
+    
+    # /statistics 接口响应缓存：memory 为进程内LRU，redis 在多个进程间共享
+    STATS_CACHE_BACKEND: str = "memory"
+    STATS_CACHE_TTL: int = 15  # 缓存有效期（秒），0表示禁用
+    STATS_CACHE_STALE_SECONDS: int = 60  # 过期后仍可返回旧值并后台刷新的时长（秒）
+    STATS_CACHE_MAX_ENTRIES: int = 256  # 进程内缓存最大条目数
+    
+    # 上报历史流式导出：每批从服务端游标读取的行数及gzip压缩级别
+    EXPORT_BATCH_SIZE: int = 1000
+    EXPORT_GZIP_LEVEL: int = 6
+    
+    # 终端在线状态注册表：超过该秒数未心跳或上报视为离线，后台按间隔标记超时终端并批量写回状态和心跳时间
+    PRESENCE_TIMEOUT_SECONDS: int = 300
+    PRESENCE_FLUSH_INTERVAL_SECONDS: int = 10
+    PRESENCE_HEARTBEAT_PERSIST_SECONDS: int = 120  # 状态未变化时心跳时间最多每隔该秒数写回一次，应小于超时时间
+    PRESENCE_BACKEND: str = "memory"  # memory 为进程内，redis 在多个进程间共享在线终端集合和计数
+    
+    # 账号租约分配：租约时长（秒，终端再次请求时续期）、到期回收间隔（秒）、每次预取到进程内队列的空闲账号数
+    ACCOUNT_LEASE_SECONDS: int = 3600
+    ACCOUNT_LEASE_SWEEP_SECONDS: int = 30
+    ACCOUNT_LEASE_PREFETCH: int = 100
 
     
     model_config = {
@@ -0,0 +1,54 @@
+import hashlib
+from typing import NamedTuple, Optional
+from app.core.config import settings
+from app.utils.ttl_cache import TTLCache
+
+
+class CachedCredential(NamedTuple):
+    username: str
+    password_hash: str
+
+
+class CredentialCache:
+    """
+    开放API Basic认证的凭据校验缓存
+
+    以(用户名, 密码)的带密钥BLAKE2b摘要为键，命中时跳过bcrypt校验；
+    缓存中不保存明文密码。条目记录校验时的密码哈希，数据库中的哈希变化后自动失效。
+    """
+
+    def __init__(self, maxsize: int, ttl: float, secret: str):
+        self._cache = TTLCache(maxsize, ttl)
+        self._hash_key = hashlib.sha256(secret.encode("utf-8")).digest()
+
+    def _key(self, username: str, password: str) -> bytes:
+        return hashlib.blake2b(
+            f"{username}\x00{password}".encode("utf-8"),
+            key=self._hash_key,
+            digest_size=32
+        ).digest()
+
+    def is_verified(self, username: str, password: str, password_hash: str) -> bool:
+        """判断该凭据是否已针对当前密码哈希校验通过"""
+        entry: Optional[CachedCredential] = self._cache.get(self._key(username, password))
+        return entry is not None and entry.password_hash == password_hash
+
+    def remember(self, username: str, password: str, password_hash: str) -> None:
+        self._cache.set(self._key(username, password), CachedCredential(username, password_hash))
+
+    def invalidate_user(self, username: str) -> int:
+        """用户修改密码或被删除时清除其全部缓存条目"""
+        return self._cache.discard_where(lambda entry: entry.username == username)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+credential_cache = CredentialCache(
+    maxsize=settings.OPEN_API_AUTH_CACHE_SIZE,
+    ttl=settings.OPEN_API_AUTH_CACHE_TTL,
+    secret=settings.SECRET_KEY
+)
@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordPoolBusy(Exception):
+    """密码哈希线程池排队已满"""
+
+
+class PasswordHashPool:
+    """
+    密码哈希（bcrypt）专用线程池
+
+    bcrypt 计算期间释放GIL，放到独立线程池执行后不再阻塞事件循环，也不占用处理同步接口的默认线程池。
+    workers 默认为CPU核数；排队及执行中的任务超过 max_pending 时直接拒绝（PasswordPoolBusy，接口返回503），
+    避免登录风暴时请求无限堆积。记录每个任务的排队时间和执行时间。
+    """
+
+    def __init__(self, workers: int, max_pending: int, samples: int = 1000):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        # 最近任务的排队时间（毫秒），用于分位数
+        self._queue_samples: Deque[float] = deque(maxlen=samples)
+
+        # 统计指标
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.max_queue_ms = 0.0
+        self._total_queue_ms = 0.0
+        self._total_run_ms = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+                logger.info("密码哈希线程池已启动: workers=%s, max_pending=%s", self.workers, self.max_pending)
+            return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        """在线程池中执行 fn(*args) 并等待结果"""
+        executor = self._get_executor()
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordPoolBusy()
+            self._pending += 1
+            self.submitted += 1
+        submitted_at = time.perf_counter()
+
+        def job():
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                finished = time.perf_counter()
+                queue_ms = (started - submitted_at) * 1000
+                with self._lock:
+                    self.completed += 1
+                    self._queue_samples.append(queue_ms)
+                    self._total_queue_ms += queue_ms
+                    self.max_queue_ms = max(self.max_queue_ms, queue_ms)
+                    self._total_run_ms += (finished - started) * 1000
+
+        try:
+            future = executor.submit(job)
+        except BaseException:
+            self._job_done(None)
+            raise
+        # 在任务真正结束（或排队中被取消）时减少排队数：等待方被取消后bcrypt仍在线程中执行，仍占用名额
+        future.add_done_callback(self._job_done)
+        return await asyncio.wrap_future(future)
+
+    def _job_done(self, future) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def stop(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            samples = sorted(self._queue_samples)
+            completed = self.completed
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "submitted": self.submitted,
+                "completed": completed,
+                "rejected": self.rejected,
+                "avg_queue_ms": round(self._total_queue_ms / completed, 2) if completed else 0,
+                "p95_queue_ms": round(samples[int(len(samples) * 0.95)], 2) if samples else 0,
+                "max_queue_ms": round(self.max_queue_ms, 2),
+                "avg_run_ms": round(self._total_run_ms / completed, 2) if completed else 0
+            }
+
+
+password_pool = PasswordHashPool(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING
+)
@@ -0,0 +1,43 @@
+from typing import Optional
+from sqlalchemy import inspect
+from app.core.config import settings
+from app.models.user import User
+from app.utils.ttl_cache import TTLCache
+
+# 缓存的用户列
+_COLUMNS = tuple(column.key for column in inspect(User).column_attrs)
+
+
+class PrincipalCache:
+    """
+    JWT认证的用户缓存
+
+    以令牌主体（用户名）为键缓存用户各列的值，命中时 get_current_user 不再查询数据库；
+    每次返回新建的、不属于任何会话的 User 对象，各请求之间互不影响。不缓存不存在的用户。
+    用户修改或删除时由 users 接口清除；多进程部署时其他进程的条目最迟在 ttl 秒后失效。
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize, ttl)
+
+    def get(self, username: str) -> Optional[User]:
+        values = self._cache.get(username)
+        return User(**values) if values is not None else None
+
+    def remember(self, user: User) -> None:
+        self._cache.set(user.username, {column: getattr(user, column) for column in _COLUMNS})
+
+    def invalidate(self, username: str) -> None:
+        self._cache.pop(username)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+principal_cache = PrincipalCache(
+    maxsize=settings.AUTH_USER_CACHE_SIZE,
+    ttl=settings.AUTH_USER_CACHE_TTL
+)
@@ -0,0 +1,254 @@
+import secrets
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+class MemorySharedState:
+    """
+    进程内共享状态，单进程部署使用
+
+    提供按分数（通常为时间戳）排序的成员集合、计数器、带过期时间的键和互斥锁，语义与 RedisSharedState 一致。
+    """
+    name = "memory"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sets: Dict[str, Dict[str, float]] = {}
+        self._counters: Dict[str, int] = {}
+        # 键 -> (值, 过期时间戳，None表示不过期)
+        self._values: Dict[str, Tuple[str, Optional[float]]] = {}
+
+    def touch_member(self, key: str, member: str, score: float, exclusive: Sequence[str] = ()) -> None:
+        """把成员以 score 加入集合 key，同时从 exclusive 中的其他集合移除（原子操作）"""
+        with self._lock:
+            for other in exclusive:
+                if other != key:
+                    self._sets.get(other, {}).pop(member, None)
+            self._sets.setdefault(key, {})[member] = score
+
+    def add_if_absent(self, key: str, members: Dict[str, float]) -> int:
+        """只添加集合中尚不存在的成员，返回添加数量"""
+        with self._lock:
+            target = self._sets.setdefault(key, {})
+            added = 0
+            for member, score in members.items():
+                if member not in target:
+                    target[member] = score
+                    added += 1
+            return added
+
+    def remove_member(self, keys: Iterable[str], member: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._sets.get(key, {}).pop(member, None)
+
+    def scores(self, key: str, members: Sequence[str]) -> Dict[str, float]:
+        """成员的分数，不在集合中的成员不返回"""
+        with self._lock:
+            target = self._sets.get(key, {})
+            return {member: target[member] for member in members if member in target}
+
+    def members(self, key: str) -> List[str]:
+        with self._lock:
+            return list(self._sets.get(key, ()))
+
+    def count(self, key: str) -> int:
+        return len(self._sets.get(key, ()))
+
+    def pop_expired(self, key: str, max_score: float) -> Dict[str, float]:
+        """原子地移除并返回分数不大于 max_score 的成员；多个进程同时调用时每个成员只被一个进程取得"""
+        with self._lock:
+            target = self._sets.get(key, {})
+            expired = {member: score for member, score in target.items() if score <= max_score}
+            for member in expired:
+                del target[member]
+            return expired
+
+    def incr(self, name: str, amount: int = 1) -> int:
+        with self._lock:
+            value = self._counters[name] = self._counters.get(name, 0) + amount
+            return value
+
+    def counters(self, names: Sequence[str]) -> Dict[str, int]:
+        with self._lock:
+            return {name: self._counters.get(name, 0) for name in names}
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._values[key] = (value, time.time() + ttl if ttl else None)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._values.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at <= time.time():
+                del self._values[key]
+                return None
+            return value
+
+    def acquire_lock(self, key: str, ttl: float) -> Optional[str]:
+        """获得锁时返回锁令牌，锁已被持有时返回None；ttl 秒后锁自动失效"""
+        token = secrets.token_hex(16)
+        with self._lock:
+            item = self._values.get(key)
+            if item is not None and (item[1] is None or item[1] > time.time()):
+                return None
+            self._values[key] = (token, time.time() + ttl)
+        return token
+
+    def release_lock(self, key: str, token: str) -> None:
+        """只释放仍由自己持有的锁"""
+        with self._lock:
+            item = self._values.get(key)
+            if item is not None and item[0] == token:
+                del self._values[key]
+
+    def delete(self, key: str) -> None:
+        """删除键，集合、计数器和普通键均可"""
+        with self._lock:
+            self._values.pop(key, None)
+            self._sets.pop(key, None)
+            self._counters.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sets.clear()
+            self._counters.clear()
+            self._values.clear()
+
+
+# 取出并删除分数不大于上限的成员，在Redis中原子执行
+_POP_EXPIRED_SCRIPT = """
+local members = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'WITHSCORES')
+if #members > 0 then
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+end
+return members
+"""
+
+# 只删除仍由自己持有的锁：锁超时后可能已被其他进程重新获得
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Redis连接URL -> 客户端，同一URL的各个用途共用一个连接池
+_clients: Dict[str, object] = {}
+_clients_lock = threading.Lock()
+
+
+def redis_client(url: str):
+    """按URL返回共用的Redis客户端"""
+    with _clients_lock:
+        client = _clients.get(url)
+        if client is None:
+            import redis
+            client = _clients[url] = redis.Redis.from_url(url, socket_timeout=1, socket_connect_timeout=1)
+        return client
+
+
+class RedisSharedState:
+    """
+    Redis共享状态，多个服务进程或多台主机共用
+
+    成员集合为有序集合（ZSET），计数器为 INCRBY，带过期时间的键为 SET PX，锁为 SET NX PX；所有键加上
+    prefix 前缀，不同用途使用不同前缀，clear 只删除本前缀下的键。
+    client 可注入（如本地测试用的假Redis），默认使用 redis_client(url) 共用的连接。
+    """
+    name = "redis"
+
+    def __init__(self, url: str, prefix: str = "wlweb:", client=None):
+        if client is None:
+            client = redis_client(url)
+        self._client = client
+        self._prefix = prefix
+        self._pop_expired = client.register_script(_POP_EXPIRED_SCRIPT)
+        self._release_lock = client.register_script(_RELEASE_LOCK_SCRIPT)
+
+    def _key(self, key: str) -> str:
+        return self._prefix + key
+
+    @staticmethod
+    def _text(value) -> str:
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
+    def touch_member(self, key: str, member: str, score: float, exclusive: Sequence[str] = ()) -> None:
+        pipe = self._client.pipeline(transaction=True)
+        for other in exclusive:
+            if other != key:
+                pipe.zrem(self._key(other), member)
+        pipe.zadd(self._key(key), {member: score})
+        pipe.execute()
+
+    def add_if_absent(self, key: str, members: Dict[str, float]) -> int:
+        if not members:
+            return 0
+        return self._client.zadd(self._key(key), members, nx=True)
+
+    def remove_member(self, keys: Iterable[str], member: str) -> None:
+        pipe = self._client.pipeline(transaction=True)
+        for key in keys:
+            pipe.zrem(self._key(key), member)
+        pipe.execute()
+
+    def scores(self, key: str, members: Sequence[str]) -> Dict[str, float]:
+        if not members:
+            return {}
+        pipe = self._client.pipeline(transaction=False)
+        for member in members:
+            pipe.zscore(self._key(key), member)
+        return {member: score for member, score in zip(members, pipe.execute()) if score is not None}
+
+    def members(self, key: str) -> List[str]:
+        return [self._text(member) for member in self._client.zrange(self._key(key), 0, -1)]
+
+    def count(self, key: str) -> int:
+        return self._client.zcard(self._key(key))
+
+    def pop_expired(self, key: str, max_score: float) -> Dict[str, float]:
+        result = self._pop_expired(keys=[self._key(key)], args=[max_score])
+        return {self._text(result[index]): float(result[index + 1]) for index in range(0, len(result), 2)}
+
+    def incr(self, name: str, amount: int = 1) -> int:
+        return self._client.incrby(self._key(name), amount)
+
+    def counters(self, names: Sequence[str]) -> Dict[str, int]:
+        if not names:
+            return {}
+        values = self._client.mget([self._key(name) for name in names])
+        return {name: int(value) if value is not None else 0 for name, value in zip(names, values)}
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        self._client.set(self._key(key), value, px=max(1, int(ttl * 1000)) if ttl else None)
+
+    def get(self, key: str) -> Optional[str]:
+        value = self._client.get(self._key(key))
+        return self._text(value) if value is not None else None
+
+    def acquire_lock(self, key: str, ttl: float) -> Optional[str]:
+        token = secrets.token_hex(16)
+        if self._client.set(self._key(key), token, nx=True, px=max(1, int(ttl * 1000))):
+            return token
+        return None
+
+    def release_lock(self, key: str, token: str) -> None:
+        self._release_lock(keys=[self._key(key)], args=[token])
+
+    def delete(self, key: str) -> None:
+        self._client.delete(self._key(key))
+
+    def clear(self) -> None:
+        keys = list(self._client.scan_iter(match=f"{self._prefix}*", count=500))
+        if keys:
+            self._client.delete(*keys)
+
+
+def create_shared_state(kind: str, redis_url: str, prefix: str):
+    if kind == "redis":
+        return RedisSharedState(redis_url, prefix=prefix)
+    return MemorySharedState()
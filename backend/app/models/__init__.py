@@ -1,10 +1,14 @@
 from .user import User, UserRole
-from .terminal import Terminal, TerminalData, TerminalStatus
+from .terminal import Terminal, TerminalData, TerminalStatus, TerminalApiKey
 from .task import Task, TaskExecution, TaskStatus
-from .session import UserSession
+from .session import RevokedToken
 from .account_asset import AccountAsset
 from .system_config import SystemConfig, Region
-from .game_account import GameAccount, GameAssetRecord, GameInventoryRecord, GameLoginRecord
+from .game_account import (
+    GameAccount, GameAssetRecord, GameInventoryRecord, GameLoginRecord, GameAccountLatestAsset,
+    GameInventoryState, GameInventoryItem, GameInventoryChange
+)
+from .stats_rollup import TaskExecutionRollup, TerminalReportRollup, AccountAssetRollup
 
 __all__ = [
     "User",
@@ -12,10 +16,11 @@ __all__ = [
     "Terminal",
     "TerminalData",
     "TerminalStatus",
+    "TerminalApiKey",
     "Task",
     "TaskExecution",
     "TaskStatus",
-    "UserSession",
+    "RevokedToken",
     "AccountAsset",
     "SystemConfig",
     "Region",
@@ -23,4 +28,11 @@ __all__ = [
     "GameAssetRecord",
     "GameInventoryRecord",
     "GameLoginRecord",
+    "GameAccountLatestAsset",
+    "GameInventoryState",
+    "GameInventoryItem",
+    "GameInventoryChange",
+    "TaskExecutionRollup",
+    "TerminalReportRollup",
+    "AccountAssetRollup",
 ]
\ No newline at end of file
@@ -1,16 +1,22 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
 class AccountAsset(Base):
     __tablename__ = "account_assets"
+    __table_args__ = (
+        # 按区域查找空闲账号（terminal_id为空）
+        Index("idx_account_assets_region_terminal", "region_code", "terminal_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     account = Column(String(100), nullable=False, index=True, comment="账号")
     password = Column(Text, nullable=False, comment="密码")
     region_code = Column(String(20), nullable=False, index=True, comment="所属区域编码，如S110、S130等")
     terminal_id = Column(Integer, ForeignKey("terminals.id"), nullable=True, index=True, comment="绑定的终端ID")
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True, index=True,
+                              comment="租约到期时间，为空表示长期绑定")
     description = Column(Text, nullable=True, comment="备注描述")
     # 新增游戏相关字段
     server_name = Column(String(100), nullable=True, comment="服务器名称")
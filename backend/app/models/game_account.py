@@ -1,11 +1,16 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, BigInteger, JSON
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, BigInteger, JSON, Index, UniqueConstraint
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
+
 class GameAccount(Base):
     """游戏账户信息表"""
     __tablename__ = "game_accounts"
+    __table_args__ = (
+        # 账户列表按更新时间倒序
+        Index("idx_game_accounts_updated_at", "updated_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     account_id = Column(String(100), unique=True, nullable=False, index=True, comment="账户ID，来自API上报")
@@ -21,13 +26,22 @@ class GameAccount(Base):
     asset_records = relationship("GameAssetRecord", back_populates="account")
     inventory_records = relationship("GameInventoryRecord", back_populates="account")
 
+
 class GameAssetRecord(Base):
     """游戏资产记录表"""
     __tablename__ = "game_asset_records"
+    __table_args__ = (
+        # 按账户查询并按时间排序
+        Index("idx_asset_account_report_time", "account_id", "report_time"),
+        # 在线判断按终端和入库时间过滤
+        Index("idx_asset_terminal_created", "terminal_id", "created_at"),
+        # 保留清理与分区按入库时间
+        Index("idx_asset_created_at", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    account_id = Column(String(100), ForeignKey("game_accounts.account_id"), nullable=True, index=True, comment="账户ID")
-    terminal_id = Column(String(100), nullable=False, index=True, comment="终端设备ID")
+    account_id = Column(String(100), ForeignKey("game_accounts.account_id"), nullable=True, comment="账户ID")
+    terminal_id = Column(String(100), nullable=False, comment="终端设备ID")
     region_code = Column(String(20), nullable=True, comment="游戏区域代码")
     character_id = Column(String(100), nullable=True, comment="角色ID")
     gold = Column(BigInteger, nullable=True, comment="金子数量")
@@ -36,19 +50,30 @@ class GameAssetRecord(Base):
     experience = Column(BigInteger, nullable=True, comment="经验值")
     level = Column(Integer, nullable=True, comment="等级")
     vip_level = Column(Integer, nullable=True, comment="VIP等级")
+    gold_delta = Column(BigInteger, nullable=True, comment="相对该账户上一次上报的金子变化")
+    diamond_delta = Column(BigInteger, nullable=True, comment="相对该账户上一次上报的元宝/钻石变化")
     report_time = Column(DateTime(timezone=True), nullable=True, comment="上报时间")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # 关联关系
     account = relationship("GameAccount", back_populates="asset_records")
 
+
 class GameInventoryRecord(Base):
     """游戏背包物品记录表"""
     __tablename__ = "game_inventory_records"
+    __table_args__ = (
+        # 按账户查询并按时间排序
+        Index("idx_inventory_account_report_time", "account_id", "report_time"),
+        # 在线判断按终端和入库时间过滤
+        Index("idx_inventory_terminal_created", "terminal_id", "created_at"),
+        # 保留清理与分区按入库时间
+        Index("idx_inventory_created_at", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    account_id = Column(String(100), ForeignKey("game_accounts.account_id"), nullable=True, index=True, comment="账户ID")
-    terminal_id = Column(String(100), nullable=False, index=True, comment="终端设备ID")
+    account_id = Column(String(100), ForeignKey("game_accounts.account_id"), nullable=True, comment="账户ID")
+    terminal_id = Column(String(100), nullable=False, comment="终端设备ID")
     region_code = Column(String(20), nullable=True, comment="游戏区域代码")
     character_id = Column(String(100), nullable=True, comment="角色ID")
     item_id = Column(String(100), nullable=False, comment="物品ID")
@@ -63,13 +88,22 @@ class GameInventoryRecord(Base):
     # 关联关系
     account = relationship("GameAccount", back_populates="inventory_records")
 
+
 class GameLoginRecord(Base):
     """游戏登录记录表"""
     __tablename__ = "game_login_records"
+    __table_args__ = (
+        # 按账户查询并按时间排序
+        Index("idx_login_account_login_time", "account_id", "login_time"),
+        # 在线判断按终端和入库时间过滤
+        Index("idx_login_terminal_created", "terminal_id", "created_at"),
+        # 保留清理与分区按入库时间
+        Index("idx_login_created_at", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    account_id = Column(String(100), ForeignKey("game_accounts.account_id"), nullable=True, index=True, comment="账户ID")
-    terminal_id = Column(String(100), nullable=False, index=True, comment="终端设备ID")
+    account_id = Column(String(100), ForeignKey("game_accounts.account_id"), nullable=True, comment="账户ID")
+    terminal_id = Column(String(100), nullable=False, comment="终端设备ID")
     region_code = Column(String(20), nullable=True, comment="游戏区域代码")
     character_id = Column(String(100), nullable=True, comment="角色ID")
     username = Column(String(100), nullable=True, comment="用户名")
@@ -79,4 +113,74 @@ class GameLoginRecord(Base):
     game_server = Column(String(100), nullable=True, comment="游戏服务器")
     login_status = Column(String(20), nullable=True, comment="登录状态")
     server_info = Column(JSON, nullable=True, comment="服务器信息")
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class GameAccountLatestAsset(Base):
+    """游戏账户最新资产快照表，每个账户一行，随资产上报更新"""
+    __tablename__ = "game_account_latest_assets"
+    
+    account_id = Column(String(100), ForeignKey("game_accounts.account_id"), primary_key=True, comment="账户ID")
+    record_id = Column(Integer, nullable=False, comment="对应的资产记录ID")
+    terminal_id = Column(String(100), nullable=False, comment="终端设备ID")
+    region_code = Column(String(20), nullable=True, comment="游戏区域代码")
+    gold = Column(BigInteger, nullable=True, comment="金子数量")
+    diamond = Column(BigInteger, nullable=True, comment="元宝/钻石数量")
+    energy = Column(Integer, nullable=True, comment="体力值")
+    experience = Column(BigInteger, nullable=True, comment="经验值")
+    level = Column(Integer, nullable=True, comment="等级")
+    vip_level = Column(Integer, nullable=True, comment="VIP等级")
+    report_time = Column(DateTime(timezone=True), nullable=True, comment="上报时间")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), comment="快照更新时间")
+
+
+class GameInventoryState(Base):
+    """游戏账户背包状态表，记录增量存储模式下每个账户最近一次背包上报"""
+    __tablename__ = "game_inventory_states"
+    
+    account_id = Column(String(100), ForeignKey("game_accounts.account_id"), primary_key=True, comment="账户ID")
+    terminal_id = Column(String(100), nullable=False, index=True, comment="最近上报的终端设备ID")
+    region_code = Column(String(20), nullable=True, comment="游戏区域代码")
+    item_count = Column(Integer, nullable=False, default=0, comment="当前物品种类数")
+    report_time = Column(DateTime(timezone=True), nullable=True, comment="最近上报时间")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), comment="状态更新时间")
+
+
+class GameInventoryItem(Base):
+    """游戏账户当前背包物品表，每个账户每种物品一行"""
+    __tablename__ = "game_inventory_items"
+    __table_args__ = (
+        UniqueConstraint("account_id", "item_id", name="uq_inventory_item_account_item"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    account_id = Column(String(100), ForeignKey("game_accounts.account_id"), nullable=False, comment="账户ID")
+    item_id = Column(String(100), nullable=False, comment="物品ID")
+    item_name = Column(String(200), nullable=False, comment="物品名称")
+    item_type = Column(String(50), nullable=False, comment="物品类型")
+    quantity = Column(Integer, nullable=False, comment="数量")
+    quality = Column(String(50), nullable=True, comment="品质")
+    description = Column(Text, nullable=True, comment="描述")
+    updated_at = Column(DateTime(timezone=True), nullable=True, comment="最后变化的上报时间")
+
+
+class GameInventoryChange(Base):
+    """游戏背包变化记录表，仅在上报与当前背包不同时追加"""
+    __tablename__ = "game_inventory_changes"
+    __table_args__ = (
+        Index("idx_inventory_change_account_time", "account_id", "report_time"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    account_id = Column(String(100), ForeignKey("game_accounts.account_id"), nullable=False, comment="账户ID")
+    terminal_id = Column(String(100), nullable=False, comment="终端设备ID")
+    item_id = Column(String(100), nullable=False, comment="物品ID")
+    item_name = Column(String(200), nullable=False, comment="物品名称")
+    item_type = Column(String(50), nullable=False, comment="物品类型")
+    quality = Column(String(50), nullable=True, comment="品质")
+    description = Column(Text, nullable=True, comment="描述")
+    change_type = Column(String(20), nullable=False, comment="变化类型：added/removed/changed")
+    quantity_delta = Column(Integer, nullable=False, comment="数量变化")
+    quantity_after = Column(Integer, nullable=False, comment="变化后数量")
+    report_time = Column(DateTime(timezone=True), nullable=False, comment="上报时间")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,12 +1,13 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime
 from sqlalchemy.sql import func
 from app.core.database import Base
 
-class UserSession(Base):
-    __tablename__ = "user_sessions"
-    
+class RevokedToken(Base):
+    """已吊销的访问令牌（按令牌ID jti），令牌过期后由保留清理删除"""
+    __tablename__ = "revoked_tokens"
+
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
-    session_token = Column(String(255), unique=True, nullable=False, index=True)
-    expires_at = Column(DateTime(timezone=True), nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    jti = Column(String(64), unique=True, index=True, nullable=False, comment="令牌ID")
+    username = Column(String(50), nullable=True, comment="令牌主体")
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True, comment="令牌过期时间")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,64 @@
+from sqlalchemy import Column, Integer, String, DateTime, BigInteger, Float, Index, UniqueConstraint
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class TaskExecutionRollup(Base):
+    """
+    任务执行按小时/天汇总表，仅统计已结束的执行
+
+    dimension 为 total 时 dimension_id 为0，表示全部执行；为 task/terminal 时按任务ID/终端主键ID分组，
+    只按天汇总。
+    """
+    __tablename__ = "task_execution_rollups"
+    __table_args__ = (
+        UniqueConstraint("granularity", "dimension", "bucket_start", "dimension_id", "status",
+                         name="uq_task_execution_rollup"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    granularity = Column(String(10), nullable=False, comment="汇总粒度：hour/day")
+    bucket_start = Column(DateTime, nullable=False, comment="时间段起点（UTC）")
+    dimension = Column(String(10), nullable=False, comment="分组维度：total/task/terminal")
+    dimension_id = Column(Integer, nullable=False, default=0, comment="任务ID或终端主键ID，total为0")
+    status = Column(String(20), nullable=False, comment="执行结果：success/failed")
+    execution_count = Column(Integer, nullable=False, default=0, comment="执行次数")
+    duration_count = Column(Integer, nullable=False, default=0, comment="有开始时间的执行次数")
+    duration_seconds = Column(Float, nullable=False, default=0, comment="执行耗时合计（秒）")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class TerminalReportRollup(Base):
+    """终端上报次数按小时/天汇总表"""
+    __tablename__ = "terminal_report_rollups"
+    __table_args__ = (
+        UniqueConstraint("granularity", "bucket_start", "terminal_id", "report_type",
+                         name="uq_terminal_report_rollup"),
+        Index("idx_terminal_report_rollup_terminal", "granularity", "terminal_id", "bucket_start"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    granularity = Column(String(10), nullable=False, comment="汇总粒度：hour/day")
+    bucket_start = Column(DateTime, nullable=False, comment="时间段起点（UTC）")
+    terminal_id = Column(String(100), nullable=False, comment="终端设备ID")
+    report_type = Column(String(20), nullable=False, comment="上报类型：login/assets/inventory")
+    report_count = Column(Integer, nullable=False, default=0, comment="上报次数")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class AccountAssetRollup(Base):
+    """账户金子/元宝变化按小时/天汇总表"""
+    __tablename__ = "account_asset_rollups"
+    __table_args__ = (
+        UniqueConstraint("granularity", "account_id", "region_code", "bucket_start",
+                         name="uq_account_asset_rollup"),
+        Index("idx_account_asset_rollup_region", "granularity", "region_code", "bucket_start"),
+        Index("idx_account_asset_rollup_bucket", "granularity", "bucket_start"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    granularity = Column(String(10), nullable=False, comment="汇总粒度：hour/day")
+    bucket_start = Column(DateTime, nullable=False, comment="时间段起点（UTC）")
+    account_id = Column(String(100), nullable=False, comment="账户ID")
+    region_code = Column(String(20), nullable=False, default="", comment="游戏区域代码，未知为空串")
+    report_count = Column(Integer, nullable=False, default=0, comment="资产上报次数")
+    gold_delta = Column(BigInteger, nullable=False, default=0, comment="金子变化合计")
+    diamond_delta = Column(BigInteger, nullable=False, default=0, comment="元宝/钻石变化合计")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
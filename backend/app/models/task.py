@@ -30,4 +30,4 @@ class TaskExecution(Base):
     status = Column(Enum(TaskStatus), default=TaskStatus.pending, index=True)
     result = Column(JSON)
     started_at = Column(DateTime(timezone=True))
-    completed_at = Column(DateTime(timezone=True))
\ No newline at end of file
+    completed_at = Column(DateTime(timezone=True), index=True)
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Enum, JSON, Text
+from sqlalchemy import Column, Integer, String, DateTime, Enum, JSON, Text, LargeBinary, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -28,9 +28,25 @@ class Terminal(Base):
 
 class TerminalData(Base):
     __tablename__ = "terminal_data"
+    __table_args__ = (
+        # 按终端（及数据类型）查询并按时间倒序
+        Index("idx_terminal_data_terminal_type_created", "terminal_id", "data_type", "created_at"),
+        Index("idx_terminal_data_terminal_created", "terminal_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    terminal_id = Column(Integer, nullable=False, index=True)
-    data_type = Column(String(50), nullable=False, index=True)
-    data_content = Column(JSON, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
\ No newline at end of file
+    terminal_id = Column(Integer, nullable=False)
+    data_type = Column(String(50), nullable=False)
+    data_content = Column(JSON, nullable=True)
+    data_compressed = Column(LargeBinary(length=16777215), nullable=True, comment="zlib压缩的JSON数据")
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+class TerminalApiKey(Base):
+    """终端API密钥：只保存密钥ID，签名密钥由服务端主密钥对密钥ID计算HMAC得到"""
+    __tablename__ = "terminal_api_keys"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    key_id = Column(String(32), unique=True, index=True, nullable=False)
+    terminal_id = Column(String(100), index=True, nullable=False, comment="终端设备ID")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    revoked_at = Column(DateTime(timezone=True), nullable=True, comment="吊销时间，为空表示有效")
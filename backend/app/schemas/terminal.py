@@ -1,5 +1,6 @@
-from typing import Optional, Dict, Any
-from pydantic import BaseModel
+from typing import Optional, Dict, Any, List, Literal, Union
+from typing_extensions import Annotated
+from pydantic import BaseModel, Field
 from app.models.terminal import TerminalStatus
 from datetime import datetime
 
@@ -33,6 +34,21 @@ class TerminalInDB(TerminalBase):
 class Terminal(TerminalInDB):
     pass
 
+class TerminalApiKeyInfo(BaseModel):
+    """终端API密钥信息（不含密钥）"""
+    key_id: str
+    terminal_id: str
+    created_at: Optional[datetime] = None
+    revoked_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+class TerminalApiKeyIssued(BaseModel):
+    """新签发的终端API密钥，secret 只在签发时返回一次"""
+    key_id: str
+    secret: str
+
 class TerminalHeartbeat(BaseModel):
     status: TerminalStatus = TerminalStatus.online
     ip_address: Optional[str] = None
@@ -70,6 +86,16 @@ class AccountResponse(BaseModel):
     server_name: str
     last_login_time: str
 
+class AccountLeaseResponse(BaseModel):
+    """账号租约响应模型，租约到期前再次请求即续期"""
+    account_asset_id: int
+    account: str
+    password: str
+    region_code: str
+    server_name: Optional[str] = None
+    character_name: Optional[str] = None
+    lease_expires_at: Optional[datetime] = None
+
 class LoginReportData(BaseModel):
     """账户登录信息上报模型"""
     terminal_id: int
@@ -109,4 +135,26 @@ class InventoryReportData(BaseModel):
     items: list[InventoryItem]
     report_time: str
     region_code: Optional[str] = None
-    character_id: Optional[str] = None
\ No newline at end of file
+    character_id: Optional[str] = None
+
+class LoginBatchItem(BaseModel):
+    """批量上报中的登录记录"""
+    report_type: Literal["login"]
+    data: LoginReportData
+
+class AssetsBatchItem(BaseModel):
+    """批量上报中的资产记录"""
+    report_type: Literal["assets"]
+    data: AssetsReportData
+
+class InventoryBatchItem(BaseModel):
+    """批量上报中的背包记录"""
+    report_type: Literal["inventory"]
+    data: InventoryReportData
+
+class BatchReportData(BaseModel):
+    """多条上报批量提交模型，按report_type区分记录类型"""
+    reports: List[Annotated[
+        Union[LoginBatchItem, AssetsBatchItem, InventoryBatchItem],
+        Field(discriminator="report_type")
+    ]]
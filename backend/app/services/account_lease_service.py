@@ -0,0 +1,280 @@
+import logging
+import random
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Deque, Dict, Iterable, List, Optional, Set
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.account_asset import AccountAsset
+
+logger = logging.getLogger(__name__)
+
+# 支持 SELECT ... FOR UPDATE SKIP LOCKED 的数据库
+SKIP_LOCKED_DIALECTS = ("mysql", "mariadb", "postgresql")
+
+
+class AccountLeasePool:
+    """
+    账号租约分配器
+
+    终端请求账号时，已绑定账号则续期并返回原账号，否则从空闲账号（terminal_id为空）中领取一个，
+    绑定到终端并设置租约到期时间。领取最终都由条件更新
+        UPDATE account_assets SET terminal_id = ?, lease_expires_at = ? WHERE id = ? AND terminal_id IS NULL
+    决定，影响行数为0说明已被其他请求领取，换下一个候选账号重试，同一账号不会分配给两个终端。
+    候选账号的来源：
+      - MySQL/PostgreSQL：SELECT ... FOR UPDATE SKIP LOCKED 取一个未被其他事务锁定的空闲账号，并发请求互不等待
+      - 其他数据库：按区域维护进程内空闲账号队列，每次从数据库预取 prefetch 个并打乱顺序，不加锁；
+        领取冲突说明队列已过时，丢弃后重新预取
+    租约到期未续期、或终端主动释放后账号回到空闲状态。管理员手动绑定的账号没有租约，不会被回收。
+    """
+
+    def __init__(self, lease_seconds: int, sweep_seconds: int, prefetch: int, max_attempts: int = 16):
+        self.lease = timedelta(seconds=lease_seconds)
+        self.interval = sweep_seconds
+        self.prefetch = prefetch
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._refill_lock = threading.Lock()
+        # 区域编码（None表示不限区域）-> 候选空闲账号ID
+        self._queues: Dict[Optional[str], Deque[int]] = {}
+        # 已从队列取出、尚未完成领取的账号ID，预取时排除
+        self._inflight: Set[int] = set()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # 统计指标
+        self.claimed = 0
+        self.renewed = 0
+        self.conflicts = 0
+        self.exhausted = 0
+        self.refills = 0
+        self.released = 0
+        self.expired = 0
+
+    def _expires_at(self) -> datetime:
+        return datetime.utcnow() + self.lease
+
+    @staticmethod
+    def bound_account(db: Session, terminal_pk: int) -> Optional[AccountAsset]:
+        """终端当前绑定的账号（租约或管理员手动绑定），只读"""
+        return db.query(AccountAsset).filter(
+            AccountAsset.terminal_id == terminal_pk
+        ).order_by(AccountAsset.id).first()
+
+    def allocate(self, db: Session, terminal_pk: int, region_code: Optional[str] = None) -> Optional[AccountAsset]:
+        """
+        为终端分配账号，返回账号；没有空闲账号时返回None
+
+        终端已绑定其他区域的账号时抛出 ValueError，需先释放，一个终端同时只持有一个账号。
+        """
+        account = self.bound_account(db, terminal_pk)
+        if account is not None:
+            if region_code and account.region_code != region_code:
+                db.rollback()
+                raise ValueError(f"终端已绑定区域 {account.region_code} 的账号，请先释放")
+            if account.lease_expires_at is not None:
+                account.lease_expires_at = self._expires_at()
+                db.commit()
+                db.refresh(account)
+                with self._lock:
+                    self.renewed += 1
+            return account
+
+        if db.get_bind().dialect.name in SKIP_LOCKED_DIALECTS:
+            account_id = self._claim_skip_locked(db, terminal_pk, region_code)
+        else:
+            account_id = self._claim_from_queue(db, terminal_pk, region_code)
+        with self._lock:
+            if account_id is None:
+                self.exhausted += 1
+                return None
+            self.claimed += 1
+        return db.get(AccountAsset, account_id)
+
+    def _claim(self, db: Session, account_id: int, terminal_pk: int) -> bool:
+        """条件更新领取账号并提交，返回是否领取成功"""
+        result = db.execute(
+            update(AccountAsset)
+            .where(AccountAsset.id == account_id, AccountAsset.terminal_id.is_(None))
+            .values(terminal_id=terminal_pk, lease_expires_at=self._expires_at())
+        )
+        db.commit()
+        return result.rowcount == 1
+
+    def _free_accounts(self, region_code: Optional[str]):
+        query = select(AccountAsset.id).where(AccountAsset.terminal_id.is_(None))
+        if region_code:
+            query = query.where(AccountAsset.region_code == region_code)
+        return query.order_by(AccountAsset.id)
+
+    def _claim_skip_locked(self, db: Session, terminal_pk: int, region_code: Optional[str]) -> Optional[int]:
+        for _ in range(self.max_attempts):
+            account_id = db.execute(
+                self._free_accounts(region_code).limit(1).with_for_update(skip_locked=True)
+            ).scalar()
+            if account_id is None:
+                db.rollback()
+                return None
+            # 行锁在提交前一直持有，条件更新只在锁之前已被绑定的极端情况下失败
+            if self._claim(db, account_id, terminal_pk):
+                return account_id
+            with self._lock:
+                self.conflicts += 1
+        return None
+
+    def _claim_from_queue(self, db: Session, terminal_pk: int, region_code: Optional[str]) -> Optional[int]:
+        for _ in range(self.max_attempts):
+            account_id = self._next_candidate(db, region_code)
+            if account_id is None:
+                return None
+            try:
+                if self._claim(db, account_id, terminal_pk):
+                    return account_id
+            finally:
+                with self._lock:
+                    self._inflight.discard(account_id)
+            # 候选账号已被其他进程领取，说明预取的这一批已过时，丢弃后重新预取
+            with self._lock:
+                self.conflicts += 1
+                self._queues.pop(region_code, None)
+        return None
+
+    def _next_candidate(self, db: Session, region_code: Optional[str]) -> Optional[int]:
+        """从进程内队列取一个候选账号，队列为空时从数据库预取"""
+        while True:
+            with self._lock:
+                queue = self._queues.get(region_code)
+                if queue:
+                    account_id = queue.popleft()
+                    self._inflight.add(account_id)
+                    return account_id
+            if not self._refill(db, region_code):
+                return None
+
+    def _refill(self, db: Session, region_code: Optional[str]) -> bool:
+        # 同一时刻只由一个线程预取，其他线程等待后直接使用预取结果
+        with self._refill_lock:
+            with self._lock:
+                if self._queues.get(region_code):
+                    return True
+                excluded = set(self._inflight)
+            account_ids = db.execute(
+                self._free_accounts(region_code).limit(self.prefetch + len(excluded))
+            ).scalars().all()
+            db.rollback()
+            account_ids = [account_id for account_id in account_ids if account_id not in excluded][:self.prefetch]
+            # 打乱顺序，减少多个进程同时领取同一批账号时的冲突
+            random.shuffle(account_ids)
+            with self._lock:
+                self._queues[region_code] = deque(account_ids)
+                self.refills += 1
+            return bool(account_ids)
+
+    def _requeue(self, rows: Iterable) -> None:
+        """释放或回收的账号加入已有的队列"""
+        with self._lock:
+            for row in rows:
+                for region_code in (row.region_code, None):
+                    queue = self._queues.get(region_code)
+                    if queue is not None and row.id not in queue:
+                        queue.append(row.id)
+
+    def release(self, db: Session, terminal_pk: int) -> int:
+        """终端主动释放租约账号，返回释放数量；管理员手动绑定的账号不释放"""
+        rows = db.query(AccountAsset.id, AccountAsset.region_code).filter(
+            AccountAsset.terminal_id == terminal_pk,
+            AccountAsset.lease_expires_at.isnot(None)
+        ).all()
+        if not rows:
+            return 0
+        db.execute(
+            update(AccountAsset)
+            .where(AccountAsset.id.in_([row.id for row in rows]), AccountAsset.terminal_id == terminal_pk)
+            .values(terminal_id=None, lease_expires_at=None)
+        )
+        db.commit()
+        self._requeue(rows)
+        with self._lock:
+            self.released += len(rows)
+        return len(rows)
+
+    def expire(self, db: Session, now: Optional[datetime] = None) -> int:
+        """回收租约已到期的账号，返回回收数量"""
+        now = now or datetime.utcnow()
+        rows: List = db.query(AccountAsset.id, AccountAsset.region_code).filter(
+            AccountAsset.lease_expires_at < now
+        ).all()
+        if not rows:
+            return 0
+        # 查询之后续期的租约不回收
+        result = db.execute(
+            update(AccountAsset)
+            .where(AccountAsset.id.in_([row.id for row in rows]), AccountAsset.lease_expires_at < now)
+            .values(terminal_id=None, lease_expires_at=None)
+        )
+        db.commit()
+        self._requeue(rows)
+        with self._lock:
+            self.expired += result.rowcount
+        return result.rowcount
+
+    def run_once(self) -> int:
+        db = SessionLocal()
+        try:
+            return self.expire(db)
+        finally:
+            db.close()
+
+    def start(self) -> None:
+        if self._thread:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="account-lease", daemon=True)
+        self._thread.start()
+        logger.info("账号租约回收已启动: lease=%ss, interval=%ss",
+                    int(self.lease.total_seconds()), self.interval)
+
+    def stop(self) -> None:
+        if not self._thread:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                expired = self.run_once()
+                if expired:
+                    logger.info("回收到期账号租约 %s 个", expired)
+            except Exception:
+                logger.exception("回收账号租约失败")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._queues.clear()
+            self._inflight.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "lease_seconds": int(self.lease.total_seconds()),
+                "queued": {region_code or "*": len(queue) for region_code, queue in self._queues.items()},
+                "claimed": self.claimed,
+                "renewed": self.renewed,
+                "conflicts": self.conflicts,
+                "exhausted": self.exhausted,
+                "refills": self.refills,
+                "released": self.released,
+                "expired": self.expired
+            }
+
+
+account_lease_pool = AccountLeasePool(
+    lease_seconds=settings.ACCOUNT_LEASE_SECONDS,
+    sweep_seconds=settings.ACCOUNT_LEASE_SWEEP_SECONDS,
+    prefetch=settings.ACCOUNT_LEASE_PREFETCH
+)
@@ -0,0 +1,351 @@
+import logging
+import os
+import re
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+from sqlalchemy import DateTime, Integer, func, select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.game_account import GameAssetRecord, GameInventoryRecord
+from app.models.system_config import SystemConfig
+from app.services.partition_service import PartitionService
+from app.services.retention_service import RetentionService
+from app.services.rollup_service import WATERMARK_KEY_PREFIX, RollupService
+
+logger = logging.getLogger(__name__)
+
+# 归档的上报历史表
+ARCHIVE_MODELS = {
+    "game_asset_records": GameAssetRecord,
+    "game_inventory_records": GameInventoryRecord,
+}
+
+# 归档格式 -> (文件扩展名, pyarrow.dataset 格式名)
+ARCHIVE_FORMATS = {
+    "parquet": ("parquet", "parquet"),
+    "arrow": ("arrow", "ipc"),
+}
+
+# 归档文件名 part-<首个主键>-<最后主键>.<扩展名>，写入中的临时文件以 "." 开头
+PART_FILE_PATTERN = re.compile(r"^part-(\d+)-(\d+)\.(\w+)$")
+
+
+def _pyarrow():
+    """按需导入pyarrow，未安装时归档与读取归档不可用"""
+    try:
+        import pyarrow
+        import pyarrow.compute  # noqa: F401
+        import pyarrow.dataset  # noqa: F401
+        import pyarrow.ipc  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        raise RuntimeError("冷数据归档需要安装 pyarrow")
+    return pyarrow
+
+
+def _naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _day_start(value: datetime) -> datetime:
+    return _naive_utc(value).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class ArchiveResult(NamedTuple):
+    table: str
+    archived: int
+    deleted: int
+    days: int
+    files: int
+    bytes: int
+    elapsed: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.archived / self.elapsed if self.elapsed > 0 else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "table": self.table,
+            "archived": self.archived,
+            "deleted": self.deleted,
+            "days": self.days,
+            "files": self.files,
+            "bytes": self.bytes,
+            "elapsed_seconds": round(self.elapsed, 3),
+            "rows_per_second": round(self.rows_per_second, 1)
+        }
+
+
+class ArchiveService:
+    """
+    上报历史冷数据归档
+
+    入库早于 ARCHIVE_AFTER_DAYS 天的资产、背包记录按入库日期写入
+    ARCHIVE_DIR/<表名>/date=YYYY-MM-DD/ 下的Parquet或Arrow IPC文件，写完后再按主键范围分块从数据库删除。
+    统计汇总开启时只归档已汇总的行，趋势统计从汇总表读取，不受归档影响；
+    明细历史通过 history 合并归档文件与数据库中的记录。
+    """
+
+    @staticmethod
+    def table_dir(table: str) -> str:
+        return os.path.join(settings.ARCHIVE_DIR, table)
+
+    @staticmethod
+    def arrow_schema(model):
+        pa = _pyarrow()
+        fields = []
+        for column in model.__table__.columns:
+            if isinstance(column.type, DateTime):
+                arrow_type = pa.timestamp("us")
+            elif isinstance(column.type, Integer):
+                arrow_type = pa.int64()
+            else:
+                arrow_type = pa.string()
+            fields.append(pa.field(column.name, arrow_type))
+        return pa.schema(fields)
+
+    @staticmethod
+    def archived_max_id(day_dir: str) -> int:
+        """某天目录中已归档的最大主键，没有归档文件时为0"""
+        max_id = 0
+        if os.path.isdir(day_dir):
+            for name in os.listdir(day_dir):
+                match = PART_FILE_PATTERN.match(name)
+                if match:
+                    max_id = max(max_id, int(match.group(2)))
+        return max_id
+
+    @staticmethod
+    def rolled_up_id(db: Session, table: str) -> Optional[int]:
+        """
+        已汇总到的主键，只有不大于它的行可以归档；统计汇总关闭时不限制
+
+        归档后的行不会再被汇总，水位尚不存在时不归档任何行。
+        """
+        if not settings.ROLLUP_ENABLED:
+            return None
+        value = db.query(SystemConfig.config_value).filter(
+            SystemConfig.config_key == WATERMARK_KEY_PREFIX + table
+        ).scalar()
+        watermark = RollupService.parse_watermark(value)
+        return watermark[1] if watermark else 0
+
+    @staticmethod
+    def export_day(db: Session, model, day: datetime, max_id: Optional[int] = None,
+                   batch_size: Optional[int] = None) -> tuple:
+        """
+        把入库日期为 day 的行写入一个归档文件，返回 (写入行数, 文件字节数, 当天已归档的最大主键)
+
+        跳过当天已归档的主键（上次归档后删除未完成时），先写临时文件再改名，中途失败不会留下不完整的归档文件。
+        """
+        pa = _pyarrow()
+        batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+        extension = ARCHIVE_FORMATS[settings.ARCHIVE_FORMAT][0]
+        day_dir = os.path.join(ArchiveService.table_dir(model.__tablename__), f"date={day:%Y-%m-%d}")
+        archived_max = ArchiveService.archived_max_id(day_dir)
+
+        schema = ArchiveService.arrow_schema(model)
+        columns = list(model.__table__.columns)
+        datetime_indexes = [index for index, column in enumerate(columns) if isinstance(column.type, DateTime)]
+        stmt = select(*columns).where(model.id > archived_max)
+        if max_id is not None:
+            stmt = stmt.where(model.id <= max_id)
+        stmt = PartitionService.prune(db, stmt, model, day, day + timedelta(days=1)).order_by(model.id)
+
+        os.makedirs(day_dir, exist_ok=True)
+        temp_path = os.path.join(day_dir, f".part-{os.getpid()}-{threading.get_ident()}.{extension}")
+        writer = None
+        rows = 0
+        first_id = last_id = None
+        try:
+            result = db.execute(stmt.execution_options(stream_results=True, yield_per=batch_size))
+            for partition in result.partitions():
+                values = [list(column) for column in zip(*partition)]
+                for index in datetime_indexes:
+                    values[index] = [_naive_utc(value) if value is not None else None for value in values[index]]
+                batch = pa.table(
+                    [pa.array(column, type=field.type) for column, field in zip(values, schema)], schema=schema
+                )
+                if writer is None:
+                    if settings.ARCHIVE_FORMAT == "arrow":
+                        writer = pa.ipc.new_file(temp_path, schema,
+                                                 options=pa.ipc.IpcWriteOptions(compression="zstd"))
+                    else:
+                        writer = pa.parquet.ParquetWriter(temp_path, schema, compression="zstd")
+                    first_id = partition[0].id
+                writer.write_table(batch)
+                rows += len(partition)
+                last_id = partition[-1].id
+            db.commit()
+            if writer is None:
+                return 0, 0, archived_max
+            writer.close()
+            writer = None
+            path = os.path.join(day_dir, f"part-{first_id}-{last_id}.{extension}")
+            os.replace(temp_path, path)
+            return rows, os.path.getsize(path), last_id
+        finally:
+            if writer is not None:
+                writer.close()
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    @staticmethod
+    def archive_table(db: Session, model, cutoff: datetime,
+                      stop_event: Optional[threading.Event] = None) -> ArchiveResult:
+        """归档入库早于 cutoff 所在日期的全部完整天，每天写一个文件后删除该天已归档的行"""
+        table = model.__tablename__
+        cutoff = _day_start(cutoff)
+        max_id = ArchiveService.rolled_up_id(db, table)
+        start = time.perf_counter()
+        archived = deleted = days = files = size = 0
+
+        first = db.execute(select(func.min(model.created_at)).where(model.created_at < cutoff)).scalar()
+        db.commit()
+        while first is not None:
+            if stop_event is not None and stop_event.is_set():
+                break
+            day = _day_start(first)
+            next_day = day + timedelta(days=1)
+            rows, file_size, archived_max = ArchiveService.export_day(db, model, day, max_id)
+            if archived_max:
+                purged = RetentionService.purge(
+                    db, model, model.created_at, next_day, table=table, stop_event=stop_event,
+                    since=day, max_id=archived_max
+                )
+                deleted += purged.deleted
+            days += 1
+            archived += rows
+            files += 1 if rows else 0
+            size += file_size
+            first = db.execute(
+                select(func.min(model.created_at)).where(model.created_at >= next_day, model.created_at < cutoff)
+            ).scalar()
+            db.commit()
+
+        return ArchiveResult(table, archived, deleted, days, files, size, time.perf_counter() - start)
+
+    @staticmethod
+    def run(db: Session, now: Optional[datetime] = None,
+            stop_event: Optional[threading.Event] = None) -> List[ArchiveResult]:
+        """按 ARCHIVE_AFTER_DAYS 依次归档各表"""
+        now = now or datetime.utcnow()
+        cutoff = now - timedelta(days=settings.ARCHIVE_AFTER_DAYS)
+        results = []
+        for table, model in ARCHIVE_MODELS.items():
+            try:
+                result = ArchiveService.archive_table(db, model, cutoff, stop_event=stop_event)
+            except Exception:
+                db.rollback()
+                logger.exception("归档冷数据失败: %s", table)
+                continue
+            results.append(result)
+            if result.archived or result.deleted:
+                logger.info("归档冷数据 %s: 归档 %s 行（%s 天, %.1f MiB）, 删除 %s 行, 用时 %.1fs, %.0f 行/秒",
+                            table, result.archived, result.days, result.bytes / 1024 / 1024,
+                            result.deleted, result.elapsed, result.rows_per_second)
+        return results
+
+    @staticmethod
+    def archived_files(table: str, since: Optional[datetime] = None,
+                       until: Optional[datetime] = None) -> Dict[str, List[str]]:
+        """覆盖 [since, until) 的归档文件，按格式分组"""
+        table_dir = ArchiveService.table_dir(table)
+        files: Dict[str, List[str]] = {}
+        if not os.path.isdir(table_dir):
+            return files
+        # SQLite下恰好零点入库的行（不含微秒）按文本比较早于当天零点，会写入前一天的文件，下限多读一天
+        first_day = _naive_utc(since).date() - timedelta(days=1) if since is not None else None
+        extensions = {extension: name for name, (extension, _) in ARCHIVE_FORMATS.items()}
+        for entry in sorted(os.listdir(table_dir)):
+            if not entry.startswith("date="):
+                continue
+            try:
+                day = date.fromisoformat(entry[len("date="):])
+            except ValueError:
+                continue
+            if first_day is not None and day < first_day:
+                continue
+            if until is not None and datetime.combine(day, datetime.min.time()) >= _naive_utc(until):
+                continue
+            day_dir = os.path.join(table_dir, entry)
+            for name in sorted(os.listdir(day_dir)):
+                match = PART_FILE_PATTERN.match(name)
+                if match and match.group(3) in extensions:
+                    files.setdefault(extensions[match.group(3)], []).append(os.path.join(day_dir, name))
+        return files
+
+    @staticmethod
+    def read(table: str, since: Optional[datetime] = None, until: Optional[datetime] = None,
+             filters: Optional[Dict[str, Any]] = None, order_by: Sequence[str] = ("id",),
+             limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """读取归档文件中入库时间在 [since, until) 且各列等于 filters 的行，按 order_by 升序"""
+        files = ArchiveService.archived_files(table, since, until)
+        if not files:
+            return []
+        pa = _pyarrow()
+        field = pa.compute.field
+        schema = ArchiveService.arrow_schema(ARCHIVE_MODELS[table])
+        condition = None
+        terms = [field(name) == value for name, value in (filters or {}).items()]
+        if since is not None:
+            terms.append(field("created_at") >= pa.scalar(_naive_utc(since), type=pa.timestamp("us")))
+        if until is not None:
+            terms.append(field("created_at") < pa.scalar(_naive_utc(until), type=pa.timestamp("us")))
+        for term in terms:
+            condition = term if condition is None else condition & term
+
+        tables = [
+            pa.dataset.dataset(paths, schema=schema, format=ARCHIVE_FORMATS[archive_format][1]).to_table(
+                filter=condition
+            )
+            for archive_format, paths in files.items()
+        ]
+        result = pa.concat_tables(tables) if len(tables) > 1 else tables[0]
+        result = result.sort_by([(name, "ascending") for name in order_by])
+        if limit is not None:
+            result = result.slice(0, limit)
+        return result.to_pylist()
+
+    @staticmethod
+    def history(db: Session, model, account_id: str, since: Optional[datetime] = None,
+                until: Optional[datetime] = None, limit: int = 1000) -> List[Dict[str, Any]]:
+        """账户在 [since, until) 入库的记录，合并归档文件与数据库，按上报时间升序"""
+        columns = [column.name for column in model.__table__.columns]
+        query = db.query(*model.__table__.columns).filter(model.account_id == account_id)
+        query = PartitionService.prune(db, query, model, since, until)
+        live = {
+            row.id: dict(zip(columns, row))
+            for row in query.order_by(model.report_time, model.id).limit(limit).all()
+        }
+        archived = ArchiveService.read(
+            model.__tablename__, since, until, {"account_id": account_id},
+            order_by=("report_time", "id"), limit=limit
+        )
+        # 归档后尚未删除完的行在两处都有，以数据库中的为准
+        records = [record for record in archived if record["id"] not in live] + list(live.values())
+        records.sort(key=lambda record: (
+            _naive_utc(record["report_time"]) if record["report_time"] is not None else datetime.min, record["id"]
+        ))
+        return records[:limit]
+
+    @staticmethod
+    def summary() -> Dict[str, dict]:
+        """各表归档文件的天数、文件数、字节数和日期范围"""
+        summary = {}
+        for table in ARCHIVE_MODELS:
+            files = [path for paths in ArchiveService.archived_files(table).values() for path in paths]
+            days = sorted({os.path.basename(os.path.dirname(path))[len("date="):] for path in files})
+            summary[table] = {
+                "days": len(days),
+                "files": len(files),
+                "bytes": sum(os.path.getsize(path) for path in files),
+                "first_date": days[0] if days else None,
+                "last_date": days[-1] if days else None
+            }
+        return summary
@@ -2,9 +2,8 @@ from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 from app.core.security import verify_password, create_access_token
 from app.models.user import User
-from app.models.session import UserSession
 from app.core.config import settings
-import secrets
+from app.services.token_revocation_service import token_revocations
 
 class AuthService:
     @staticmethod
@@ -18,56 +17,24 @@ class AuthService:
         return user
     
     @staticmethod
-    def create_user_session(db: Session, user: User) -> dict:
-        """创建用户会话"""
-        # 生成访问令牌
+    def create_user_session(user: User) -> dict:
+        """创建用户会话：签发访问令牌，不写数据库，登出时按令牌ID吊销"""
         access_token = create_access_token(
-            data={"sub": user.username},
+            subject=user.username,
             expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         )
         
-        # 生成会话令牌
-        session_token = secrets.token_urlsafe(32)
-        
-        # 创建会话记录
-        user_session = UserSession(
-            user_id=user.id,
-            session_token=session_token,
-            expires_at=datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-        )
-        
-        db.add(user_session)
-        db.commit()
-        
         return {
             "access_token": access_token,
             "token_type": "bearer",
-            "session_token": session_token,
             "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
         }
     
     @staticmethod
-    def revoke_user_session(db: Session, session_token: str) -> bool:
-        """撤销用户会话"""
-        session = db.query(UserSession).filter(
-            UserSession.session_token == session_token
-        ).first()
-        
-        if session:
-            db.delete(session)
-            db.commit()
-            return True
-        return False
-    
-    @staticmethod
-    def cleanup_expired_sessions(db: Session):
-        """清理过期会话"""
-        expired_sessions = db.query(UserSession).filter(
-            UserSession.expires_at < datetime.utcnow()
-        ).all()
-        
-        for session in expired_sessions:
-            db.delete(session)
-        
-        db.commit()
-        return len(expired_sessions)
\ No newline at end of file
+    def revoke_token(db: Session, payload: dict) -> bool:
+        """按令牌载荷中的jti吊销令牌至其过期，返回是否新吊销"""
+        jti = payload.get("jti")
+        if not jti:
+            raise ValueError("令牌不支持吊销，请等待其过期")
+        expires_at = datetime.utcfromtimestamp(payload["exp"])
+        return token_revocations.revoke(db, jti, expires_at, username=payload.get("sub"))
@@ -0,0 +1,192 @@
+import csv
+import io
+import json
+import logging
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.game_account import GameAssetRecord, GameInventoryChange, GameInventoryRecord, GameLoginRecord
+from app.models.terminal import Terminal, TerminalData
+from app.services.partition_service import PartitionService
+from app.services.terminal_data_service import TerminalDataService
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ("ndjson", "csv")
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+# 按账户导出的上报历史表
+ACCOUNT_EXPORT_MODELS = {
+    "asset-records": GameAssetRecord,
+    "inventory-records": GameInventoryRecord,
+    "inventory-changes": GameInventoryChange,
+    "login-records": GameLoginRecord,
+}
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, bytes):
+        return value.decode("utf-8", "replace")
+    raise TypeError(f"无法序列化的类型: {type(value).__name__}")
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False, default=_json_default)
+    if isinstance(value, (datetime, date, Decimal, Enum, bytes)):
+        return _json_default(value)
+    return value
+
+
+class ExportService:
+    """
+    上报历史数据流式导出
+
+    查询使用服务端游标（stream_results）按 EXPORT_BATCH_SIZE 行分批读取，逐批编码为NDJSON或CSV并写出，
+    可选在写出时gzip压缩；不创建ORM对象和响应模型，内存占用与结果集大小无关。
+    """
+
+    @staticmethod
+    def account_records_statement(
+        db: Session,
+        kind: str,
+        account_id: Optional[str] = None,
+        terminal_id: Optional[str] = None,
+        region_code: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        after_id: Optional[int] = None
+    ):
+        """登录、资产、背包记录的导出查询，按主键顺序；时间窗口按入库时间（背包变化记录按上报时间）"""
+        model = ACCOUNT_EXPORT_MODELS[kind]
+        stmt = select(*model.__table__.columns)
+        if account_id:
+            stmt = stmt.where(model.account_id == account_id)
+        if terminal_id:
+            stmt = stmt.where(model.terminal_id == terminal_id)
+        if region_code is not None:
+            stmt = stmt.where(model.region_code == region_code)
+        if after_id is not None:
+            stmt = stmt.where(model.id > after_id)
+        # 背包变化记录没有分区，按上报时间过滤
+        if model is GameInventoryChange:
+            if since is not None:
+                stmt = stmt.where(model.report_time >= since)
+            if until is not None:
+                stmt = stmt.where(model.report_time < until)
+        else:
+            stmt = PartitionService.prune(db, stmt, model, since, until)
+        return stmt.order_by(model.id)
+
+    @staticmethod
+    def terminal_data_statement(
+        db: Session,
+        terminal_pk: Optional[int] = None,
+        data_type: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        after_id: Optional[int] = None
+    ):
+        """终端原始数据的导出查询，输出终端设备ID而不是终端主键"""
+        stmt = select(
+            TerminalData.id,
+            Terminal.terminal_id,
+            TerminalData.data_type,
+            TerminalData.data_content,
+            TerminalData.data_compressed,
+            TerminalData.created_at
+        ).outerjoin(Terminal, Terminal.id == TerminalData.terminal_id)
+        if terminal_pk is not None:
+            stmt = stmt.where(TerminalData.terminal_id == terminal_pk)
+        if data_type:
+            stmt = stmt.where(TerminalData.data_type == data_type)
+        if after_id is not None:
+            stmt = stmt.where(TerminalData.id > after_id)
+        stmt = PartitionService.prune(db, stmt, TerminalData, since, until)
+        return stmt.order_by(TerminalData.id)
+
+    @staticmethod
+    def decode_terminal_data(record: Dict[str, Any]) -> Dict[str, Any]:
+        """压缩保存的终端数据解压到 data_content，不输出 data_compressed"""
+        blob = record.pop("data_compressed")
+        if record["data_content"] is None and blob is not None:
+            record["data_content"] = TerminalDataService.decode(blob)
+        return record
+
+    @staticmethod
+    def stream(
+        stmt,
+        export_format: str = "ndjson",
+        compress: bool = False,
+        transform: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+        exclude: tuple = (),
+        batch_size: Optional[int] = None
+    ) -> Iterator[bytes]:
+        """
+        执行查询并逐批产出编码后的字节块
+
+        transform 逐行转换记录，exclude 为转换后不再输出的列（CSV表头不包含）。
+        使用独立的数据库会话：响应体在接口函数返回后才开始写出。
+        """
+        batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+        encoder = zlib.compressobj(settings.EXPORT_GZIP_LEVEL, zlib.DEFLATED, 31) if compress else None
+
+        def emit(text: str) -> bytes:
+            data = text.encode("utf-8")
+            return encoder.compress(data) if encoder else data
+
+        db = SessionLocal()
+        rows = 0
+        try:
+            result = db.execute(stmt.execution_options(stream_results=True, yield_per=batch_size))
+            fields: List[str] = [key for key in result.keys() if key not in exclude]
+            if export_format == "csv":
+                buffer = io.StringIO()
+                csv.writer(buffer, lineterminator="\n").writerow(fields)
+                header = emit(buffer.getvalue())
+                if header:
+                    yield header
+            for partition in result.partitions():
+                records = [dict(row._mapping) for row in partition]
+                if transform:
+                    records = [transform(record) for record in records]
+                if export_format == "csv":
+                    buffer = io.StringIO()
+                    writer = csv.writer(buffer, lineterminator="\n")
+                    writer.writerows([_csv_value(record.get(field)) for field in fields] for record in records)
+                    chunk = buffer.getvalue()
+                else:
+                    chunk = "".join(
+                        json.dumps(record, ensure_ascii=False, default=_json_default, separators=(",", ":")) + "\n"
+                        for record in records
+                    )
+                rows += len(records)
+                data = emit(chunk)
+                if data:
+                    yield data
+            if encoder:
+                yield encoder.flush()
+        except Exception:
+            # 响应头已发出，只能中断输出；客户端收到的文件不完整
+            logger.exception("导出中断，已输出 %s 行", rows)
+            raise
+        finally:
+            db.close()
@@ -0,0 +1,294 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+from pydantic import BaseModel
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.terminal import Terminal
+from app.schemas.terminal import LoginReportData, AssetsReportData, InventoryReportData
+from app.services.report_service import ReportService
+
+logger = logging.getLogger(__name__)
+
+# 上报类型 -> 数据模型
+REPORT_SCHEMAS = {
+    "login": LoginReportData,
+    "assets": AssetsReportData,
+    "inventory": InventoryReportData,
+}
+
+class ReportIngestQueue:
+    """
+    上报数据写后队列
+
+    接口校验通过的上报先进入内存有界队列并立即返回，后台线程每隔 flush_interval_ms
+    或积累 flush_batch_size 条时批量写库，每批一个事务。配置 spool_path 后入队数据同时
+    追加写入本地spool分段文件（{spool_path}.00000001 ...），分段写满 segment_bytes 后切换到
+    新分段，某个分段的数据全部落库后直接删除该文件，不重写spool；进程重启时重放剩余分段
+    （至少一次语义）。逐条重试仍失败的上报写入死信文件 {spool_path}.dead，不会随分段删除而丢失。
+    """
+
+    def __init__(self, enabled: bool, maxsize: int, flush_interval_ms: int,
+                 flush_batch_size: int, spool_path: Optional[str] = None,
+                 segment_bytes: int = 4 * 1024 * 1024):
+        self.enabled = enabled
+        self.maxsize = maxsize
+        self.flush_interval = flush_interval_ms / 1000
+        self.flush_batch_size = flush_batch_size
+        self.spool_path = spool_path or None
+        self.segment_bytes = segment_bytes
+        self.dead_letter_path = f"{self.spool_path}.dead" if self.spool_path else None
+        # 队列元素为 (所在spool分段路径, 上报数据)，未配置spool时分段路径为None
+        self._queue: Deque[Tuple[Optional[str], dict]] = deque()
+        self._condition = threading.Condition()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._spool_file = None
+        self._segment_path: Optional[str] = None
+        self._segment_seq = 0
+        self._segment_size = 0
+        # 各分段尚未落库的条数
+        self._pending: Dict[str, int] = {}
+
+        # 统计指标
+        self.enqueued = 0
+        self.flushed = 0
+        self.rejected = 0
+        self.failed = 0
+        self.flush_count = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    def start(self) -> None:
+        if not self.enabled or self._thread:
+            return
+        if self.spool_path:
+            self._replay_spool()
+            self._open_segment()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="report-ingest-flusher", daemon=True)
+        self._thread.start()
+        logger.info("上报写后队列已启动: maxsize=%s interval=%ss batch=%s spool=%s",
+                    self.maxsize, self.flush_interval, self.flush_batch_size, self.spool_path)
+
+    def stop(self) -> None:
+        """停止后台线程并写入剩余数据"""
+        if not self._thread:
+            return
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        self._thread.join()
+        self._thread = None
+        with self._condition:
+            self._close_segment()
+
+    def submit_many(self, terminal_id: str, reports: List[Tuple[str, BaseModel]]) -> bool:
+        """
+        同一终端的多条上报整体入队，剩余容量不足时全部拒绝
+
+        配置spool时会同步追加写文件，异步接口中应通过线程池调用
+        """
+        items = [
+            {
+                "report_type": report_type,
+                "terminal_id": terminal_id,
+                "payload": data.dict()
+            }
+            for report_type, data in reports
+        ]
+        lines = "".join(json.dumps(item, ensure_ascii=False) + "\n" for item in items) if self.spool_path else ""
+        with self._condition:
+            if len(self._queue) + len(items) > self.maxsize:
+                self.rejected += len(items)
+                return False
+            segment = self._segment_path
+            if self._spool_file:
+                self._spool_file.write(lines)
+                self._spool_file.flush()
+                self._pending[segment] = self._pending.get(segment, 0) + len(items)
+                self._segment_size += len(lines)
+                if self._segment_size >= self.segment_bytes:
+                    self._close_segment()
+                    self._open_segment()
+            self._queue.extend((segment, item) for item in items)
+            self.enqueued += len(items)
+            if len(self._queue) >= self.flush_batch_size:
+                self._condition.notify()
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "queue_depth": len(self._queue),
+            "maxsize": self.maxsize,
+            "enqueued": self.enqueued,
+            "flushed": self.flushed,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "spool_segments": len(self._pending),
+            "dead_letter_path": self.dead_letter_path,
+            "flush_count": self.flush_count,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "avg_flush_ms": round(self._total_flush_ms / self.flush_count, 2) if self.flush_count else 0,
+            "max_flush_ms": round(self.max_flush_ms, 2)
+        }
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                if not self._stopping and len(self._queue) < self.flush_batch_size:
+                    self._condition.wait(self.flush_interval)
+                entries = [self._queue.popleft() for _ in range(min(self.flush_batch_size, len(self._queue)))]
+                stopping = self._stopping
+            if entries:
+                self._flush([item for _, item in entries])
+                self._release_segments(entries)
+            elif stopping:
+                return
+
+    def _flush(self, batch: List[dict]) -> None:
+        start = time.perf_counter()
+        db = SessionLocal()
+        try:
+            try:
+                self._save_batch(db, batch)
+                db.commit()
+                self.flushed += len(batch)
+            except Exception:
+                db.rollback()
+                logger.exception("批量写入上报数据失败，改为逐条写入: batch=%s", len(batch))
+                dead_letters = []
+                for item in batch:
+                    try:
+                        self._save_batch(db, [item])
+                        db.commit()
+                        self.flushed += 1
+                    except Exception as e:
+                        db.rollback()
+                        self.failed += 1
+                        dead_letters.append({**item, "error": str(e)})
+                        logger.exception("上报数据写入失败: %s %s", item["report_type"], item["terminal_id"])
+                self._write_dead_letters(dead_letters)
+        finally:
+            db.close()
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.flush_count += 1
+        self.last_flush_ms = elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        self._total_flush_ms += elapsed_ms
+
+    @staticmethod
+    def _save_batch(db, batch: List[dict]) -> None:
+        terminal_ids = {item["terminal_id"] for item in batch}
+        terminals: Dict[str, Terminal] = {
+            terminal.terminal_id: terminal
+            for terminal in db.query(Terminal).filter(Terminal.terminal_id.in_(terminal_ids))
+        }
+        for item in batch:
+            terminal = terminals.get(item["terminal_id"])
+            if terminal is None:
+                logger.warning("终端不存在，丢弃上报: %s", item["terminal_id"])
+                continue
+            schema = REPORT_SCHEMAS[item["report_type"]]
+            ReportService.save_report(db, terminal, item["report_type"], schema(**item["payload"]))
+
+    def _write_dead_letters(self, dead_letters: List[dict]) -> None:
+        """逐条写入仍失败的上报追加到死信文件，由运维排查后重新导入"""
+        if not dead_letters:
+            return
+        if not self.dead_letter_path:
+            logger.error("未配置spool，%s 条写入失败的上报已丢弃", len(dead_letters))
+            return
+        with open(self.dead_letter_path, "a", encoding="utf-8") as dead:
+            dead.write("".join(json.dumps(item, ensure_ascii=False) + "\n" for item in dead_letters))
+        logger.error("%s 条写入失败的上报已移入死信文件 %s", len(dead_letters), self.dead_letter_path)
+
+    def _release_segments(self, entries: List[Tuple[Optional[str], dict]]) -> None:
+        """扣减已落库数据所在分段的计数，删除全部落库且不再写入的分段"""
+        if not self.spool_path:
+            return
+        finished = []
+        with self._condition:
+            for segment, _ in entries:
+                if segment is None:
+                    continue
+                self._pending[segment] -= 1
+                if self._pending[segment] == 0:
+                    if segment == self._segment_path:
+                        # 当前分段已全部落库，切换新分段后即可删除
+                        self._close_segment()
+                        self._open_segment()
+                    del self._pending[segment]
+                    finished.append(segment)
+        for segment in finished:
+            try:
+                os.remove(segment)
+            except OSError:
+                logger.warning("删除spool分段失败: %s", segment, exc_info=True)
+
+    def _segment_files(self) -> List[Tuple[int, str]]:
+        """返回磁盘上已有的spool分段 (序号, 路径)，按序号排序"""
+        directory = os.path.dirname(os.path.abspath(self.spool_path))
+        prefix = os.path.basename(self.spool_path) + "."
+        segments = []
+        for name in os.listdir(directory):
+            suffix = name[len(prefix):]
+            if name.startswith(prefix) and suffix.isdigit():
+                segments.append((int(suffix), os.path.join(os.path.dirname(self.spool_path), name)))
+        return sorted(segments)
+
+    def _open_segment(self) -> None:
+        self._segment_seq += 1
+        self._segment_path = f"{self.spool_path}.{self._segment_seq:08d}"
+        self._spool_file = open(self._segment_path, "a", encoding="utf-8")
+        self._segment_size = 0
+
+    def _close_segment(self) -> None:
+        if self._spool_file:
+            self._spool_file.close()
+            self._spool_file = None
+        # 未写入任何数据的分段直接删除
+        if self._segment_path and self._segment_path not in self._pending and os.path.exists(self._segment_path):
+            os.remove(self._segment_path)
+        self._segment_path = None
+
+    def _replay_spool(self) -> None:
+        # 旧版本的单文件spool按序号0的分段处理
+        segments = [(0, self.spool_path)] if os.path.exists(self.spool_path) else []
+        segments += self._segment_files()
+        for seq, segment in segments:
+            count = 0
+            with open(segment, encoding="utf-8") as spool:
+                for line in spool:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        self._queue.append((segment, json.loads(line)))
+                        count += 1
+                    except ValueError:
+                        logger.warning("跳过损坏的spool记录: %s", segment)
+            if count:
+                self._pending[segment] = count
+            else:
+                os.remove(segment)
+            self._segment_seq = max(self._segment_seq, seq)
+        if self._queue:
+            logger.info("从spool恢复 %s 条未写入的上报，共 %s 个分段", len(self._queue), len(self._pending))
+
+
+report_queue = ReportIngestQueue(
+    enabled=settings.REPORT_WRITE_BEHIND_ENABLED,
+    maxsize=settings.REPORT_QUEUE_MAX_SIZE,
+    flush_interval_ms=settings.REPORT_FLUSH_INTERVAL_MS,
+    flush_batch_size=settings.REPORT_FLUSH_BATCH_SIZE,
+    spool_path=settings.REPORT_SPOOL_PATH,
+    segment_bytes=settings.REPORT_SPOOL_SEGMENT_BYTES
+)
@@ -0,0 +1,237 @@
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.game_account import (
+    GameInventoryChange, GameInventoryItem, GameInventoryRecord, GameInventoryState
+)
+from app.schemas.terminal import InventoryItem
+from app.utils.db_upsert import insert_if_absent, upsert
+
+# 参与变化比较的物品属性（数量之外）
+ITEM_ATTRIBUTES = ("item_name", "item_type", "quality", "description")
+
+# 账户首次上报前预先插入的背包状态行的上报时间，早于任何实际上报
+NO_REPORT_TIME = datetime(1970, 1, 1)
+
+class InventoryService:
+    """
+    增量背包存储
+
+    每个账户只保存当前背包（game_inventory_items），上报与当前背包不同时才追加物品
+    变化记录（game_inventory_changes），任意时刻的历史背包由变化记录重建。
+    方法均不提交事务，由调用方统一提交。
+    """
+
+    @staticmethod
+    def _normalize_time(value: datetime) -> datetime:
+        """带时区的时间转换为UTC无时区时间，便于与数据库读出的时间比较"""
+        if value.tzinfo is not None:
+            return value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+    @staticmethod
+    def _merge_items(items: List[InventoryItem]) -> Dict[str, dict]:
+        """按item_id合并同一次上报中的重复物品"""
+        merged: Dict[str, dict] = {}
+        for item in items:
+            if item.item_id in merged:
+                merged[item.item_id]["quantity"] += item.quantity
+                continue
+            merged[item.item_id] = {
+                "item_id": item.item_id,
+                "item_name": item.item_name,
+                "item_type": item.item_type,
+                "quantity": item.quantity,
+                "quality": item.quality,
+                "description": item.description
+            }
+        return merged
+
+    @staticmethod
+    def _execute_chunked(db: Session, stmt, rows: List[dict]) -> None:
+        """按 REPORT_INSERT_CHUNK_SIZE 分块执行，与快照模式的 ReportService.bulk_insert 相同"""
+        chunk_size = settings.REPORT_INSERT_CHUNK_SIZE
+        for start in range(0, len(rows), chunk_size):
+            db.execute(stmt, rows[start:start + chunk_size])
+
+    @staticmethod
+    def _change_row(account_id: str, terminal_id: str, item: dict, change_type: str,
+                    quantity_delta: int, quantity_after: int, report_time: datetime) -> dict:
+        return {
+            "account_id": account_id,
+            "terminal_id": terminal_id,
+            "item_id": item["item_id"],
+            "item_name": item["item_name"],
+            "item_type": item["item_type"],
+            "quality": item["quality"],
+            "description": item["description"],
+            "change_type": change_type,
+            "quantity_delta": quantity_delta,
+            "quantity_after": quantity_after,
+            "report_time": report_time
+        }
+
+    @staticmethod
+    def apply_report(db: Session, account_id: str, terminal_id: str, region_code: Optional[str],
+                     items: List[InventoryItem], report_time: datetime) -> Optional[int]:
+        """
+        将一次背包上报与当前背包比较，只写入差异
+
+        返回写入的变化记录数；上报时间早于该账户最近一次上报时返回None，
+        乱序到达的旧上报不会改变当前背包。
+        """
+        report_time = InventoryService._normalize_time(report_time)
+
+        # 锁定账户背包状态行，串行化同一账户的并发上报。首次上报时状态行尚不存在，
+        # 先插入一行（已存在时不变）再加锁，否则并发的首次上报都读到空背包并插入相同的物品
+        insert_if_absent(db, GameInventoryState, [{
+            "account_id": account_id,
+            "terminal_id": terminal_id,
+            "region_code": region_code,
+            "item_count": 0,
+            "report_time": NO_REPORT_TIME,
+            "updated_at": datetime.utcnow()
+        }], index_elements=["account_id"])
+        last_report_time = db.execute(
+            select(GameInventoryState.report_time)
+            .where(GameInventoryState.account_id == account_id)
+            .with_for_update()
+        ).scalar()
+        if last_report_time and report_time < last_report_time:
+            return None
+
+        # 读取列而非ORM对象，避免批量UPDATE/DELETE后会话中留下过期对象
+        current = {
+            row.item_id: row._asdict()
+            for row in db.execute(
+                select(
+                    GameInventoryItem.id, GameInventoryItem.item_id, GameInventoryItem.quantity,
+                    *[getattr(GameInventoryItem, attribute) for attribute in ITEM_ATTRIBUTES]
+                ).where(GameInventoryItem.account_id == account_id)
+            )
+        }
+        incoming = InventoryService._merge_items(items)
+
+        new_items, updated_items, changes = [], [], []
+        for item_id, item in incoming.items():
+            existing = current.pop(item_id, None)
+            if existing is None:
+                new_items.append(dict(item, account_id=account_id, updated_at=report_time))
+                changes.append(InventoryService._change_row(
+                    account_id, terminal_id, item, "added", item["quantity"], item["quantity"], report_time
+                ))
+            elif existing["quantity"] != item["quantity"] or any(
+                existing[attribute] != item[attribute] for attribute in ITEM_ATTRIBUTES
+            ):
+                updated_items.append(dict(item, id=existing["id"], updated_at=report_time))
+                changes.append(InventoryService._change_row(
+                    account_id, terminal_id, item, "changed",
+                    item["quantity"] - existing["quantity"], item["quantity"], report_time
+                ))
+        # 本次上报中不再出现的物品
+        removed = list(current.values())
+        for item in removed:
+            changes.append(InventoryService._change_row(
+                account_id, terminal_id, item, "removed", -item["quantity"], 0, report_time
+            ))
+
+        InventoryService._execute_chunked(db, insert(GameInventoryItem), new_items)
+        InventoryService._execute_chunked(db, update(GameInventoryItem), updated_items)
+        removed_ids = [item["id"] for item in removed]
+        for start in range(0, len(removed_ids), settings.REPORT_INSERT_CHUNK_SIZE):
+            db.execute(
+                delete(GameInventoryItem)
+                .where(GameInventoryItem.id.in_(removed_ids[start:start + settings.REPORT_INSERT_CHUNK_SIZE]))
+                .execution_options(synchronize_session=False)
+            )
+        InventoryService._execute_chunked(db, insert(GameInventoryChange), changes)
+
+        upsert(
+            db,
+            GameInventoryState,
+            [{
+                "account_id": account_id,
+                "terminal_id": terminal_id,
+                "region_code": region_code,
+                "item_count": len(incoming),
+                "report_time": report_time,
+                "updated_at": datetime.utcnow()
+            }],
+            index_elements=["account_id"],
+            update_columns=["terminal_id", "region_code", "item_count", "report_time", "updated_at"],
+            newer_column="report_time"
+        )
+        return len(changes)
+
+    @staticmethod
+    def get_current(db: Session, account_id: str) -> Optional[Tuple[GameInventoryState, List[GameInventoryItem]]]:
+        """读取账户当前背包，账户没有增量存储的背包时返回None"""
+        state = db.get(GameInventoryState, account_id)
+        if state is None:
+            return None
+        items = db.query(GameInventoryItem).filter(
+            GameInventoryItem.account_id == account_id
+        ).order_by(GameInventoryItem.item_id).all()
+        return state, items
+
+    @staticmethod
+    def reconstruct(db: Session, account_id: str, at: datetime) -> dict:
+        """
+        重建账户在指定时刻的背包
+
+        每种物品取at之前最后一条变化记录即为当时的状态；at早于首条变化记录时，
+        回退到快照模式写入的背包记录。
+        """
+        at = InventoryService._normalize_time(at)
+        latest_ids = select(func.max(GameInventoryChange.id)).where(
+            GameInventoryChange.account_id == account_id,
+            GameInventoryChange.report_time <= at
+        ).group_by(GameInventoryChange.item_id)
+        latest_changes = db.query(GameInventoryChange).filter(
+            GameInventoryChange.id.in_(latest_ids)
+        ).order_by(GameInventoryChange.item_id).all()
+
+        if latest_changes:
+            return {
+                "source": "delta",
+                "report_time": max(change.report_time for change in latest_changes),
+                "items": [
+                    {
+                        "item_id": change.item_id,
+                        "item_name": change.item_name,
+                        "item_type": change.item_type,
+                        "quantity": change.quantity_after,
+                        "quality": change.quality
+                    }
+                    for change in latest_changes
+                    if change.change_type != "removed"
+                ]
+            }
+
+        # 回退到快照记录：取at之前最近一次上报的全部物品
+        snapshot_time = db.query(func.max(GameInventoryRecord.report_time)).filter(
+            GameInventoryRecord.account_id == account_id,
+            GameInventoryRecord.report_time <= at
+        ).scalar()
+        if snapshot_time is None:
+            return {"source": None, "report_time": None, "items": []}
+        records = db.query(GameInventoryRecord).filter(
+            GameInventoryRecord.account_id == account_id,
+            GameInventoryRecord.report_time == snapshot_time
+        ).all()
+        return {
+            "source": "snapshot",
+            "report_time": snapshot_time,
+            "items": [
+                {
+                    "item_id": record.item_id,
+                    "item_name": record.item_name,
+                    "item_type": record.item_type,
+                    "quantity": record.quantity,
+                    "quality": record.quality
+                }
+                for record in records
+            ]
+        }
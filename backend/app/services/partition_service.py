@@ -0,0 +1,270 @@
+import calendar
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# 按 created_at 范围分区的上报历史表（见 migrations/partition_report_tables.sql）
+PARTITIONED_TABLES = ("terminal_data", "game_asset_records", "game_inventory_records", "game_login_records")
+
+# 分区列表缓存，维护分区后清除
+_partition_cache = TTLCache(maxsize=len(PARTITIONED_TABLES), ttl=60)
+
+
+class PartitionInfo(NamedTuple):
+    name: str
+    upper_bound: Optional[int]  # VALUES LESS THAN 的Unix时间戳，None表示MAXVALUE
+    rows: int
+
+
+def _epoch(value: datetime) -> int:
+    """转换为Unix时间戳，无时区时间按UTC处理"""
+    return calendar.timegm(value.utctimetuple())
+
+
+class PartitionService:
+    """
+    上报历史表的MySQL范围分区维护
+
+    分区以 UNIX_TIMESTAMP(created_at) 为键，按 PARTITION_PERIOD（day/month）划分，
+    分区 pYYYYMMDD / pYYYYMM 保存该周期及更早尚未落入其他分区的数据，另有 pmax 兜底。
+    维护任务从 pmax 中拆分出未来 PARTITION_PRECREATE 个周期的分区，并直接删除整个已过保留期的分区。
+    SQLite等不支持分区的数据库上所有方法均为空操作，过期数据由 RetentionService 分块删除。
+    """
+
+    @staticmethod
+    def is_supported(db: Session) -> bool:
+        return db.get_bind().dialect.name == "mysql"
+
+    @staticmethod
+    def period_start(value: datetime, period: Optional[str] = None) -> datetime:
+        period = period or settings.PARTITION_PERIOD
+        if period == "month":
+            return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    @staticmethod
+    def next_period(start: datetime, period: Optional[str] = None) -> datetime:
+        period = period or settings.PARTITION_PERIOD
+        if period == "month":
+            return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+        return start + timedelta(days=1)
+
+    @staticmethod
+    def partition_name(start: datetime, period: Optional[str] = None) -> str:
+        period = period or settings.PARTITION_PERIOD
+        return start.strftime("p%Y%m" if period == "month" else "p%Y%m%d")
+
+    @staticmethod
+    def get_partitions(db: Session, table: str, use_cache: bool = False) -> List[PartitionInfo]:
+        """按顺序返回表的分区，未分区或数据库不支持时返回空列表"""
+        if not PartitionService.is_supported(db):
+            return []
+        if use_cache:
+            cached = _partition_cache.get(table)
+            if cached is not None:
+                return cached
+        rows = db.execute(
+            text(
+                "SELECT partition_name, partition_description, table_rows "
+                "FROM information_schema.PARTITIONS "
+                "WHERE table_schema = DATABASE() AND table_name = :table AND partition_name IS NOT NULL "
+                "ORDER BY partition_ordinal_position"
+            ),
+            {"table": table}
+        ).all()
+        partitions = [
+            PartitionInfo(name, None if description == "MAXVALUE" else int(description), rows or 0)
+            for name, description, rows in rows
+        ]
+        _partition_cache.set(table, partitions)
+        return partitions
+
+    @staticmethod
+    def ensure_future_partitions(db: Session, table: str, now: Optional[datetime] = None,
+                                 ahead: Optional[int] = None) -> List[str]:
+        """预先创建到 now 之后 ahead 个周期为止的分区，返回新建的分区名"""
+        partitions = PartitionService.get_partitions(db, table)
+        if not partitions:
+            return []
+        now = now or datetime.utcnow()
+        ahead = settings.PARTITION_PRECREATE if ahead is None else ahead
+
+        bounds = [partition.upper_bound for partition in partitions if partition.upper_bound is not None]
+        # 从已有最后一个分区的上界开始，没有时从当前周期开始
+        cursor = datetime.utcfromtimestamp(max(bounds)) if bounds else PartitionService.period_start(now)
+        target = PartitionService.period_start(now)
+        for _ in range(ahead + 1):
+            target = PartitionService.next_period(target)
+
+        definitions = []
+        created = []
+        while _epoch(cursor) < _epoch(target):
+            upper = PartitionService.next_period(cursor)
+            name = PartitionService.partition_name(cursor)
+            definitions.append(f"PARTITION {name} VALUES LESS THAN ({_epoch(upper)})")
+            created.append(name)
+            cursor = upper
+        if not definitions:
+            return []
+
+        if partitions[-1].upper_bound is None:
+            # 从兜底分区 pmax 中拆分，pmax 为空时不涉及数据复制
+            maxvalue = partitions[-1].name
+            db.execute(text(
+                f"ALTER TABLE {table} REORGANIZE PARTITION {maxvalue} INTO "
+                f"({', '.join(definitions)}, PARTITION {maxvalue} VALUES LESS THAN MAXVALUE)"
+            ))
+        else:
+            db.execute(text(f"ALTER TABLE {table} ADD PARTITION ({', '.join(definitions)})"))
+        _partition_cache.pop(table)
+        return created
+
+    @staticmethod
+    def drop_expired_partitions(db: Session, table: str, cutoff: datetime) -> Dict[str, int]:
+        """删除上界不晚于 cutoff 的分区（其中数据均早于 cutoff），返回 {分区名: 估计行数}"""
+        expired = [
+            partition for partition in PartitionService.get_partitions(db, table)
+            if partition.upper_bound is not None and partition.upper_bound <= _epoch(cutoff)
+        ]
+        if not expired:
+            return {}
+        db.execute(text(
+            f"ALTER TABLE {table} DROP PARTITION {', '.join(partition.name for partition in expired)}"
+        ))
+        _partition_cache.pop(table)
+        return {partition.name: partition.rows for partition in expired}
+
+    @staticmethod
+    def maintain(db: Session, retention_days: Dict[str, int], now: Optional[datetime] = None) -> Dict[str, dict]:
+        """对已分区的表预建未来分区并删除过期分区"""
+        if not PartitionService.is_supported(db):
+            return {}
+        now = now or datetime.utcnow()
+        summary = {}
+        for table in PARTITIONED_TABLES:
+            try:
+                if not PartitionService.get_partitions(db, table):
+                    continue
+                created = PartitionService.ensure_future_partitions(db, table, now)
+                dropped = {}
+                if table in retention_days:
+                    dropped = PartitionService.drop_expired_partitions(
+                        db, table, now - timedelta(days=retention_days[table])
+                    )
+            except Exception:
+                logger.exception("分区维护失败: %s", table)
+                continue
+            summary[table] = {"created": created, "dropped": dropped}
+            if created or dropped:
+                logger.info("分区维护 %s: 新建 %s, 删除 %s（约 %s 行）",
+                            table, created, list(dropped), sum(dropped.values()))
+        return summary
+
+    @staticmethod
+    def partitions_for_window(db: Session, table: str, start: Optional[datetime],
+                              end: Optional[datetime]) -> Optional[List[str]]:
+        """返回覆盖 [start, end) 的分区名，表未分区时返回None"""
+        partitions = PartitionService.get_partitions(db, table, use_cache=True)
+        if not partitions:
+            return None
+        names = []
+        lower = None
+        for partition in partitions:
+            # 分区范围为 [上一个分区的上界, 本分区上界)
+            below_end = end is None or lower is None or lower < _epoch(end)
+            above_start = start is None or partition.upper_bound is None or partition.upper_bound > _epoch(start)
+            if below_end and above_start:
+                names.append(partition.name)
+            lower = partition.upper_bound
+        return names
+
+    @staticmethod
+    def prune(db: Session, stmt, model, start: Optional[datetime] = None, end: Optional[datetime] = None):
+        """
+        为查询加上 created_at 时间窗口条件，在已分区的MySQL表上显式限定只访问覆盖该窗口的分区
+        """
+        if start is not None:
+            stmt = stmt.where(model.created_at >= start)
+        if end is not None:
+            stmt = stmt.where(model.created_at < end)
+        if start is None and end is None:
+            return stmt
+        names = PartitionService.partitions_for_window(db, model.__tablename__, start, end)
+        if names:
+            stmt = stmt.with_hint(model, f"PARTITION ({', '.join(names)})", "mysql")
+        return stmt
+
+
+class PartitionScheduler:
+    """
+    按固定间隔在后台线程中预建未来分区
+
+    与保留清理相互独立：保留清理未启用时新数据也不会落入兜底分区 pmax。过期分区仍随保留清理删除。
+    """
+
+    def __init__(self, enabled: bool, interval_seconds: int):
+        self.enabled = enabled
+        self.interval = interval_seconds
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.runs = 0
+        self.last_run_at: Optional[datetime] = None
+        self.last_partitions: Dict[str, dict] = {}
+
+    def start(self) -> None:
+        if not self.enabled or self._thread:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="partition-scheduler", daemon=True)
+        self._thread.start()
+        logger.info("分区维护已启动: interval=%ss", self.interval)
+
+    def stop(self) -> None:
+        if not self._thread:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+
+    def run_once(self) -> Dict[str, dict]:
+        db = SessionLocal()
+        try:
+            partitions = PartitionService.maintain(db, {})
+        finally:
+            db.close()
+        self.runs += 1
+        self.last_run_at = datetime.utcnow()
+        self.last_partitions = partitions
+        return partitions
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "interval_seconds": self.interval,
+            "runs": self.runs,
+            "last_run_at": self.last_run_at,
+            "partitions": self.last_partitions
+        }
+
+    def _run(self) -> None:
+        # 启动后先执行一次，之后按间隔执行
+        while not self._stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("分区维护执行失败")
+            self._stop_event.wait(self.interval)
+
+
+partition_scheduler = PartitionScheduler(
+    enabled=settings.PARTITION_ENABLED,
+    interval_seconds=settings.PARTITION_INTERVAL_SECONDS
+)
@@ -0,0 +1,409 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+from sqlalchemy import bindparam, or_, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.shared_state import create_shared_state
+from app.models.terminal import Terminal, TerminalStatus
+
+logger = logging.getLogger(__name__)
+
+class PresenceService:
+    @staticmethod
+    def apply_presence(terminals: List[Terminal]) -> None:
+        """用在线状态注册表中的状态、最近活动时间及尚未写回的IP和配置覆盖终端对象，不产生数据库写入"""
+        presences = presence_registry.lookup_many([terminal.terminal_id for terminal in terminals])
+        for terminal in terminals:
+            presence = presences.get(terminal.terminal_id)
+            if presence is None:
+                # 超时时间内没有活动
+                set_committed_value(terminal, "status", TerminalStatus.offline)
+                continue
+            status, last_seen, changed = presence
+            set_committed_value(terminal, "status", status)
+            set_committed_value(terminal, "last_heartbeat", last_seen)
+            for column, value in changed.items():
+                set_committed_value(terminal, column, value)
+
+
+# 在共享状态中维护集合的非离线状态，集合内成员的分数为最近活动时间
+ACTIVE_STATUSES = (TerminalStatus.online, TerminalStatus.error)
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _score(moment: datetime) -> int:
+    """UTC时间转为微秒时间戳，整数在双精度范围内无损，与Redis有序集合的分数一致"""
+    return (moment - _EPOCH) // _MICROSECOND
+
+
+def _moment(score: float) -> datetime:
+    return _EPOCH + timedelta(microseconds=int(score))
+
+
+def _set_key(status: TerminalStatus) -> str:
+    return f"status:{TerminalStatus(status).value}"
+
+
+def _known_key(terminal_id: str) -> str:
+    return f"known:{terminal_id}"
+
+
+class _Presence:
+    __slots__ = ("last_seen", "status", "ip_address", "config", "persisted_seen", "persisted_status", "changed")
+
+    def __init__(self, last_seen: datetime, status: TerminalStatus):
+        self.last_seen = last_seen
+        self.status = status
+        self.ip_address: Optional[str] = None
+        self.config: Optional[dict] = None
+        # 数据库中已保存的心跳时间和状态，None表示未知
+        self.persisted_seen: Optional[datetime] = None
+        self.persisted_status: Optional[TerminalStatus] = None
+        # 尚未写回的 ip_address、config
+        self.changed: Dict[str, Any] = {}
+
+
+def _flush_statement(columns: Tuple[str, ...]):
+    """
+    写回 terminals 表的UPDATE，以executemany执行；已删除的终端只是不匹配任何行
+
+    只在数据库中的心跳时间不晚于本次写入时更新，多个进程写回同一终端时不会用旧状态覆盖新状态。
+    """
+    table = Terminal.__table__
+    return update(table).where(
+        table.c.terminal_id == bindparam("b_terminal_id"),
+        or_(table.c.last_heartbeat.is_(None), table.c.last_heartbeat <= bindparam("b_last_seen"))
+    ).values(
+        status=bindparam("b_status"),
+        last_heartbeat=bindparam("b_last_seen"),
+        **{column: bindparam(f"b_{column}") for column in columns}
+    )
+
+
+class PresenceRegistry:
+    """
+    终端在线状态注册表
+
+    心跳、自动上报和各上报接口调用 touch 记录终端的最近活动时间与状态。在线、异常终端保存在共享状态
+    （app.core.shared_state，进程内或Redis）的有序集合中，分数为最近活动时间，在线判断和各状态数量直接读集合，
+    多个服务进程使用Redis时结果一致。
+    后台线程每隔 interval 秒原子地取出超过 timeout 未活动的终端标记为离线（每个终端只由一个进程取得），
+    并把本进程需要持久化的变化合并写回 terminals 表：只写状态、IP、配置有变化的终端，以及已保存的心跳时间
+    早于 persist_interval 的终端，同一批按写入的列分组，每组一条 executemany 的 UPDATE。
+    各进程首次使用时从数据库加载 timeout 内有心跳的终端，已在集合中的终端不覆盖。
+    """
+
+    def __init__(self, shared, timeout_seconds: int, interval_seconds: int, persist_interval_seconds: int):
+        self.shared = shared
+        self.timeout = timedelta(seconds=timeout_seconds)
+        self.interval = interval_seconds
+        self.persist_interval = timedelta(seconds=persist_interval_seconds)
+        self._set_keys = [_set_key(status) for status in ACTIVE_STATUSES]
+        self._lock = threading.Lock()
+        # 本进程的写回记录：已保存的状态、心跳时间，以及尚未写回的IP和配置
+        self._entries: Dict[str, _Presence] = {}
+        # 上次写回后有活动的终端，写回时再判断是否需要持久化
+        self._dirty: Set[str] = set()
+        self._loaded = False
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # 本进程的计数，写回时累加到共享计数器
+        self.touches = 0
+        self._pending_touches = 0
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.statements = 0
+        self.swept = 0
+        self.last_flush_ms: Optional[float] = None
+
+    def touch(self, terminal_id: str, status: TerminalStatus = TerminalStatus.online,
+              seen_at: Optional[datetime] = None, persisted: bool = False,
+              ip_address: Optional[str] = None, config: Optional[dict] = None) -> None:
+        """
+        记录终端活动及上报的IP、配置（为空时不变）
+
+        persisted 表示调用方已把同样的状态、时间、IP和配置写入数据库，无需再写回。
+        """
+        seen_at = seen_at or datetime.utcnow()
+        status = TerminalStatus(status)
+        if status == TerminalStatus.offline:
+            self.shared.remove_member(self._set_keys, terminal_id)
+        else:
+            self.shared.touch_member(_set_key(status), terminal_id, _score(seen_at), self._set_keys)
+        with self._lock:
+            self.touches += 1
+            self._pending_touches += 1
+            entry = self._entries.get(terminal_id)
+            if entry is None:
+                entry = self._entries[terminal_id] = _Presence(seen_at, status)
+            else:
+                entry.last_seen, entry.status = seen_at, status
+            if ip_address and ip_address != entry.ip_address:
+                entry.ip_address = entry.changed["ip_address"] = ip_address
+            if config and config != entry.config:
+                entry.config = entry.changed["config"] = config
+            if persisted:
+                entry.persisted_seen, entry.persisted_status = seen_at, status
+                entry.changed.clear()
+                self._dirty.discard(terminal_id)
+            else:
+                self._dirty.add(terminal_id)
+
+    def discard(self, terminal_id: str) -> None:
+        """终端删除后移除"""
+        self.shared.remove_member(self._set_keys, terminal_id)
+        self.shared.delete(_known_key(terminal_id))
+        with self._lock:
+            self._entries.pop(terminal_id, None)
+            self._dirty.discard(terminal_id)
+
+    def clear(self) -> None:
+        """清空注册表及共享状态，下次使用时重新从数据库加载"""
+        self.shared.clear()
+        with self._lock:
+            self._entries.clear()
+            self._dirty.clear()
+            self._pending_touches = 0
+            self._loaded = False
+
+    def exists(self, db: Session, terminal_id: str) -> bool:
+        """
+        终端是否存在；确认存在的终端在共享状态中记录 timeout 秒，期间不再查询数据库
+
+        只以共享状态和数据库为准，不看本进程的写回记录：终端在其他进程删除（discard）后各进程立即一致。
+        """
+        if self.shared.get(_known_key(terminal_id)) is not None:
+            return True
+        if db.query(Terminal.id).filter(Terminal.terminal_id == terminal_id).scalar() is None:
+            return False
+        self.shared.set(_known_key(terminal_id), "1", self.timeout.total_seconds())
+        return True
+
+    def lookup_many(self, terminal_ids: Sequence[str]) -> Dict[str, Tuple[TerminalStatus, datetime, Dict[str, Any]]]:
+        """
+        返回 {终端ID: (状态, 最近活动时间, 本进程尚未写回的IP和配置)}，超时未活动的视为离线；
+        不在在线、异常集合中的终端不返回
+        """
+        self._ensure_loaded()
+        cutoff = datetime.utcnow() - self.timeout
+        result = {}
+        for status in ACTIVE_STATUSES:
+            for terminal_id, score in self.shared.scores(_set_key(status), terminal_ids).items():
+                last_seen = _moment(score)
+                if terminal_id not in result or last_seen > result[terminal_id][1]:
+                    result[terminal_id] = (status if last_seen >= cutoff else TerminalStatus.offline, last_seen, {})
+        with self._lock:
+            for terminal_id, (status, last_seen, _) in list(result.items()):
+                entry = self._entries.get(terminal_id)
+                if entry is not None and entry.changed:
+                    result[terminal_id] = (status, last_seen, dict(entry.changed))
+        return result
+
+    def lookup(self, terminal_id: str) -> Optional[Tuple[TerminalStatus, datetime, Dict[str, Any]]]:
+        return self.lookup_many([terminal_id]).get(terminal_id)
+
+    def count(self, status: TerminalStatus = TerminalStatus.online) -> int:
+        """某状态的终端数量；超时的终端在下一次扫描前仍计入，误差不超过一个扫描间隔"""
+        self._ensure_loaded()
+        if status == TerminalStatus.offline:
+            return 0
+        return self.shared.count(_set_key(status))
+
+    def terminal_ids(self, status: TerminalStatus = TerminalStatus.online) -> List[str]:
+        self._ensure_loaded()
+        if status == TerminalStatus.offline:
+            return []
+        return self.shared.members(_set_key(status))
+
+    def load(self, db: Session, now: Optional[datetime] = None) -> int:
+        """从数据库加载 timeout 内有心跳的终端，不覆盖已有记录，返回加入共享集合的数量"""
+        now = now or datetime.utcnow()
+        rows = db.query(
+            Terminal.terminal_id, Terminal.status, Terminal.last_heartbeat, Terminal.ip_address, Terminal.config
+        ).filter(
+            Terminal.last_heartbeat >= now - self.timeout
+        ).all()
+        by_status: Dict[TerminalStatus, Dict[str, float]] = {}
+        with self._lock:
+            for terminal_id, status, last_heartbeat, ip_address, config in rows:
+                status = TerminalStatus(status or TerminalStatus.offline)
+                if terminal_id not in self._entries:
+                    entry = self._entries[terminal_id] = _Presence(last_heartbeat, status)
+                    entry.ip_address, entry.config = ip_address, config
+                    entry.persisted_seen, entry.persisted_status = last_heartbeat, status
+                if status != TerminalStatus.offline:
+                    by_status.setdefault(status, {})[terminal_id] = _score(last_heartbeat)
+            self._loaded = True
+
+        # 其他进程已记录的终端（任一状态集合中存在）保持不变
+        candidates = [terminal_id for members in by_status.values() for terminal_id in members]
+        present = set()
+        for key in self._set_keys:
+            present.update(self.shared.scores(key, candidates))
+        loaded = 0
+        for status, members in by_status.items():
+            members = {terminal_id: score for terminal_id, score in members.items() if terminal_id not in present}
+            loaded += self.shared.add_if_absent(_set_key(status), members)
+        return loaded
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        db = SessionLocal()
+        try:
+            self.load(db)
+        finally:
+            db.close()
+
+    def sweep(self, now: Optional[datetime] = None) -> int:
+        """取出超时未活动的终端标记为离线，返回标记数量"""
+        cutoff = _score((now or datetime.utcnow()) - self.timeout)
+        expired: Dict[str, float] = {}
+        for key in self._set_keys:
+            expired.update(self.shared.pop_expired(key, cutoff))
+        with self._lock:
+            for terminal_id, score in expired.items():
+                last_seen = _moment(score)
+                entry = self._entries.get(terminal_id)
+                if entry is None:
+                    # 由其他进程记录的终端，离线状态由本进程写回
+                    entry = self._entries[terminal_id] = _Presence(last_seen, TerminalStatus.offline)
+                elif entry.last_seen <= last_seen:
+                    entry.last_seen, entry.status = last_seen, TerminalStatus.offline
+                else:
+                    # 取出后本进程又收到活动
+                    continue
+                self._dirty.add(terminal_id)
+        self.swept += len(expired)
+        if expired:
+            self.shared.incr("swept", len(expired))
+        return len(expired)
+
+    def _needs_write(self, entry: _Presence) -> bool:
+        return bool(
+            entry.changed
+            or entry.status != entry.persisted_status
+            or entry.persisted_seen is None
+            or entry.last_seen - entry.persisted_seen >= self.persist_interval
+        )
+
+    def flush(self, db: Session) -> int:
+        """把本进程需要持久化的终端状态、心跳时间、IP和配置合并写回，返回写回的终端数量"""
+        writes = []
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            touches, self._pending_touches = self._pending_touches, 0
+            for terminal_id in dirty:
+                entry = self._entries.get(terminal_id)
+                if entry is None or not self._needs_write(entry):
+                    continue
+                writes.append((terminal_id, entry, entry.status, entry.last_seen, entry.changed))
+                entry.persisted_status, entry.persisted_seen, entry.changed = entry.status, entry.last_seen, {}
+        if touches:
+            self.shared.incr("touches", touches)
+        if not writes:
+            return 0
+
+        # 按写入的列分组，每组一条executemany
+        groups: Dict[Tuple[str, ...], List[dict]] = {}
+        for terminal_id, _, status, last_seen, changed in writes:
+            columns = tuple(sorted(changed))
+            groups.setdefault(columns, []).append({
+                "b_terminal_id": terminal_id, "b_status": status, "b_last_seen": last_seen,
+                **{f"b_{column}": value for column, value in changed.items()}
+            })
+        start = time.perf_counter()
+        try:
+            for columns, rows in groups.items():
+                db.execute(_flush_statement(columns), rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            # 下次重试：恢复未写入的IP和配置，并强制重写状态和心跳时间
+            with self._lock:
+                for terminal_id, entry, _, _, changed in writes:
+                    entry.changed = {**changed, **entry.changed}
+                    entry.persisted_seen = entry.persisted_status = None
+                    if terminal_id in self._entries:
+                        self._dirty.add(terminal_id)
+            raise
+        self.flushes += 1
+        self.flushed_rows += len(writes)
+        self.statements += len(groups)
+        self.last_flush_ms = (time.perf_counter() - start) * 1000
+        self.shared.incr("flushed_rows", len(writes))
+        return len(writes)
+
+    def start(self) -> None:
+        if self._thread:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="presence-registry", daemon=True)
+        self._thread.start()
+        logger.info("终端在线状态注册表已启动: backend=%s, timeout=%ss, interval=%ss",
+                    self.shared.name, int(self.timeout.total_seconds()), self.interval)
+
+    def stop(self) -> None:
+        if not self._thread:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        # 退出前写回剩余的变化
+        self.run_once()
+
+    def run_once(self) -> int:
+        db = SessionLocal()
+        try:
+            if not self._loaded:
+                self.load(db)
+            self.sweep()
+            return self.flush(db)
+        finally:
+            db.close()
+
+    def stats(self) -> dict:
+        totals = self.shared.counters(["touches", "flushed_rows", "swept"])
+        return {
+            "backend": self.shared.name,
+            "timeout_seconds": int(self.timeout.total_seconds()),
+            "interval_seconds": self.interval,
+            "persist_interval_seconds": int(self.persist_interval.total_seconds()),
+            "active": {status.value: self.shared.count(_set_key(status)) for status in ACTIVE_STATUSES},
+            # 以下为本进程的统计
+            "terminals": len(self._entries),
+            "pending": len(self._dirty),
+            "touches": self.touches,
+            "flushes": self.flushes,
+            "flushed_rows": self.flushed_rows,
+            "statements": self.statements,
+            "write_ratio": round(self.flushed_rows / self.touches, 4) if self.touches else None,
+            "swept": self.swept,
+            "last_flush_ms": round(self.last_flush_ms, 2) if self.last_flush_ms is not None else None,
+            # 所有进程累计（触达数在各进程写回时累加）
+            "totals": {
+                **totals,
+                "write_ratio": round(totals["flushed_rows"] / totals["touches"], 4) if totals["touches"] else None
+            }
+        }
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("终端在线状态写回失败")
+
+
+presence_registry = PresenceRegistry(
+    create_shared_state(settings.PRESENCE_BACKEND, settings.REDIS_URL, prefix="wlweb:presence:"),
+    timeout_seconds=settings.PRESENCE_TIMEOUT_SECONDS,
+    interval_seconds=settings.PRESENCE_FLUSH_INTERVAL_SECONDS,
+    persist_interval_seconds=settings.PRESENCE_HEARTBEAT_PERSIST_SECONDS
+)
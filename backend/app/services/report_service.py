@@ -0,0 +1,283 @@
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.terminal import Terminal
+from app.models.game_account import (
+    GameAccount, GameAssetRecord, GameInventoryRecord, GameLoginRecord, GameAccountLatestAsset
+)
+from app.schemas.terminal import LoginReportData, AssetsReportData, InventoryReportData
+from app.services.inventory_service import InventoryService
+from app.services.terminal_data_service import TerminalDataService
+from app.utils.db_upsert import upsert
+
+# 最新资产快照中随上报覆盖的列
+LATEST_ASSET_COLUMNS = [
+    "record_id", "terminal_id", "region_code", "gold", "diamond", "energy",
+    "experience", "level", "vip_level", "report_time", "updated_at"
+]
+
+class ReportService:
+    """
+    终端上报数据的持久化逻辑
+
+    方法均接收同步Session且不提交事务，异步接口通过 AsyncSession.run_sync 调用，
+    由调用方统一提交。
+    """
+
+    @staticmethod
+    def parse_report_time(value) -> datetime:
+        """转换上报时间，缺失或格式错误时使用当前时间"""
+        if not value:
+            return datetime.utcnow()
+        if isinstance(value, datetime):
+            return value
+        try:
+            return datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return datetime.utcnow()
+
+    @staticmethod
+    def bulk_insert(db: Session, model, rows: List[dict], chunk_size: Optional[int] = None) -> None:
+        """按块执行多行INSERT，每块一条语句"""
+        chunk_size = chunk_size or settings.REPORT_INSERT_CHUNK_SIZE
+        for start in range(0, len(rows), chunk_size):
+            db.execute(insert(model), rows[start:start + chunk_size])
+
+    @staticmethod
+    def upsert_latest_assets(db: Session, asset_record: GameAssetRecord) -> None:
+        """以资产记录更新账户最新资产快照，较旧的上报不会覆盖快照"""
+        upsert(
+            db,
+            GameAccountLatestAsset,
+            [{
+                "account_id": asset_record.account_id,
+                "record_id": asset_record.id,
+                "terminal_id": asset_record.terminal_id,
+                "region_code": asset_record.region_code,
+                "gold": asset_record.gold,
+                "diamond": asset_record.diamond,
+                "energy": asset_record.energy,
+                "experience": asset_record.experience,
+                "level": asset_record.level,
+                "vip_level": asset_record.vip_level,
+                "report_time": asset_record.report_time,
+                "updated_at": datetime.utcnow()
+            }],
+            index_elements=["account_id"],
+            update_columns=LATEST_ASSET_COLUMNS,
+            newer_column="report_time"
+        )
+
+    @staticmethod
+    def _asset_deltas(db: Session, account_id: Optional[str], report_time: datetime,
+                      gold: Optional[int], diamond: Optional[int]):
+        """
+        计算相对账户最新资产快照的金子/元宝变化，供统计汇总累加
+
+        首次上报、乱序到达的旧上报或数值缺失时变化为None，不计入汇总。
+        """
+        if not account_id:
+            return None, None
+        previous = db.query(
+            GameAccountLatestAsset.gold, GameAccountLatestAsset.diamond, GameAccountLatestAsset.report_time
+        ).filter(GameAccountLatestAsset.account_id == account_id).first()
+        if not previous:
+            return None, None
+        if previous.report_time and InventoryService._normalize_time(previous.report_time) > \
+                InventoryService._normalize_time(report_time):
+            return None, None
+        gold_delta = gold - previous.gold if gold is not None and previous.gold is not None else None
+        diamond_delta = diamond - previous.diamond if diamond is not None and previous.diamond is not None else None
+        return gold_delta, diamond_delta
+
+    @staticmethod
+    def _get_game_account(db: Session, account_id: Optional[str]) -> Optional[GameAccount]:
+        if not account_id:
+            return None
+        return db.query(GameAccount).filter(GameAccount.account_id == account_id).first()
+
+    @staticmethod
+    def save_login_report(db: Session, terminal: Terminal, login_data: LoginReportData) -> None:
+        """保存账户登录信息上报"""
+        terminal_id = terminal.terminal_id
+        login_time = ReportService.parse_report_time(login_data.login_time)
+
+        # 创建或更新游戏账户
+        if login_data.character_id:
+            game_account = ReportService._get_game_account(db, login_data.character_id)
+            if not game_account:
+                game_account = GameAccount(
+                    account_id=login_data.character_id,
+                    username=login_data.username,
+                    server_name=login_data.game_server,
+                    last_terminal_id=terminal_id,
+                    last_login_time=login_time
+                )
+                db.add(game_account)
+            else:
+                game_account.username = login_data.username or game_account.username
+                game_account.server_name = login_data.game_server or game_account.server_name
+                game_account.last_terminal_id = terminal_id
+                game_account.last_login_time = login_time
+
+        # 记录登录记录
+        db.add(GameLoginRecord(
+            account_id=login_data.character_id,
+            terminal_id=terminal_id,
+            region_code=login_data.region_code,
+            character_id=login_data.character_id,
+            username=login_data.username,
+            login_time=login_time,
+            login_ip=login_data.login_ip,
+            login_device=login_data.login_device,
+            game_server=login_data.game_server,
+            login_status='success'
+        ))
+
+        # 按策略记录原有的终端数据
+        TerminalDataService.record(db, terminal.id, "login_report", {
+            "username": login_data.username,
+            "login_time": login_time.isoformat() if login_time else None,
+            "login_ip": login_data.login_ip,
+            "login_device": login_data.login_device,
+            "game_server": login_data.game_server,
+            "region_code": login_data.region_code,
+            "character_id": login_data.character_id
+        })
+
+    @staticmethod
+    def save_assets_report(db: Session, terminal: Terminal, assets_data: AssetsReportData) -> None:
+        """保存资产信息上报"""
+        terminal_id = terminal.terminal_id
+        report_time = ReportService.parse_report_time(assets_data.report_time)
+
+        # 创建或更新游戏账户
+        if assets_data.character_id:
+            game_account = ReportService._get_game_account(db, assets_data.character_id)
+            if not game_account:
+                game_account = GameAccount(
+                    account_id=assets_data.character_id,
+                    level=assets_data.level,
+                    last_terminal_id=terminal_id
+                )
+                db.add(game_account)
+            else:
+                if assets_data.level:
+                    game_account.level = assets_data.level
+                game_account.last_terminal_id = terminal_id
+
+        # 记录资产记录
+        gold_delta, diamond_delta = ReportService._asset_deltas(
+            db, assets_data.character_id, report_time, assets_data.gold, assets_data.diamond
+        )
+        asset_record = GameAssetRecord(
+            account_id=assets_data.character_id,
+            terminal_id=terminal_id,
+            region_code=assets_data.region_code,
+            character_id=assets_data.character_id,
+            gold=assets_data.gold,
+            diamond=assets_data.diamond,
+            energy=assets_data.energy,
+            experience=assets_data.experience,
+            level=assets_data.level,
+            vip_level=assets_data.vip_level,
+            gold_delta=gold_delta,
+            diamond_delta=diamond_delta,
+            report_time=report_time
+        )
+        db.add(asset_record)
+
+        # 更新最新资产快照
+        if assets_data.character_id:
+            db.flush()
+            ReportService.upsert_latest_assets(db, asset_record)
+
+        # 按策略记录原有的终端数据
+        TerminalDataService.record(db, terminal.id, "assets_report", {
+            "gold": assets_data.gold,
+            "diamond": assets_data.diamond,
+            "energy": assets_data.energy,
+            "experience": assets_data.experience,
+            "level": assets_data.level,
+            "vip_level": assets_data.vip_level,
+            "report_time": report_time.isoformat() if report_time else None,
+            "region_code": assets_data.region_code,
+            "character_id": assets_data.character_id
+        })
+
+    @staticmethod
+    def save_inventory_report(db: Session, terminal: Terminal, inventory_data: InventoryReportData) -> None:
+        """保存背包材料上报"""
+        terminal_id = terminal.terminal_id
+        report_time = ReportService.parse_report_time(inventory_data.report_time)
+
+        # 创建或更新游戏账户
+        if inventory_data.character_id:
+            game_account = ReportService._get_game_account(db, inventory_data.character_id)
+            if not game_account:
+                game_account = GameAccount(
+                    account_id=inventory_data.character_id,
+                    last_terminal_id=terminal_id
+                )
+                db.add(game_account)
+            else:
+                game_account.last_terminal_id = terminal_id
+
+        # 先刷新账户以满足外键约束
+        db.flush()
+        if settings.INVENTORY_STORAGE_MODE == "delta" and inventory_data.character_id:
+            # 增量模式：只写入与当前背包的差异
+            InventoryService.apply_report(
+                db,
+                inventory_data.character_id,
+                terminal_id,
+                inventory_data.region_code,
+                inventory_data.items,
+                report_time
+            )
+        else:
+            ReportService._save_inventory_snapshot(db, terminal_id, inventory_data, report_time)
+
+        # 按策略记录原有的终端数据
+        TerminalDataService.record(db, terminal.id, "inventory_report", {
+            "items": [item.dict() for item in inventory_data.items],
+            "report_time": inventory_data.report_time.isoformat() if isinstance(inventory_data.report_time, datetime) else inventory_data.report_time,
+            "total_items": len(inventory_data.items),
+            "region_code": inventory_data.region_code,
+            "character_id": inventory_data.character_id
+        })
+
+    @staticmethod
+    def _save_inventory_snapshot(db: Session, terminal_id: str, inventory_data: InventoryReportData,
+                                 report_time: datetime) -> None:
+        """快照模式：批量写入本次上报的全部背包物品记录"""
+        rows = [
+            {
+                "account_id": inventory_data.character_id,
+                "terminal_id": terminal_id,
+                "region_code": inventory_data.region_code,
+                "character_id": inventory_data.character_id,
+                "item_id": item.item_id,
+                "item_name": item.item_name,
+                "item_type": item.item_type,
+                "quantity": item.quantity,
+                "quality": item.quality,
+                "description": item.description,
+                "report_time": report_time
+            }
+            for item in inventory_data.items
+        ]
+        ReportService.bulk_insert(db, GameInventoryRecord, rows)
+
+    @staticmethod
+    def save_report(db: Session, terminal: Terminal, report_type: str, data) -> None:
+        """按上报类型分发保存，并刷新以便同一事务内后续上报可见新建的账户"""
+        savers = {
+            "login": ReportService.save_login_report,
+            "assets": ReportService.save_assets_report,
+            "inventory": ReportService.save_inventory_report,
+        }
+        savers[report_type](db, terminal, data)
+        db.flush()
@@ -0,0 +1,219 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, NamedTuple, Optional
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.game_account import GameAssetRecord, GameInventoryRecord, GameLoginRecord
+from app.models.session import RevokedToken
+from app.models.task import TaskExecution
+from app.models.terminal import TerminalData
+from app.services.partition_service import PartitionService
+
+logger = logging.getLogger(__name__)
+
+
+class RetentionPolicy(NamedTuple):
+    """一张表的保留策略：time_column 早于 now - days 的行将被删除"""
+    table: str
+    model: type
+    time_column: object
+    days: Callable[[], int]
+
+
+class RetentionResult(NamedTuple):
+    table: str
+    deleted: int
+    chunks: int
+    elapsed: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.deleted / self.elapsed if self.elapsed > 0 else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "table": self.table,
+            "deleted": self.deleted,
+            "chunks": self.chunks,
+            "elapsed_seconds": round(self.elapsed, 3),
+            "rows_per_second": round(self.rows_per_second, 1)
+        }
+
+
+# 保留天数在执行时读取，便于运行中调整配置
+RETENTION_POLICIES = [
+    RetentionPolicy("terminal_data", TerminalData, TerminalData.created_at,
+                    lambda: settings.RETENTION_TERMINAL_DATA_DAYS),
+    RetentionPolicy("game_asset_records", GameAssetRecord, GameAssetRecord.created_at,
+                    lambda: settings.RETENTION_REPORT_RECORD_DAYS),
+    RetentionPolicy("game_inventory_records", GameInventoryRecord, GameInventoryRecord.created_at,
+                    lambda: settings.RETENTION_REPORT_RECORD_DAYS),
+    RetentionPolicy("game_login_records", GameLoginRecord, GameLoginRecord.created_at,
+                    lambda: settings.RETENTION_REPORT_RECORD_DAYS),
+    RetentionPolicy("task_executions", TaskExecution, TaskExecution.started_at,
+                    lambda: settings.RETENTION_TASK_EXECUTION_DAYS),
+    # 吊销记录在令牌过期后清理
+    RetentionPolicy("revoked_tokens", RevokedToken, RevokedToken.expires_at, lambda: 0),
+]
+
+
+class RetentionService:
+    """
+    历史数据保留清理
+
+    按主键范围分块删除过期数据，每块一条 DELETE ... WHERE id 范围 AND 时间条件并单独提交，
+    块之间休眠 RETENTION_CHUNK_SLEEP_MS，避免长事务和长时间锁表。
+    """
+
+    @staticmethod
+    def purge(db: Session, model, time_column, cutoff: datetime,
+              chunk_size: Optional[int] = None, sleep_ms: Optional[int] = None,
+              table: Optional[str] = None, stop_event: Optional[threading.Event] = None,
+              since: Optional[datetime] = None, max_id: Optional[int] = None) -> RetentionResult:
+        """
+        删除 time_column 早于 cutoff 的行，返回删除统计；stop_event 置位时在块之间中止
+
+        since、max_id 进一步限定只删除 time_column 不早于 since、主键不大于 max_id 的行（归档后删除时使用）。
+        """
+        chunk_size = chunk_size or settings.RETENTION_CHUNK_SIZE
+        sleep_ms = settings.RETENTION_CHUNK_SLEEP_MS if sleep_ms is None else sleep_ms
+        table = table or model.__tablename__
+        id_column = model.id
+
+        conditions = [time_column < cutoff]
+        if since is not None:
+            conditions.append(time_column >= since)
+        if max_id is not None:
+            conditions.append(id_column <= max_id)
+
+        start = time.perf_counter()
+        low = db.execute(select(func.min(id_column)).where(*conditions)).scalar()
+        high_limit = db.execute(select(func.max(id_column)).where(*conditions)).scalar()
+        db.commit()
+
+        deleted = chunks = 0
+        while low is not None and low <= high_limit:
+            if stop_event is not None and stop_event.is_set():
+                break
+            high = low + chunk_size
+            result = db.execute(
+                delete(model)
+                .where(id_column >= low, id_column < high, *conditions)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            chunks += 1
+            deleted += result.rowcount
+            low = high
+            # 空块不休眠，稀疏的主键区间可以快速跳过
+            if result.rowcount and sleep_ms:
+                time.sleep(sleep_ms / 1000)
+
+        return RetentionResult(table, deleted, chunks, time.perf_counter() - start)
+
+    @staticmethod
+    def run_policies(db: Session, policies: Optional[List[RetentionPolicy]] = None,
+                     now: Optional[datetime] = None,
+                     stop_event: Optional[threading.Event] = None) -> List[RetentionResult]:
+        """按保留策略依次清理各表"""
+        now = now or datetime.utcnow()
+        results = []
+        for policy in policies or RETENTION_POLICIES:
+            cutoff = now - timedelta(days=policy.days())
+            try:
+                result = RetentionService.purge(
+                    db, policy.model, policy.time_column, cutoff, table=policy.table, stop_event=stop_event
+                )
+            except Exception:
+                db.rollback()
+                logger.exception("清理过期数据失败: %s", policy.table)
+                continue
+            results.append(result)
+            if result.deleted:
+                logger.info("清理过期数据 %s: 删除 %s 行, %s 块, 用时 %.1fs, %.0f 行/秒",
+                            result.table, result.deleted, result.chunks, result.elapsed, result.rows_per_second)
+        return results
+
+
+class RetentionScheduler:
+    """按固定间隔在后台线程中执行保留清理"""
+
+    def __init__(self, enabled: bool, interval_seconds: int):
+        self.enabled = enabled
+        self.interval = interval_seconds
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.runs = 0
+        self.last_run_at: Optional[datetime] = None
+        self.last_results: Dict[str, dict] = {}
+        self.last_partitions: Dict[str, dict] = {}
+        self.last_archives: Dict[str, dict] = {}
+
+    def start(self) -> None:
+        if not self.enabled or self._thread:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="retention-scheduler", daemon=True)
+        self._thread.start()
+        logger.info("数据保留清理已启动: interval=%ss", self.interval)
+
+    def stop(self) -> None:
+        if not self._thread:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+
+    def run_once(self) -> List[RetentionResult]:
+        # 归档服务依赖本模块的分块删除，在此处导入
+        from app.services.archive_service import ArchiveService
+
+        db = SessionLocal()
+        archives = []
+        try:
+            # 先归档冷数据，再删除过期分区和过期数据
+            if settings.ARCHIVE_ENABLED:
+                archives = ArchiveService.run(db, stop_event=self._stop_event)
+            # 已分区的表先整体删除过期分区，剩余不足一个分区的过期数据再分块删除
+            partitions = PartitionService.maintain(
+                db, {policy.table: policy.days() for policy in RETENTION_POLICIES}
+            )
+            results = RetentionService.run_policies(db, stop_event=self._stop_event)
+        finally:
+            db.close()
+        self.runs += 1
+        self.last_run_at = datetime.utcnow()
+        self.last_results = {result.table: result.as_dict() for result in results}
+        self.last_partitions = partitions
+        self.last_archives = {result.table: result.as_dict() for result in archives}
+        return results
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "interval_seconds": self.interval,
+            "runs": self.runs,
+            "last_run_at": self.last_run_at,
+            "tables": self.last_results,
+            "partitions": self.last_partitions,
+            "archives": self.last_archives
+        }
+
+    def _run(self) -> None:
+        # 启动后先执行一次，之后按间隔执行
+        while not self._stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("数据保留清理执行失败")
+            self._stop_event.wait(self.interval)
+
+
+retention_scheduler = RetentionScheduler(
+    enabled=settings.RETENTION_ENABLED,
+    interval_seconds=settings.RETENTION_INTERVAL_SECONDS
+)
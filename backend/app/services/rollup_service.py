@@ -0,0 +1,505 @@
+import json
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from sqlalchemy import and_, case, or_, select, true
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.game_account import GameAssetRecord, GameInventoryChange, GameInventoryRecord, GameLoginRecord
+from app.models.stats_rollup import AccountAssetRollup, TaskExecutionRollup, TerminalReportRollup
+from app.models.system_config import SystemConfig
+from app.models.task import TaskExecution
+from app.utils.db_upsert import accumulate
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_GRANULARITIES = ("hour", "day")
+
+# SystemConfig中的水位配置键前缀，值为 "<时间ISO格式>|<主键>"，表示已汇总到的位置
+WATERMARK_KEY_PREFIX = "rollup_watermark."
+# 按主键汇总的源表在水位之前跳过的主键（汇总时尚未提交的插入），值为 {主键: 发现时间} 的JSON
+GAPS_KEY_PREFIX = "rollup_gaps."
+
+
+def _naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _find_gaps(previous_id: int, row_ids: List[int], limit: int) -> List[int]:
+    """按主键升序的一批行中 previous_id 之后缺失的主键，最多返回最大的 limit 个"""
+    gaps: List[int] = []
+    expected = previous_id + 1
+    for row_id in row_ids:
+        if row_id > expected:
+            gaps.extend(range(max(expected, row_id - limit), row_id))
+            del gaps[:-limit]
+        expected = row_id + 1
+    return gaps
+
+
+def _bucket(value: datetime, granularity: str) -> datetime:
+    """时间所在的小时/天起点，带时区的时间先转换为UTC"""
+    value = _naive_utc(value)
+    if granularity == "day":
+        return value.replace(hour=0, minute=0, second=0, microsecond=0)
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+# 任务执行汇总的 (粒度, 维度)：小时只汇总总数，按任务和终端的分组只按天汇总
+EXECUTION_ROLLUP_DIMENSIONS = (("hour", "total"), ("day", "total"), ("day", "task"), ("day", "terminal"))
+
+
+def _apply_executions(db: Session, rows) -> None:
+    # 先在内存中按汇总键合并，每批只产生少量汇总行
+    totals: Dict[tuple, list] = {}
+    for row in rows:
+        duration = None
+        if row.started_at is not None:
+            duration = max((row.watermark_time - row.started_at).total_seconds(), 0.0)
+        moment = row.started_at or row.watermark_time
+        buckets = {granularity: _bucket(moment, granularity) for granularity in ROLLUP_GRANULARITIES}
+        dimension_ids = {"total": 0, "task": row.task_id, "terminal": row.terminal_id}
+        for granularity, dimension in EXECUTION_ROLLUP_DIMENSIONS:
+            key = (granularity, dimension, buckets[granularity], dimension_ids[dimension], row.outcome)
+            counts = totals.get(key)
+            if counts is None:
+                counts = totals[key] = [0, 0, 0.0]
+            counts[0] += 1
+            if duration is not None:
+                counts[1] += 1
+                counts[2] += duration
+
+    now = datetime.utcnow()
+    accumulate(
+        db, TaskExecutionRollup,
+        [
+            {
+                "granularity": granularity,
+                "dimension": dimension,
+                "bucket_start": bucket_start,
+                "dimension_id": dimension_id,
+                "status": status,
+                "execution_count": execution_count,
+                "duration_count": duration_count,
+                "duration_seconds": duration_seconds,
+                "updated_at": now
+            }
+            for (granularity, dimension, bucket_start, dimension_id, status),
+                (execution_count, duration_count, duration_seconds) in totals.items()
+        ],
+        index_elements=["granularity", "dimension", "bucket_start", "dimension_id", "status"],
+        sum_columns=["execution_count", "duration_count", "duration_seconds"],
+        replace_columns=["updated_at"]
+    )
+
+
+def _accumulate_reports(db: Session, report_type: str, reports: List[Tuple[str, datetime]]) -> None:
+    """reports 为 (终端ID, 入库时间) 列表，每项计一次上报"""
+    now = datetime.utcnow()
+    accumulate(
+        db, TerminalReportRollup,
+        [
+            {
+                "granularity": granularity,
+                "bucket_start": _bucket(created_at, granularity),
+                "terminal_id": terminal_id,
+                "report_type": report_type,
+                "report_count": 1,
+                "updated_at": now
+            }
+            for terminal_id, created_at in reports
+            for granularity in ROLLUP_GRANULARITIES
+        ],
+        index_elements=["granularity", "bucket_start", "terminal_id", "report_type"],
+        sum_columns=["report_count"],
+        replace_columns=["updated_at"]
+    )
+
+
+def _apply_logins(db: Session, rows) -> None:
+    _accumulate_reports(db, "login", [(row.terminal_id, row.watermark_time) for row in rows])
+
+
+def _apply_assets(db: Session, rows) -> None:
+    _accumulate_reports(db, "assets", [(row.terminal_id, row.watermark_time) for row in rows])
+    now = datetime.utcnow()
+    accumulate(
+        db, AccountAssetRollup,
+        [
+            {
+                "granularity": granularity,
+                "bucket_start": _bucket(row.report_time or row.watermark_time, granularity),
+                "account_id": row.account_id,
+                "region_code": row.region_code or "",
+                "report_count": 1,
+                "gold_delta": row.gold_delta or 0,
+                "diamond_delta": row.diamond_delta or 0,
+                "updated_at": now
+            }
+            for row in rows if row.account_id
+            for granularity in ROLLUP_GRANULARITIES
+        ],
+        index_elements=["granularity", "account_id", "region_code", "bucket_start"],
+        sum_columns=["report_count", "gold_delta", "diamond_delta"],
+        replace_columns=["updated_at"]
+    )
+
+
+def _apply_inventory(db: Session, rows) -> None:
+    # 一次背包上报对应多行（每个物品或每个变化一行），按 (账户, 上报时间) 去重计数
+    reports = {}
+    for row in rows:
+        reports.setdefault((row.account_id, row.report_time), (row.terminal_id, row.watermark_time))
+    _accumulate_reports(db, "inventory", list(reports.values()))
+
+
+class RollupSource(NamedTuple):
+    """
+    一张源表的增量汇总：读取水位之后的行交给 apply 累加
+
+    只追加的上报表按主键顺序读取；任务执行在结束时才写入 completed_at，按 (time_column, 主键) 顺序读取。
+    """
+    name: str
+    model: type
+    time_column: object
+    columns: list
+    apply: Callable[[Session, list], None]
+    order_by_time: bool = False
+    # 多行属于同一次上报时返回上报标识，批次末尾不完整的上报留到下一批
+    report_key: Optional[Callable[[object], tuple]] = None
+
+
+# 执行结束（completed_at 非空）后才汇总，尚未汇总的执行由统计接口从源表实时补充
+EXECUTION_ROLLUP_SOURCE = RollupSource(
+    "task_executions", TaskExecution, TaskExecution.completed_at,
+    [
+        TaskExecution.task_id,
+        TaskExecution.terminal_id,
+        TaskExecution.started_at,
+        case((TaskExecution.result.like("%success%"), "success"), else_="failed").label("outcome"),
+    ],
+    _apply_executions,
+    order_by_time=True
+)
+
+ROLLUP_SOURCES = [
+    EXECUTION_ROLLUP_SOURCE,
+    RollupSource(
+        "game_login_records", GameLoginRecord, GameLoginRecord.created_at,
+        [GameLoginRecord.terminal_id],
+        _apply_logins
+    ),
+    RollupSource(
+        "game_asset_records", GameAssetRecord, GameAssetRecord.created_at,
+        [
+            GameAssetRecord.terminal_id,
+            GameAssetRecord.account_id,
+            GameAssetRecord.region_code,
+            GameAssetRecord.report_time,
+            GameAssetRecord.gold_delta,
+            GameAssetRecord.diamond_delta,
+        ],
+        _apply_assets
+    ),
+    RollupSource(
+        "game_inventory_records", GameInventoryRecord, GameInventoryRecord.created_at,
+        [GameInventoryRecord.terminal_id, GameInventoryRecord.account_id, GameInventoryRecord.report_time],
+        _apply_inventory,
+        report_key=lambda row: (row.account_id, row.report_time)
+    ),
+    # 增量背包存储模式下背包上报只写变化记录，背包未变化的上报不计数
+    RollupSource(
+        "game_inventory_changes", GameInventoryChange, GameInventoryChange.created_at,
+        [GameInventoryChange.terminal_id, GameInventoryChange.account_id, GameInventoryChange.report_time],
+        _apply_inventory,
+        report_key=lambda row: (row.account_id, row.report_time)
+    ),
+]
+
+
+class RollupService:
+    """
+    统计汇总的增量维护
+
+    每个源表在 SystemConfig 中保存一个水位 (时间, 主键)，每批读取水位之后、早于
+    now - ROLLUP_SETTLE_SECONDS 的 ROLLUP_BATCH_SIZE 行，累加到小时和天两级汇总表，
+    并在同一事务中推进水位，因此每行恰好汇总一次。
+    上报表的 created_at 由数据库默认值生成（SQLite下不含微秒，与绑定参数格式不同），
+    不参与水位比较，只用于判断是否已超过等待时间。
+    上报表按主键推进水位时，批次中缺失的主键可能属于超过等待时间仍未提交的事务，
+    记录下来在之后的每次汇总中重新检查，ROLLUP_GAP_SECONDS 后仍未出现的视为已回滚。
+    """
+
+    @staticmethod
+    def parse_watermark(value: Optional[str]) -> Optional[Tuple[datetime, int]]:
+        if not value:
+            return None
+        moment, _, row_id = value.partition("|")
+        return datetime.fromisoformat(moment), int(row_id)
+
+    @staticmethod
+    def format_watermark(moment: datetime, row_id: int) -> str:
+        return f"{moment.isoformat()}|{row_id}"
+
+    @staticmethod
+    def ensure_watermarks(db: Session, sources: Optional[List[RollupSource]] = None) -> None:
+        """为尚无水位记录的源表创建空水位"""
+        sources = sources or ROLLUP_SOURCES
+        keys = [WATERMARK_KEY_PREFIX + source.name for source in sources]
+        existing = {
+            key for (key,) in db.query(SystemConfig.config_key).filter(SystemConfig.config_key.in_(keys))
+        }
+        for key in keys:
+            if key in existing:
+                continue
+            try:
+                db.add(SystemConfig(config_key=key, config_value="", description="统计汇总水位"))
+                db.commit()
+            except IntegrityError:
+                # 其他进程已创建
+                db.rollback()
+
+    @staticmethod
+    def unrolled_condition(db: Session, source: RollupSource):
+        """按时间顺序汇总的源表中尚未汇总的行（时间为空或在水位之后）的过滤条件"""
+        value = db.query(SystemConfig.config_value).filter(
+            SystemConfig.config_key == WATERMARK_KEY_PREFIX + source.name
+        ).scalar()
+        watermark = RollupService.parse_watermark(value)
+        if watermark is None:
+            return true()
+        moment, row_id = watermark
+        time_column, id_column = source.time_column, source.model.id
+        return or_(
+            time_column.is_(None),
+            time_column > moment,
+            and_(time_column == moment, id_column > row_id)
+        )
+
+    @staticmethod
+    def _load_gaps(db: Session, source: RollupSource) -> Tuple[Optional[SystemConfig], Dict[int, str]]:
+        config = db.query(SystemConfig).filter(SystemConfig.config_key == GAPS_KEY_PREFIX + source.name).first()
+        if config is None or not config.config_value:
+            return config, {}
+        return config, {int(row_id): found_at for row_id, found_at in json.loads(config.config_value).items()}
+
+    @staticmethod
+    def _save_gaps(db: Session, source: RollupSource, config: Optional[SystemConfig], gaps: Dict[int, str]) -> None:
+        # 只保留最大的 ROLLUP_MAX_GAPS 个主键
+        kept = sorted(gaps)[-settings.ROLLUP_MAX_GAPS:]
+        value = json.dumps({str(row_id): gaps[row_id] for row_id in kept})
+        if config is None:
+            if not kept:
+                return
+            db.add(SystemConfig(config_key=GAPS_KEY_PREFIX + source.name, config_value=value,
+                                description="统计汇总跳过的主键"))
+        else:
+            config.config_value = value
+
+    @staticmethod
+    def process_gaps(db: Session, source: RollupSource, now: Optional[datetime] = None) -> int:
+        """汇总之前跳过的主键中已经提交的行，移除已超过 ROLLUP_GAP_SECONDS 的主键，返回汇总的行数"""
+        now = now or datetime.utcnow()
+        key = WATERMARK_KEY_PREFIX + source.name
+        # 与水位推进使用同一把锁
+        db.query(SystemConfig).filter(SystemConfig.config_key == key).with_for_update().one()
+        config, gaps = RollupService._load_gaps(db, source)
+        if not gaps:
+            db.commit()
+            return 0
+
+        id_column = source.model.id
+        rows = db.execute(
+            select(id_column.label("row_id"), source.time_column.label("watermark_time"), *source.columns)
+            .where(id_column.in_(list(gaps)))
+            .order_by(id_column)
+        ).all()
+        if rows:
+            source.apply(db, rows)
+        expires = now - timedelta(seconds=settings.ROLLUP_GAP_SECONDS)
+        found = {row.row_id for row in rows}
+        RollupService._save_gaps(db, source, config, {
+            row_id: found_at for row_id, found_at in gaps.items()
+            if row_id not in found and datetime.fromisoformat(found_at) >= expires
+        })
+        db.commit()
+        if rows:
+            logger.info("统计汇总补充延迟提交的行: %s %s 行", source.name, len(rows))
+        return len(rows)
+
+    @staticmethod
+    def get_watermarks(db: Session) -> Dict[str, Optional[datetime]]:
+        rows = db.query(SystemConfig.config_key, SystemConfig.config_value).filter(
+            SystemConfig.config_key.like(f"{WATERMARK_KEY_PREFIX}%")
+        ).all()
+        watermarks = {}
+        for key, value in rows:
+            parsed = RollupService.parse_watermark(value)
+            watermarks[key[len(WATERMARK_KEY_PREFIX):]] = parsed[0] if parsed else None
+        return watermarks
+
+    @staticmethod
+    def process_source(db: Session, source: RollupSource, now: Optional[datetime] = None,
+                       batch_size: Optional[int] = None,
+                       stop_event: Optional[threading.Event] = None) -> int:
+        """汇总一张源表水位之后的新数据，返回处理的行数"""
+        now = now or datetime.utcnow()
+        batch_size = batch_size or settings.ROLLUP_BATCH_SIZE
+        upper = now - timedelta(seconds=settings.ROLLUP_SETTLE_SECONDS)
+        id_column, time_column = source.model.id, source.time_column
+        key = WATERMARK_KEY_PREFIX + source.name
+
+        processed = 0
+        if not source.order_by_time:
+            processed += RollupService.process_gaps(db, source, now)
+        while stop_event is None or not stop_event.is_set():
+            # 锁定水位行，多个进程同时运行时同一源表串行汇总
+            config = db.query(SystemConfig).filter(SystemConfig.config_key == key).with_for_update().one()
+            watermark = RollupService.parse_watermark(config.config_value)
+
+            stmt = select(id_column.label("row_id"), time_column.label("watermark_time"), *source.columns)
+            if source.order_by_time:
+                stmt = stmt.where(time_column < upper)
+                if watermark:
+                    moment, row_id = watermark
+                    # 单独给出 >= 下界，否则部分优化器只能从索引开头扫描到水位
+                    stmt = stmt.where(time_column >= moment, or_(time_column > moment, id_column > row_id))
+                else:
+                    stmt = stmt.where(time_column.isnot(None))
+                stmt = stmt.order_by(time_column, id_column)
+            else:
+                if watermark:
+                    stmt = stmt.where(id_column > watermark[1])
+                stmt = stmt.order_by(id_column)
+            rows = db.execute(stmt.limit(batch_size)).all()
+
+            # more: 批次已满，之后可能还有可汇总的行；cut: 批次末尾之后还有行（满批或因等待时间截断）
+            more = cut = len(rows) == batch_size
+            if not source.order_by_time:
+                # 在第一条尚未超过等待时间的行处截断，之后的行留到下一次
+                for index, row in enumerate(rows):
+                    if row.watermark_time is None or _naive_utc(row.watermark_time) >= upper:
+                        rows = rows[:index]
+                        more, cut = False, True
+                        break
+            if cut and rows and source.report_key:
+                last_key = source.report_key(rows[-1])
+                complete = len(rows)
+                while complete > 0 and source.report_key(rows[complete - 1]) == last_key:
+                    complete -= 1
+                # 单次上报超过一批时只能整批处理
+                if complete:
+                    rows = rows[:complete]
+            if not rows:
+                db.commit()
+                break
+
+            source.apply(db, rows)
+            if not source.order_by_time and watermark:
+                gaps = _find_gaps(watermark[1], [row.row_id for row in rows], settings.ROLLUP_MAX_GAPS)
+                if gaps:
+                    gaps_config, known = RollupService._load_gaps(db, source)
+                    known.update((row_id, now.isoformat()) for row_id in gaps)
+                    RollupService._save_gaps(db, source, gaps_config, known)
+            config.config_value = RollupService.format_watermark(rows[-1].watermark_time, rows[-1].row_id)
+            db.commit()
+            processed += len(rows)
+            if not more:
+                break
+        return processed
+
+    @staticmethod
+    def run_sources(db: Session, sources: Optional[List[RollupSource]] = None,
+                    now: Optional[datetime] = None,
+                    stop_event: Optional[threading.Event] = None) -> Dict[str, int]:
+        """依次汇总各源表，返回 {源表: 处理行数}"""
+        sources = sources or ROLLUP_SOURCES
+        RollupService.ensure_watermarks(db, sources)
+        results = {}
+        for source in sources:
+            try:
+                results[source.name] = RollupService.process_source(db, source, now, stop_event=stop_event)
+            except Exception:
+                db.rollback()
+                logger.exception("统计汇总失败: %s", source.name)
+        return results
+
+
+class RollupScheduler:
+    """按固定间隔在后台线程中执行统计汇总"""
+
+    def __init__(self, enabled: bool, interval_seconds: int):
+        self.enabled = enabled
+        self.interval = interval_seconds
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.runs = 0
+        self.last_run_at: Optional[datetime] = None
+        self.last_processed: Dict[str, int] = {}
+
+    def start(self) -> None:
+        if not self.enabled or self._thread:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="rollup-scheduler", daemon=True)
+        self._thread.start()
+        logger.info("统计汇总已启动: interval=%ss", self.interval)
+
+    def stop(self) -> None:
+        if not self._thread:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+
+    def run_once(self) -> Dict[str, int]:
+        db = SessionLocal()
+        try:
+            processed = RollupService.run_sources(db, stop_event=self._stop_event)
+        finally:
+            db.close()
+        self.runs += 1
+        self.last_run_at = datetime.utcnow()
+        self.last_processed = processed
+        return processed
+
+    def stats(self) -> dict:
+        db = SessionLocal()
+        try:
+            watermarks = RollupService.get_watermarks(db)
+        finally:
+            db.close()
+        now = datetime.utcnow()
+        return {
+            "enabled": self.enabled,
+            "interval_seconds": self.interval,
+            "runs": self.runs,
+            "last_run_at": self.last_run_at,
+            "last_processed": self.last_processed,
+            "sources": {
+                name: {
+                    "watermark": moment,
+                    "lag_seconds": round((now - moment).total_seconds(), 1) if moment else None
+                }
+                for name, moment in watermarks.items()
+            }
+        }
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("统计汇总执行失败")
+            self._stop_event.wait(self.interval)
+
+
+rollup_scheduler = RollupScheduler(
+    enabled=settings.ROLLUP_ENABLED,
+    interval_seconds=settings.ROLLUP_INTERVAL_SECONDS
+)
@@ -5,6 +5,7 @@ from sqlalchemy import and_, func
 from app.models.task import Task, TaskExecution
 from app.models.terminal import Terminal
 from app.schemas.task import TaskCreate, TaskUpdate
+from app.services.retention_service import RetentionService
 
 class TaskService:
     @staticmethod
@@ -141,15 +142,6 @@ class TaskService:
     
     @staticmethod
     def cleanup_old_executions(db: Session, days: int = 90) -> int:
-        """清理旧的执行记录"""
+        """清理旧的执行记录（按主键范围分块删除）"""
         cutoff_date = datetime.utcnow() - timedelta(days=days)
-        old_executions = db.query(TaskExecution).filter(
-            TaskExecution.start_time < cutoff_date
-        ).all()
-        
-        count = len(old_executions)
-        for execution in old_executions:
-            db.delete(execution)
-        
-        db.commit()
-        return count
\ No newline at end of file
+        return RetentionService.purge(db, TaskExecution, TaskExecution.started_at, cutoff_date).deleted
\ No newline at end of file
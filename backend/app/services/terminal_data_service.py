@@ -0,0 +1,115 @@
+import json
+import logging
+import random
+import zlib
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.system_config import SystemConfig
+from app.models.terminal import TerminalData
+from app.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# SystemConfig中的策略配置键前缀，例如 terminal_data_policy.inventory_report = off
+POLICY_KEY_PREFIX = "terminal_data_policy."
+
+# 可选策略：off 不保存，sampled 按比例抽样压缩保存，full 原样保存JSON，compressed 压缩保存
+POLICIES = ("off", "sampled", "full", "compressed")
+
+# 未配置时的默认策略：已写入类型化表的上报不再重复保存
+DEFAULT_POLICIES = {
+    "login_report": "off",
+    "assets_report": "off",
+    "inventory_report": "off",
+    "auto_report": "compressed",
+}
+DEFAULT_POLICY = "full"
+
+# sampled 未指定比例时的抽样比例
+DEFAULT_SAMPLE_RATE = 0.1
+
+_policy_cache = TTLCache(maxsize=1, ttl=settings.TERMINAL_DATA_POLICY_CACHE_TTL)
+
+
+class TerminalDataService:
+    """
+    终端原始数据（terminal_data）的写入策略
+
+    按 data_type 从 SystemConfig 读取策略，配置值为 off / full / compressed / sampled，
+    sampled 可写作 sampled:0.05 指定抽样比例。压缩数据以zlib格式保存在 data_compressed 列，
+    读取时由 decode_rows 透明解压。
+    """
+
+    @staticmethod
+    def parse_policy(value: str) -> Tuple[str, float]:
+        """解析策略配置值，返回 (策略, 抽样比例)，无法识别时返回默认策略"""
+        mode, _, rate = value.strip().lower().partition(":")
+        if mode not in POLICIES:
+            logger.warning("无法识别的终端数据策略: %s", value)
+            return DEFAULT_POLICY, 1.0
+        if mode != "sampled":
+            return mode, 1.0
+        try:
+            return mode, min(max(float(rate), 0.0), 1.0) if rate else DEFAULT_SAMPLE_RATE
+        except ValueError:
+            logger.warning("无法识别的抽样比例: %s", value)
+            return mode, DEFAULT_SAMPLE_RATE
+
+    @staticmethod
+    def _load_policies(db: Session) -> Dict[str, Tuple[str, float]]:
+        policies = _policy_cache.get("policies")
+        if policies is None:
+            configs = db.query(SystemConfig.config_key, SystemConfig.config_value).filter(
+                SystemConfig.config_key.like(f"{POLICY_KEY_PREFIX}%"),
+                SystemConfig.is_active == True
+            ).all()
+            policies = {
+                key[len(POLICY_KEY_PREFIX):]: TerminalDataService.parse_policy(value)
+                for key, value in configs
+            }
+            _policy_cache.set("policies", policies)
+        return policies
+
+    @staticmethod
+    def get_policy(db: Session, data_type: str) -> Tuple[str, float]:
+        """获取数据类型的写入策略，返回 (策略, 抽样比例)"""
+        policy = TerminalDataService._load_policies(db).get(data_type)
+        if policy is None:
+            policy = (DEFAULT_POLICIES.get(data_type, DEFAULT_POLICY), DEFAULT_SAMPLE_RATE)
+        return policy
+
+    @staticmethod
+    def invalidate_policies() -> None:
+        """系统配置变更后清除策略缓存"""
+        _policy_cache.clear()
+
+    @staticmethod
+    def encode(content: Dict[str, Any]) -> bytes:
+        return zlib.compress(
+            json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8"),
+            settings.TERMINAL_DATA_COMPRESS_LEVEL
+        )
+
+    @staticmethod
+    def decode(blob: bytes) -> Dict[str, Any]:
+        return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+    @staticmethod
+    def record(db: Session, terminal_id: int, data_type: str,
+               content: Dict[str, Any]) -> Optional[TerminalData]:
+        """按策略保存一条终端数据，未保存时返回None；不提交事务"""
+        mode, sample_rate = TerminalDataService.get_policy(db, data_type)
+        if mode == "off" or (mode == "sampled" and random.random() >= sample_rate):
+            return None
+
+        if mode == "full":
+            terminal_data = TerminalData(terminal_id=terminal_id, data_type=data_type, data_content=content)
+        else:
+            terminal_data = TerminalData(
+                terminal_id=terminal_id,
+                data_type=data_type,
+                data_compressed=TerminalDataService.encode(content)
+            )
+        db.add(terminal_data)
+        return terminal_data
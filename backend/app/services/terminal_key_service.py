@@ -0,0 +1,167 @@
+import hashlib
+import hmac
+import secrets
+import time
+from datetime import datetime
+from typing import List, NamedTuple, Optional
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.shared_state import create_shared_state
+from app.models.terminal import TerminalApiKey
+from app.utils.ttl_cache import TTLCache
+
+# 请求头
+KEY_ID_HEADER = "X-Terminal-Key-Id"
+TIMESTAMP_HEADER = "X-Timestamp"
+SIGNATURE_HEADER = "X-Signature"
+
+# key_id -> CachedKey，不缓存不存在的密钥
+_key_cache = TTLCache(maxsize=100000, ttl=settings.TERMINAL_API_KEY_CACHE_TTL)
+
+# 吊销的 key_id 在缓存有效期内写入共享状态，其他进程命中本地缓存时据此立即拒绝
+_revocations = create_shared_state(settings.PRESENCE_BACKEND, settings.REDIS_URL, prefix="wlweb:terminal-key:")
+
+
+class CachedKey(NamedTuple):
+    terminal_id: str
+    revoked: bool
+
+
+class TerminalKeyService:
+    """
+    终端API密钥签发、吊销与请求签名校验
+
+    签发时生成随机 key_id，密钥为 HMAC-SHA256(TERMINAL_KEY_MASTER, key_id) 的十六进制串，只在签发时返回一次；
+    数据库只保存 key_id，不保存密钥或可直接用于签名的值。主密钥独立于 SECRET_KEY 配置且没有默认值，
+    未配置时拒绝签发和校验；更换主密钥会使已签发的全部密钥失效。终端每个请求携带：
+        X-Terminal-Key-Id: key_id
+        X-Timestamp: Unix时间戳（秒）
+        X-Signature: HMAC-SHA256(密钥, 待签名串) 的十六进制串
+    待签名串为 "请求方法\\n路径\\n时间戳\\n请求体SHA-256十六进制"，以换行连接。
+    校验只需一次密钥派生和一次HMAC，密钥状态按 key_id 缓存。
+    """
+
+    @staticmethod
+    def enabled() -> bool:
+        """是否已配置主密钥"""
+        return bool(settings.TERMINAL_KEY_MASTER)
+
+    @staticmethod
+    def derive_secret(key_id: str) -> str:
+        if not TerminalKeyService.enabled():
+            raise ValueError("服务器未配置 TERMINAL_KEY_MASTER，终端API密钥不可用")
+        master_key = settings.TERMINAL_KEY_MASTER.encode("utf-8")
+        return hmac.new(master_key, key_id.encode("utf-8"), hashlib.sha256).hexdigest()
+
+    @staticmethod
+    def string_to_sign(method: str, path: str, timestamp: str, body: bytes) -> bytes:
+        return "\n".join([method.upper(), path, timestamp, hashlib.sha256(body).hexdigest()]).encode("utf-8")
+
+    @staticmethod
+    def sign(secret: str, method: str, path: str, timestamp: str, body: bytes) -> str:
+        """计算请求签名，终端侧按同样方式计算"""
+        return hmac.new(
+            secret.encode("utf-8"),
+            TerminalKeyService.string_to_sign(method, path, timestamp, body),
+            hashlib.sha256
+        ).hexdigest()
+
+    @staticmethod
+    def issue(db: Session, terminal_id: str) -> dict:
+        """为终端签发新密钥，返回 {"key_id", "secret"}；未配置主密钥时抛出 ValueError，调用方负责提交事务"""
+        key_id = secrets.token_hex(12)
+        secret = TerminalKeyService.derive_secret(key_id)
+        db.add(TerminalApiKey(key_id=key_id, terminal_id=terminal_id))
+        return {"key_id": key_id, "secret": secret}
+
+    @staticmethod
+    def ensure_key(db: Session, terminal_id: str) -> Optional[dict]:
+        """
+        终端没有有效密钥时签发一个并返回，已有密钥或未配置主密钥时返回None
+
+        注册、自动上报接口只在请求携带有效操作员凭据时调用；已有密钥的终端不会再次拿到密钥，
+        轮换需由管理员签发或吊销。
+        """
+        if not TerminalKeyService.enabled():
+            return None
+        active = db.query(TerminalApiKey.id).filter(
+            TerminalApiKey.terminal_id == terminal_id,
+            TerminalApiKey.revoked_at.is_(None)
+        ).first()
+        if active is not None:
+            return None
+        return TerminalKeyService.issue(db, terminal_id)
+
+    @staticmethod
+    def list_keys(db: Session, terminal_id: str) -> List[TerminalApiKey]:
+        return db.query(TerminalApiKey).filter(
+            TerminalApiKey.terminal_id == terminal_id
+        ).order_by(TerminalApiKey.id).all()
+
+    @staticmethod
+    def revoke(db: Session, terminal_id: str, key_id: Optional[str] = None) -> int:
+        """吊销终端的指定密钥（未指定时吊销全部），立即提交，清除本进程缓存并通知其他进程，返回吊销数量"""
+        query = db.query(TerminalApiKey).filter(
+            TerminalApiKey.terminal_id == terminal_id,
+            TerminalApiKey.revoked_at.is_(None)
+        )
+        if key_id is not None:
+            query = query.filter(TerminalApiKey.key_id == key_id)
+        keys = query.all()
+        now = datetime.utcnow()
+        for key in keys:
+            key.revoked_at = now
+        db.commit()
+        for key in keys:
+            _key_cache.pop(key.key_id)
+            _revocations.set(key.key_id, "1", ttl=settings.TERMINAL_API_KEY_CACHE_TTL)
+        return len(keys)
+
+    @staticmethod
+    def _load(db: Session, key_id: str) -> Optional[CachedKey]:
+        cached = _key_cache.get(key_id)
+        if cached is not None:
+            if not cached.revoked and _revocations.get(key_id) is not None:
+                cached = cached._replace(revoked=True)
+                _key_cache.set(key_id, cached)
+            return cached
+        row = db.query(TerminalApiKey.terminal_id, TerminalApiKey.revoked_at).filter(
+            TerminalApiKey.key_id == key_id
+        ).first()
+        if row is None:
+            return None
+        cached = CachedKey(row.terminal_id, row.revoked_at is not None)
+        _key_cache.set(key_id, cached)
+        return cached
+
+    @staticmethod
+    def verify(db: Session, terminal_id: str, key_id: str, timestamp: Optional[str], signature: Optional[str],
+               method: str, path: str, body: bytes, now: Optional[float] = None) -> CachedKey:
+        """
+        校验请求签名，返回密钥；校验失败或未配置主密钥时抛出 ValueError（失败原因）
+
+        密钥必须属于路径中的终端且未吊销，时间戳与服务器时间相差不超过 TERMINAL_SIGNATURE_MAX_SKEW 秒。
+        """
+        if not TerminalKeyService.enabled():
+            raise ValueError("服务器未配置 TERMINAL_KEY_MASTER，终端API密钥不可用")
+        if not timestamp or not signature:
+            raise ValueError("缺少签名或时间戳")
+        try:
+            skew = abs((now or time.time()) - int(timestamp))
+        except ValueError:
+            raise ValueError("时间戳格式不正确")
+        if skew > settings.TERMINAL_SIGNATURE_MAX_SKEW:
+            raise ValueError("请求时间戳超出允许范围")
+        key = TerminalKeyService._load(db, key_id)
+        if key is None or key.terminal_id != terminal_id:
+            raise ValueError("终端密钥无效")
+        if key.revoked:
+            raise ValueError("终端密钥已吊销")
+        expected = TerminalKeyService.sign(TerminalKeyService.derive_secret(key_id), method, path, timestamp, body)
+        if not hmac.compare_digest(expected.encode("ascii"), signature.lower().encode("utf-8")):
+            raise ValueError("签名校验失败")
+        return key
+
+    @staticmethod
+    def cache_stats() -> dict:
+        return _key_cache.stats()
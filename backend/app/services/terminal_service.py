@@ -1,29 +1,30 @@
 from datetime import datetime, timedelta
 from typing import List, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from app.models.terminal import Terminal, TerminalData
+from sqlalchemy.orm.attributes import set_committed_value
+from app.models.terminal import Terminal, TerminalData, TerminalStatus
 from app.schemas.terminal import TerminalCreate, TerminalUpdate
+from app.services.presence_service import presence_registry
+from app.services.retention_service import RetentionService
+from app.services.terminal_data_service import TerminalDataService
 
 class TerminalService:
     @staticmethod
-    def get_online_terminals(db: Session, heartbeat_timeout: int = 5) -> List[Terminal]:
-        """获取在线终端列表"""
-        cutoff_time = datetime.utcnow() - timedelta(minutes=heartbeat_timeout)
-        return db.query(Terminal).filter(
-            and_(
-                Terminal.status == "online",
-                Terminal.last_heartbeat >= cutoff_time
-            )
-        ).all()
+    def get_online_terminals(db: Session) -> List[Terminal]:
+        """获取在线终端列表（在线终端ID取自在线状态注册表）"""
+        terminal_ids = presence_registry.terminal_ids(TerminalStatus.online)
+        if not terminal_ids:
+            return []
+        return db.query(Terminal).filter(Terminal.terminal_id.in_(terminal_ids)).all()
     
     @staticmethod
-    def get_offline_terminals(db: Session, heartbeat_timeout: int = 5) -> List[Terminal]:
+    def get_offline_terminals(db: Session) -> List[Terminal]:
         """获取离线终端列表"""
-        cutoff_time = datetime.utcnow() - timedelta(minutes=heartbeat_timeout)
-        return db.query(Terminal).filter(
-            Terminal.last_heartbeat < cutoff_time
-        ).all()
+        terminal_ids = presence_registry.terminal_ids(TerminalStatus.online)
+        query = db.query(Terminal)
+        if terminal_ids:
+            query = query.filter(Terminal.terminal_id.notin_(terminal_ids))
+        return query.all()
     
     @staticmethod
     def update_terminal_status(db: Session, terminal_id: str, status: str) -> Optional[Terminal]:
@@ -34,6 +35,7 @@ class TerminalService:
             terminal.last_heartbeat = datetime.utcnow()
             db.commit()
             db.refresh(terminal)
+            presence_registry.touch(terminal_id, status, seen_at=terminal.last_heartbeat, persisted=True)
         return terminal
     
     @staticmethod
@@ -63,34 +65,30 @@ class TerminalService:
     @staticmethod
     def get_terminal_data(db: Session, terminal_id: int, data_type: Optional[str] = None, 
                          limit: int = 100) -> List[TerminalData]:
-        """获取终端数据"""
+        """获取终端数据，压缩保存的数据解压到 data_content"""
         query = db.query(TerminalData).filter(TerminalData.terminal_id == terminal_id)
         
         if data_type:
             query = query.filter(TerminalData.data_type == data_type)
         
-        return query.order_by(TerminalData.created_at.desc()).limit(limit).all()
+        records = query.order_by(TerminalData.created_at.desc()).limit(limit).all()
+        for record in records:
+            if record.data_content is None and record.data_compressed is not None:
+                # 不标记为修改，避免提交时把解压后的数据写回
+                set_committed_value(record, "data_content", TerminalDataService.decode(record.data_compressed))
+        return records
     
     @staticmethod
     def cleanup_old_data(db: Session, days: int = 30) -> int:
-        """清理旧数据"""
+        """清理旧数据（按主键范围分块删除）"""
         cutoff_date = datetime.utcnow() - timedelta(days=days)
-        old_data = db.query(TerminalData).filter(
-            TerminalData.created_at < cutoff_date
-        ).all()
-        
-        count = len(old_data)
-        for data in old_data:
-            db.delete(data)
-        
-        db.commit()
-        return count
+        return RetentionService.purge(db, TerminalData, TerminalData.created_at, cutoff_date).deleted
     
     @staticmethod
     def get_terminal_statistics(db: Session) -> dict:
         """获取终端统计信息"""
         total_terminals = db.query(Terminal).count()
-        online_terminals = len(TerminalService.get_online_terminals(db))
+        online_terminals = presence_registry.count(TerminalStatus.online)
         offline_terminals = total_terminals - online_terminals
         
         return {
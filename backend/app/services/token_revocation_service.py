@@ -0,0 +1,147 @@
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.session import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+
+def _epoch(value: datetime) -> float:
+    """UTC时间（不带时区）转换为Unix时间戳"""
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+class TokenRevocationList:
+    """
+    访问令牌吊销列表
+
+    登出时按令牌ID（jti）写入 revoked_tokens 表并加入进程内集合，get_current_user 每次请求只查集合，
+    不访问数据库。后台线程每隔 interval 秒按主键水位读取其他进程新增的吊销记录，
+    并移除已过期令牌（过期令牌本身无法通过JWT校验）；数据库中的过期记录由保留清理删除。
+    """
+
+    def __init__(self, interval_seconds: int):
+        self.interval = interval_seconds
+        self._lock = threading.Lock()
+        # jti -> 令牌过期时间（Unix时间戳）
+        self._revoked: Dict[str, float] = {}
+        self._last_id = 0
+        self._loaded = False
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # 统计指标
+        self.checks = 0
+        self.rejected = 0
+        self.synced = 0
+        self.pruned = 0
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        self.checks += 1
+        if jti is None or jti not in self._revoked:
+            return False
+        self.rejected += 1
+        return True
+
+    def revoke(self, db: Session, jti: str, expires_at: datetime, username: Optional[str] = None) -> bool:
+        """吊销令牌（expires_at 为UTC时间）并立即提交，返回是否新吊销（已吊销过时返回False）"""
+        with self._lock:
+            self._revoked[jti] = _epoch(expires_at)
+        db.add(RevokedToken(jti=jti, username=username, expires_at=expires_at))
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            return False
+        return True
+
+    def sync(self, db: Session) -> int:
+        """读取水位之后新增的未过期吊销记录，首次调用时加载全部，返回新增数量"""
+        rows = db.query(RevokedToken.id, RevokedToken.jti, RevokedToken.expires_at).filter(
+            RevokedToken.id > self._last_id,
+            RevokedToken.expires_at > datetime.utcnow()
+        ).order_by(RevokedToken.id).all()
+        with self._lock:
+            added = 0
+            for row in rows:
+                if row.jti not in self._revoked:
+                    self._revoked[row.jti] = _epoch(row.expires_at)
+                    added += 1
+            if rows:
+                self._last_id = max(self._last_id, rows[-1].id)
+            self.synced += added
+            self._loaded = True
+        return added
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """移除已过期的令牌，返回移除数量"""
+        now = now or time.time()
+        with self._lock:
+            expired = [jti for jti, expires in self._revoked.items() if expires <= now]
+            for jti in expired:
+                del self._revoked[jti]
+            self.pruned += len(expired)
+        return len(expired)
+
+    def run_once(self) -> int:
+        db = SessionLocal()
+        try:
+            added = self.sync(db)
+        finally:
+            db.close()
+        self.prune()
+        return added
+
+    def start(self) -> None:
+        if self._thread:
+            return
+        # 启动时同步加载，保证已吊销的令牌从第一个请求起即被拒绝
+        try:
+            self.run_once()
+        except Exception:
+            logger.exception("加载令牌吊销列表失败")
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="token-revocation", daemon=True)
+        self._thread.start()
+        logger.info("令牌吊销列表已启动: revoked=%s, interval=%ss", len(self._revoked), self.interval)
+
+    def stop(self) -> None:
+        if not self._thread:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("同步令牌吊销列表失败")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._revoked.clear()
+            self._last_id = 0
+            self._loaded = False
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self._loaded,
+            "revoked": len(self._revoked),
+            "last_id": self._last_id,
+            "interval_seconds": self.interval,
+            "checks": self.checks,
+            "rejected": self.rejected,
+            "synced": self.synced,
+            "pruned": self.pruned
+        }
+
+
+token_revocations = TokenRevocationList(interval_seconds=settings.TOKEN_REVOCATION_SYNC_SECONDS)
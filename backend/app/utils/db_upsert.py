@@ -0,0 +1,120 @@
+from typing import List, Optional, Sequence
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+
+def upsert(db: Session, model, rows: List[dict], index_elements: Sequence[str],
+           update_columns: Sequence[str], newer_column: Optional[str] = None) -> None:
+    """
+    按主键/唯一键批量插入或更新（MySQL: ON DUPLICATE KEY UPDATE，SQLite/PostgreSQL: ON CONFLICT）
+
+    指定 newer_column 时仅当新行该列不早于已有行时才覆盖，乱序到达的旧数据不会覆盖新数据。
+    """
+    if not rows:
+        return
+    table = model.__table__
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+
+        stmt = insert(table).values(rows)
+        # MySQL按顺序求值赋值表达式，比较列必须最后更新
+        columns = [column for column in update_columns if column != newer_column]
+        if newer_column:
+            columns.append(newer_column)
+            is_newer = table.c[newer_column] <= stmt.inserted[newer_column]
+            assignments = [
+                (column, func.if_(is_newer, stmt.inserted[column], table.c[column]))
+                for column in columns
+            ]
+        else:
+            assignments = [(column, stmt.inserted[column]) for column in columns]
+        stmt = stmt.on_duplicate_key_update(assignments)
+    else:
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+
+        stmt = insert(table).values(rows)
+        where = None
+        if newer_column:
+            where = table.c[newer_column] <= stmt.excluded[newer_column]
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(index_elements),
+            set_={column: stmt.excluded[column] for column in update_columns},
+            where=where
+        )
+
+    db.execute(stmt)
+
+
+def insert_if_absent(db: Session, model, rows: List[dict], index_elements: Sequence[str]) -> None:
+    """按主键/唯一键批量插入，已存在的行保持不变（MySQL: 无操作的 ON DUPLICATE KEY UPDATE，SQLite/PostgreSQL: ON CONFLICT DO NOTHING）"""
+    if not rows:
+        return
+    table = model.__table__
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+
+        # 不用 INSERT IGNORE：它会同时忽略其他错误
+        column = index_elements[0]
+        stmt = insert(table).values(rows).on_duplicate_key_update([(column, table.c[column])])
+    else:
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+
+        stmt = insert(table).values(rows).on_conflict_do_nothing(index_elements=list(index_elements))
+
+    db.execute(stmt)
+
+
+def accumulate(db: Session, model, rows: List[dict], index_elements: Sequence[str],
+               sum_columns: Sequence[str], replace_columns: Sequence[str] = ()) -> None:
+    """
+    按唯一键批量累加：不存在时插入，已存在时 sum_columns 各列加上新行的值，replace_columns 各列直接覆盖
+
+    同一批中唯一键相同的行先在内存中合并；语句形状固定，以executemany执行，编译结果可缓存复用。
+    """
+    if not rows:
+        return
+    merged = {}
+    for row in rows:
+        key = tuple(row[column] for column in index_elements)
+        existing = merged.get(key)
+        if existing is None:
+            merged[key] = dict(row)
+        else:
+            for column in sum_columns:
+                existing[column] += row[column]
+
+    table = model.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+
+        stmt = insert(table)
+        stmt = stmt.on_duplicate_key_update(
+            [(column, table.c[column] + stmt.inserted[column]) for column in sum_columns]
+            + [(column, stmt.inserted[column]) for column in replace_columns]
+        )
+    else:
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(index_elements),
+            set_={
+                **{column: table.c[column] + stmt.excluded[column] for column in sum_columns},
+                **{column: stmt.excluded[column] for column in replace_columns}
+            }
+        )
+    db.execute(stmt, list(merged.values()))
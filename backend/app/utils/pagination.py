@@ -0,0 +1,147 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+from fastapi import HTTPException, Response, status
+from sqlalchemy import DateTime, and_, false, literal, or_
+from sqlalchemy.orm import Query
+
+# 存在下一页时响应头中返回的游标
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# 排序规则：[(列, 是否倒序), ...]，最后一列必须唯一（通常为主键id）
+SortOrder = Sequence[Tuple[Any, bool]]
+
+
+def _order_token(order: SortOrder) -> str:
+    return ",".join(f"{column.key}:{'desc' if descending else 'asc'}" for column, descending in order)
+
+
+def encode_cursor(row, order: SortOrder) -> str:
+    """以行的排序键生成不透明游标"""
+    values = []
+    for column, _ in order:
+        value = getattr(row, column.key)
+        values.append(value.isoformat() if isinstance(value, datetime) else value)
+    payload = json.dumps({"o": _order_token(order), "v": values}, separators=(",", ":"), ensure_ascii=False)
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, order: SortOrder) -> List[Any]:
+    """解析游标，游标格式错误或来自其他排序规则时返回400"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if payload["o"] != _order_token(order) or len(payload["v"]) != len(order):
+            raise ValueError("cursor does not match sort order")
+        values = []
+        for (column, _), value in zip(order, payload["v"]):
+            if value is not None and isinstance(column.type, DateTime):
+                value = datetime.fromisoformat(value)
+            values.append(value)
+        return values
+    except (ValueError, KeyError, TypeError, UnicodeError, binascii.Error):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="无效的分页游标"
+        )
+
+
+def _bounds(value, dialect: str) -> Tuple[Any, Any]:
+    """
+    返回与 value 相等的最小、最大绑定值
+
+    SQLite 以文本保存时间：数据库默认值写入的没有微秒部分（"YYYY-MM-DD HH:MM:SS"），
+    应用写入的总带微秒（".000000"），两种写法按文本比较并不相等，微秒为0时分别按两种写法比较。
+    """
+    if dialect == "sqlite" and isinstance(value, datetime) and value.microsecond == 0:
+        text = value.strftime("%Y-%m-%d %H:%M:%S")
+        return literal(text), literal(f"{text}.000000")
+    return value, value
+
+
+def _equals(column, value, dialect: str):
+    if value is None:
+        return column.is_(None)
+    low, high = _bounds(value, dialect)
+    return column == low if low is high else column.between(low, high)
+
+
+def _after(column, descending: bool, value, dialect: str):
+    """排在 value 之后的行；MySQL/SQLite 中 NULL 最小：升序排在最前，倒序排在最后"""
+    if value is None:
+        return false() if descending else column.isnot(None)
+    low, high = _bounds(value, dialect)
+    if descending:
+        return or_(column < low, column.is_(None)) if column.nullable else column < low
+    return column > high
+
+
+def seek_conditions(order: SortOrder, values: Sequence[Any], dialect: str) -> list:
+    """
+    返回严格排在游标之后的行的查询条件，按顺序依次查询
+
+    首列条件只用范围比较，使优化器直接定位到索引中的位置；首列可为 NULL 时，
+    NULL 段（倒序排在最后、升序排在最前）单独作为一个条件，不与范围条件 OR 在一起，
+    否则优化器只能从索引开头扫描。
+    """
+    # 首列与游标相等时，其余列按排序规则大于游标值
+    branches = []
+    for index in range(1, len(order)):
+        equal_prefix = [_equals(col, value, dialect) for (col, _), value in zip(order[1:index], values[1:index])]
+        column, descending = order[index]
+        branches.append(and_(*equal_prefix, _after(column, descending, values[index], dialect)))
+    tail = or_(false(), *branches)
+
+    column, descending = order[0]
+    value = values[0]
+    if value is None:
+        conditions = [and_(column.is_(None), tail)]
+        if not descending:
+            conditions.append(column.isnot(None))
+        return conditions
+
+    low, high = _bounds(value, dialect)
+    equal = _equals(column, value, dialect)
+    if descending:
+        conditions = [and_(column <= high, or_(column < low, and_(equal, tail)))]
+        if column.nullable:
+            conditions.append(column.is_(None))
+    else:
+        conditions = [and_(column >= low, or_(column > high, and_(equal, tail)))]
+    return conditions
+
+
+def paginate(
+    query: Query,
+    order: SortOrder,
+    limit: int,
+    skip: int = 0,
+    cursor: Optional[str] = None,
+    response: Optional[Response] = None
+) -> list:
+    """
+    按排序规则分页查询
+
+    指定 cursor 时从游标位置继续（忽略 skip），否则按 skip 偏移。
+    多取一行判断是否还有下一页，有则把下一页游标写入响应头 X-Next-Cursor。
+    """
+    order_by = [column.desc() if descending else column.asc() for column, descending in order]
+    if cursor:
+        dialect = query.session.get_bind().dialect.name
+        rows = []
+        for condition in seek_conditions(order, decode_cursor(cursor, order), dialect):
+            rows += query.filter(condition).order_by(*order_by).limit(limit + 1 - len(rows)).all()
+            if len(rows) > limit:
+                break
+    else:
+        query = query.order_by(*order_by)
+        if skip:
+            query = query.offset(skip)
+        rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if has_more and rows and response is not None:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1], order)
+    return rows
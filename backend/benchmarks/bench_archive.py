@@ -0,0 +1,114 @@
+"""
+冷数据归档基准测试
+
+造 --accounts 个账户在 --days 天内的 --rows 条资产记录（按入库时间均匀分布），汇总后把
+早于 --archive-days 天的记录归档为Parquet/Arrow文件，报告：
+  - 归档速率、归档文件大小，归档前后资产记录表的行数与占用空间
+  - 单个账户在已归档时间窗口、未归档时间窗口内读取明细历史的延迟
+
+    python -m benchmarks.bench_archive
+    python -m benchmarks.bench_archive --rows 2000000 --format arrow
+"""
+import random
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+from benchmarks.common import build_parser, configure_database, reset_schema, measure, format_ms, table_usage
+
+
+def seed(rows: int, accounts: int, days: int, seed_value: int) -> datetime:
+    from sqlalchemy import insert
+    from app.core.database import SessionLocal
+    from app.models.game_account import GameAccount, GameAssetRecord
+
+    reset_schema()
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+    start_time = now - timedelta(days=days)
+    step = days * 86400 / rows
+    db = SessionLocal()
+    try:
+        db.execute(insert(GameAccount), [{"account_id": f"A{index:05d}"} for index in range(accounts)])
+        for start in range(0, rows, 50000):
+            # 主键随入库时间递增
+            db.execute(insert(GameAssetRecord), [
+                {"account_id": f"A{rng.randrange(accounts):05d}", "terminal_id": f"T{rng.randrange(100):03d}",
+                 "region_code": "S1", "gold": rng.randint(0, 10 ** 9), "diamond": rng.randint(0, 10 ** 6),
+                 "level": rng.randint(1, 100), "report_time": start_time + timedelta(seconds=index * step),
+                 "created_at": start_time + timedelta(seconds=index * step)}
+                for index in range(start, min(start + 50000, rows))
+            ])
+            db.commit()
+    finally:
+        db.close()
+    return now
+
+
+def main():
+    parser = build_parser(__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--accounts", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=60, help="数据覆盖的天数")
+    parser.add_argument("--archive-days", type=int, default=30, help="归档早于该天数的记录")
+    parser.add_argument("--format", choices=["parquet", "arrow"], default="parquet")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    print(f"database: {configure_database(args.database_url)}")
+
+    from app.core.config import settings
+    from app.core.database import SessionLocal
+    from app.models.game_account import GameAssetRecord
+    from app.services.archive_service import ArchiveService
+    from app.services.rollup_service import RollupService
+
+    archive_dir = tempfile.mkdtemp(prefix="wlweb_bench_archive_")
+    settings.ARCHIVE_DIR = archive_dir
+    settings.ARCHIVE_FORMAT = args.format
+    settings.ARCHIVE_AFTER_DAYS = args.archive_days
+    settings.RETENTION_CHUNK_SLEEP_MS = 0
+
+    start = time.perf_counter()
+    now = seed(args.rows, args.accounts, args.days, args.seed)
+    print(f"seeded {args.rows:,} asset records over {args.days} days in {time.perf_counter() - start:.1f}s")
+
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        RollupService.run_sources(db, now=now)
+        print(f"rollup {time.perf_counter() - start:.1f}s")
+
+        account_id = "A00000"
+        windows = (
+            ("archived window (7 days)", now - timedelta(days=args.days - 1), now - timedelta(days=args.days - 8)),
+            ("live window (7 days)", now - timedelta(days=8), now - timedelta(days=1)),
+        )
+        expected = {
+            label: [record["id"] for record in ArchiveService.history(db, GameAssetRecord, account_id, since, until)]
+            for label, since, until in windows
+        }
+
+        rows, size = table_usage(db, ["game_asset_records"])["game_asset_records"]
+        print(f"before: game_asset_records rows={rows:,} size={size / 1024 / 1024:.1f} MiB")
+        result = ArchiveService.run(db, now=now)[0]
+        print(f"archive ({args.format}): {result.archived:,} rows, {result.days} days, {result.elapsed:.1f}s, "
+              f"{result.rows_per_second:,.0f} rows/s, deleted {result.deleted:,}, "
+              f"files {result.bytes / 1024 / 1024:.1f} MiB")
+        rows, size = table_usage(db, ["game_asset_records"])["game_asset_records"]
+        print(f"after:  game_asset_records rows={rows:,} size={size / 1024 / 1024:.1f} MiB")
+
+        print(f"history of {account_id}")
+        for label, since, until in windows:
+            records = ArchiveService.history(db, GameAssetRecord, account_id, since, until)
+            assert [record["id"] for record in records] == expected[label]
+            samples = measure(lambda: ArchiveService.history(db, GameAssetRecord, account_id, since, until),
+                              args.repeat)
+            print(f"  {label:<26} rows={len(records):>5} {format_ms(samples)}")
+    finally:
+        db.close()
+        shutil.rmtree(archive_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
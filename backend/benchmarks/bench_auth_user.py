@@ -0,0 +1,125 @@
+"""
+JWT认证用户缓存基准测试
+
+造 --users 个用户，各签发一个令牌，测量每次请求的认证开销：
+  - 依赖链：get_db 打开会话 -> get_current_user 解码JWT并取得用户 -> 关闭会话，共 --calls 次
+  - 接口：以 TestClient 请求 /statistics/user-cache（接口本身几乎不做事），两种方式交替各 --requests 次
+对比不缓存（每次按用户名查询users表）与缓存（命中时不查询数据库），并统计数据库语句数。
+
+    python -m benchmarks.bench_auth_user
+    python -m benchmarks.bench_auth_user --users 10000 --calls 50000
+"""
+import asyncio
+import random
+import statistics
+import time
+from benchmarks.common import build_parser, configure_database, reset_schema
+
+
+def seed(users: int) -> None:
+    from sqlalchemy import insert
+    from app.core.database import SessionLocal
+    from app.models.user import User
+
+    reset_schema()
+    db = SessionLocal()
+    try:
+        # 基准测试不登录，密码哈希用占位值避免bcrypt耗时
+        db.execute(insert(User), [
+            {"username": f"user{index:05d}", "password_hash": "x", "role": "operator"} for index in range(users)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+class QueryCounter:
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.queries = 0
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _count(conn, cursor, statement, parameters, context, executemany):
+            self.queries += 1
+
+
+def report(label: str, samples, queries: int) -> None:
+    print(f"  {label:<10} mean={statistics.mean(samples) * 1e6:>8.1f}us "
+          f"median={statistics.median(samples) * 1e6:>8.1f}us "
+          f"p99={sorted(samples)[int(len(samples) * 0.99)] * 1e6:>8.1f}us  queries={queries:,}")
+
+
+def main():
+    parser = build_parser(__doc__)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--active", type=int, default=50, help="发起请求的用户数")
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    print(f"database: {configure_database(args.database_url)}")
+
+    from fastapi.testclient import TestClient
+    from app.api import deps
+    from app.core.database import engine, get_db
+    from app.core.principal_cache import PrincipalCache, principal_cache
+    from app.core.security import create_access_token
+    from main import app
+
+    seed(args.users)
+    counter = QueryCounter(engine)
+    rng = random.Random(args.seed)
+    tokens = [create_access_token(subject=f"user{rng.randrange(args.users):05d}") for _ in range(args.active)]
+    modes = (
+        ("no cache", PrincipalCache(maxsize=0, ttl=0)),
+        ("cached", principal_cache),
+    )
+
+    async def resolve(token: str) -> None:
+        db_gen = get_db()
+        db = next(db_gen)
+        try:
+            await deps.get_current_user(token=token, db=db)
+        finally:
+            db_gen.close()
+
+    async def run_dependency_chain() -> list:
+        samples = []
+        for index in range(args.calls):
+            token = tokens[index % len(tokens)]
+            start = time.perf_counter()
+            await resolve(token)
+            samples.append(time.perf_counter() - start)
+        return samples
+
+    print(f"dependency chain: {args.calls:,} calls, {len(tokens)} active users")
+    for label, cache in modes:
+        deps.principal_cache = cache
+        cache.clear()
+        counter.queries = 0
+        report(label, asyncio.run(run_dependency_chain()), counter.queries)
+
+    client = TestClient(app)
+    print(f"endpoint: {args.requests:,} requests to /statistics/user-cache per mode (modes interleaved)")
+    samples = {label: [] for label, _ in modes}
+    queries = {label: 0 for label, _ in modes}
+    principal_cache.clear()
+    # 交替执行两种方式，避免测试客户端随运行时间的漂移影响对比
+    for index in range(args.requests):
+        headers = {"Authorization": f"Bearer {tokens[index % len(tokens)]}"}
+        for label, cache in modes:
+            deps.principal_cache = cache
+            before = counter.queries
+            start = time.perf_counter()
+            client.get("/api/v1/statistics/user-cache", headers=headers).raise_for_status()
+            samples[label].append(time.perf_counter() - start)
+            queries[label] += counter.queries - before
+    for label, _ in modes:
+        report(label, samples[label], queries[label])
+    deps.principal_cache = principal_cache
+    print(f"cache: {principal_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
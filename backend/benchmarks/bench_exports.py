@@ -0,0 +1,176 @@
+"""
+上报历史流式导出基准测试
+
+造单个账户的 --rows 条资产记录，测量：
+  - 旧方式：按100条一页调用 /game-accounts/{id}/asset-records 翻页取出前 --legacy-rows 条
+  - 旧方式一次性加载：前 --legacy-rows 条全部实例化为ORM对象和响应模型
+  - /exports/asset-records 在 --sizes 各规模下的NDJSON、CSV+gzip导出
+报告耗时、吞吐、输出字节数和Python内存分配峰值（tracemalloc）。
+
+    python -m benchmarks.bench_exports
+    python -m benchmarks.bench_exports --rows 2000000 --sizes 100000 2000000
+"""
+import asyncio
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+from benchmarks.common import build_parser, configure_database, reset_schema
+
+ACCOUNT_ID = "A0000001"
+
+
+def seed(rows: int, seed_value: int) -> None:
+    from sqlalchemy import insert
+    from app.core.database import SessionLocal
+    from app.models.game_account import GameAccount, GameAssetRecord
+
+    reset_schema()
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        db.add(GameAccount(account_id=ACCOUNT_ID))
+        db.commit()
+        for start in range(0, rows, 50000):
+            db.execute(insert(GameAssetRecord), [
+                {"account_id": ACCOUNT_ID, "terminal_id": "T0001", "region_code": "S1",
+                 "gold": rng.randint(0, 10 ** 9), "diamond": rng.randint(0, 10 ** 6), "energy": rng.randint(0, 200),
+                 "experience": rng.randint(0, 10 ** 9), "level": rng.randint(1, 100), "vip_level": rng.randint(0, 15),
+                 "report_time": now - timedelta(seconds=rows - index), "created_at": now - timedelta(seconds=rows - index)}
+                for index in range(start, min(start + 50000, rows))
+            ])
+            db.commit()
+    finally:
+        db.close()
+
+
+async def stream_get(app, path: str, params: dict) -> int:
+    """
+    直接以ASGI协议请求接口并丢弃响应体，返回响应字节数
+
+    TestClient 和 httpx 的ASGI传输都会先把整个响应体收集到内存，无法体现流式输出的内存占用。
+    """
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "root_path": "", "query_string": urlencode(params).encode(),
+        "headers": [(b"host", b"testserver")], "client": ("127.0.0.1", 50000), "server": ("testserver", 80),
+    }
+    disconnected = asyncio.Event()
+    requested = False
+    total = 0
+    status = None
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # 客户端保持连接直到响应结束
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal total, status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            total += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    disconnected.set()
+    if status != 200:
+        raise RuntimeError(f"{path} -> {status}")
+    return total
+
+
+def traced(fn):
+    """执行 fn，返回 (结果, 耗时秒, 内存分配峰值字节)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = fn()
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def report(label: str, rows: int, elapsed: float, peak: int, size: int = None) -> None:
+    output = f" out={size / 1024 / 1024:>8.1f} MiB" if size is not None else ""
+    print(f"  {label:<34} rows={rows:>9,} {elapsed:>7.2f}s {rows / elapsed:>9,.0f} rows/s "
+          f"peak={peak / 1024 / 1024:>7.1f} MiB{output}")
+
+
+def main():
+    parser = build_parser(__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000], help="导出的行数规模")
+    parser.add_argument("--legacy-rows", type=int, default=100_000, help="旧方式取出的行数")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    print(f"database: {configure_database(args.database_url)}")
+
+    from fastapi.testclient import TestClient
+    from app.api.deps import get_current_user
+    from app.api.endpoints.game_accounts import GameAssetRecordResponse
+    from app.core.database import SessionLocal
+    from app.models.game_account import GameAssetRecord
+    from app.utils.pagination import NEXT_CURSOR_HEADER
+    from main import app
+
+    start = time.perf_counter()
+    seed(args.rows, args.seed)
+    print(f"seeded {args.rows:,} asset records in {time.perf_counter() - start:.1f}s")
+
+    app.dependency_overrides[get_current_user] = lambda: None
+    client = TestClient(app)
+
+    def legacy_paging():
+        rows, cursor = 0, None
+        while rows < args.legacy_rows:
+            params = {"limit": 100, **({"cursor": cursor} if cursor else {})}
+            response = client.get(f"/api/v1/game-accounts/{ACCOUNT_ID}/asset-records", params=params)
+            rows += len(response.json())
+            cursor = response.headers.get(NEXT_CURSOR_HEADER)
+            if not cursor:
+                break
+        return rows
+
+    def legacy_load_all():
+        db = SessionLocal()
+        try:
+            records = db.query(GameAssetRecord).filter(
+                GameAssetRecord.account_id == ACCOUNT_ID
+            ).order_by(GameAssetRecord.id).limit(args.legacy_rows).all()
+            return len([GameAssetRecordResponse.model_validate(record).model_dump() for record in records])
+        finally:
+            db.close()
+
+    print("legacy")
+    rows, elapsed, peak = traced(legacy_paging)
+    report("paging limit=100 (cursor)", rows, elapsed, peak)
+    rows, elapsed, peak = traced(legacy_load_all)
+    report("load all as ORM + response models", rows, elapsed, peak)
+
+    for size in sorted(set(min(size, args.rows) for size in args.sizes)):
+        # 新建的表主键从1连续递增，以 after_id 截取最后 size 条
+        after_id = args.rows - size
+        print(f"export {size:,} rows")
+        for label, params in (
+            ("ndjson", {"format": "ndjson"}),
+            ("csv + gzip", {"format": "csv", "gzip": "true"}),
+        ):
+            def export():
+                return asyncio.run(stream_get(
+                    app, "/api/v1/exports/asset-records", {**params, "account_id": ACCOUNT_ID, "after_id": after_id}
+                ))
+
+            size_bytes, elapsed, peak = traced(export)
+            report(label, size, elapsed, peak, size_bytes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+终端心跳合并写回基准测试
+
+1. 机群模拟：--terminals 台终端每 --ping-interval 秒心跳一次，按虚拟时钟模拟 --duration 秒，
+   每 --flush-interval 秒执行一次注册表的超时扫描和写回（真实写数据库）。少量心跳携带新IP或异常状态。
+   对比旧实现（每次心跳一条UPDATE并提交）与合并写回的写入行数、语句数、提交数和每秒写入。
+2. 接口延迟：旧实现（查询终端、更新整行并提交）与新心跳接口各请求 --requests 次，统计UPDATE语句数和延迟。
+
+    python -m benchmarks.bench_heartbeats
+    python -m benchmarks.bench_heartbeats --terminals 20000 --duration 1800
+"""
+import random
+import time
+from datetime import datetime, timedelta
+from benchmarks.common import build_parser, configure_database, reset_schema, measure, format_ms
+
+
+def seed(terminals: int) -> None:
+    from sqlalchemy import insert
+    from app.core.database import SessionLocal
+    from app.models.terminal import Terminal
+
+    reset_schema()
+    db = SessionLocal()
+    try:
+        db.execute(insert(Terminal), [
+            {"terminal_id": f"T{index:06d}", "name": f"Terminal-{index}", "status": "offline",
+             "ip_address": "10.0.0.1", "config": {"version": 1}}
+            for index in range(terminals)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+class StatementCounter:
+    """统计引擎执行的UPDATE语句数、更新行数和提交数"""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.updates = self.rows = self.commits = 0
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _count(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("UPDATE"):
+                self.updates += 1
+                self.rows += len(parameters) if executemany else 1
+
+        @event.listens_for(engine, "commit")
+        def _commit(conn):
+            self.commits += 1
+
+    def reset(self) -> None:
+        self.updates = self.rows = self.commits = 0
+
+
+def simulate_fleet(args, counter) -> None:
+    from app.core.database import SessionLocal
+    from app.models.terminal import Terminal
+    from app.services.presence_service import presence_registry
+
+    rng = random.Random(args.seed)
+    db = SessionLocal()
+    try:
+        terminal_ids = sorted(terminal_id for terminal_id, in db.query(Terminal.terminal_id))
+    finally:
+        db.close()
+    # 每台终端在心跳周期内的固定相位
+    phases = {terminal_id: rng.uniform(0, args.ping_interval) for terminal_id in terminal_ids}
+
+    presence_registry.clear()
+    counter.reset()
+    start_time = datetime.utcnow()
+    pings = flush_seconds = 0.0
+    ticks = int(args.duration / args.flush_interval)
+    for tick in range(ticks):
+        window_start = tick * args.flush_interval
+        window_end = window_start + args.flush_interval
+        for terminal_id in terminal_ids:
+            moment = phases[terminal_id]
+            # 本窗口内的各次心跳
+            first = window_start + (moment - window_start) % args.ping_interval
+            offset = first
+            while offset < window_end:
+                status, ip_address = "online", None
+                roll = rng.random()
+                if roll < args.error_rate:
+                    status = "error"
+                elif roll < args.error_rate + args.ip_change_rate:
+                    ip_address = f"10.0.{rng.randrange(256)}.{rng.randrange(256)}"
+                presence_registry.touch(terminal_id, status,
+                                        seen_at=start_time + timedelta(seconds=offset), ip_address=ip_address)
+                pings += 1
+                offset += args.ping_interval
+        db = SessionLocal()
+        try:
+            started = time.perf_counter()
+            presence_registry.sweep(start_time + timedelta(seconds=window_end))
+            presence_registry.flush(db)
+            flush_seconds += time.perf_counter() - started
+        finally:
+            db.close()
+
+    duration = ticks * args.flush_interval
+    print(f"fleet: {len(terminal_ids):,} terminals, ping every {args.ping_interval}s, "
+          f"{duration}s simulated, flush every {args.flush_interval}s")
+    print(f"  legacy     {pings:>9,.0f} UPDATE rows {pings:>9,.0f} statements {pings:>9,.0f} commits "
+          f"{pings / duration:>8.1f} rows/s")
+    print(f"  coalesced  {counter.rows:>9,} UPDATE rows {counter.updates:>9,} statements {counter.commits:>9,} commits "
+          f"{counter.rows / duration:>8.1f} rows/s  ({counter.rows / pings:.1%} of legacy rows, "
+          f"{counter.updates / pings:.2%} of statements; flush time {flush_seconds:.2f}s total)")
+
+
+def main():
+    parser = build_parser(__doc__)
+    parser.add_argument("--terminals", type=int, default=5000)
+    parser.add_argument("--ping-interval", type=int, default=30, help="心跳间隔（秒）")
+    parser.add_argument("--duration", type=int, default=600, help="模拟时长（秒）")
+    parser.add_argument("--flush-interval", type=int, default=None, help="写回间隔（秒），默认取配置")
+    parser.add_argument("--ip-change-rate", type=float, default=0.001, help="心跳携带新IP的比例")
+    parser.add_argument("--error-rate", type=float, default=0.001, help="心跳上报异常状态的比例")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    print(f"database: {configure_database(args.database_url)}")
+
+    from fastapi import Depends, HTTPException
+    from fastapi.testclient import TestClient
+    from app.core.config import settings
+    from app.core.database import engine, get_db
+    from app.models.terminal import Terminal
+    from app.schemas.terminal import TerminalHeartbeat
+    from app.services.presence_service import presence_registry
+    from main import app
+
+    args.flush_interval = args.flush_interval or settings.PRESENCE_FLUSH_INTERVAL_SECONDS
+    seed(args.terminals)
+    counter = StatementCounter(engine)
+    simulate_fleet(args, counter)
+
+    @app.post("/bench/legacy-heartbeat/{terminal_id}")
+    def legacy_heartbeat(terminal_id: str, heartbeat: TerminalHeartbeat, db=Depends(get_db)):
+        terminal = db.query(Terminal).filter(Terminal.terminal_id == terminal_id).first()
+        if not terminal:
+            raise HTTPException(status_code=404)
+        terminal.status = heartbeat.status
+        terminal.last_heartbeat = datetime.utcnow()
+        if heartbeat.ip_address:
+            terminal.ip_address = heartbeat.ip_address
+        if heartbeat.config:
+            terminal.config = heartbeat.config
+        db.commit()
+        return {"message": "ok"}
+
+    client = TestClient(app)
+    rng = random.Random(args.seed)
+    terminal_ids = [f"T{rng.randrange(args.terminals):06d}" for _ in range(args.requests)]
+    body = {"status": "online", "ip_address": "10.0.0.1", "config": {"version": 1}}
+    print(f"endpoint: {args.requests} heartbeats")
+    for label, url in (
+        ("legacy", "/bench/legacy-heartbeat/{}"),
+        ("coalesced", "/open-api/v1/terminals/{}/heartbeat"),
+    ):
+        seed(args.terminals)
+        presence_registry.clear()
+        counter.reset()
+        ids = iter(terminal_ids)
+        samples = measure(lambda: client.post(url.format(next(ids)), json=body).raise_for_status(), args.requests)
+        statements, rows = counter.updates, counter.rows
+        presence_registry.run_once()
+        print(f"  {label:<10} {format_ms(samples)}  during requests: {statements} UPDATE statements ({rows} rows), "
+              f"flush: {counter.updates - statements} statements ({counter.rows - rows} rows)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+列表接口分页基准测试：skip/limit 与游标分页对比
+
+造 --rows 个游戏账户以及单个账户的 --rows 条资产记录，每页 --limit 条，
+分别以 skip 偏移和 X-Next-Cursor 游标请求第 --page 页，测量请求延迟。
+
+    python -m benchmarks.bench_pagination
+    python -m benchmarks.bench_pagination --rows 1000000 --page 5000
+"""
+import random
+from datetime import datetime, timedelta
+from benchmarks.common import build_parser, configure_database, reset_schema, measure, format_ms
+
+ACCOUNT_ID = "A0000000"
+
+
+def seed(rows: int, seed_value: int) -> None:
+    from sqlalchemy import insert
+    from app.core.database import SessionLocal
+    from app.models.game_account import GameAccount, GameAssetRecord
+
+    reset_schema()
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        for start in range(0, rows, 50000):
+            db.execute(insert(GameAccount), [
+                # 更新时间有大量重复，检验游标在相同排序键下的稳定性
+                {"account_id": f"A{index:07d}", "updated_at": now - timedelta(seconds=rng.randint(0, rows // 10))}
+                for index in range(start, min(start + 50000, rows))
+            ])
+            db.execute(insert(GameAssetRecord), [
+                {"account_id": ACCOUNT_ID, "terminal_id": "T0001", "gold": index, "diamond": index,
+                 "report_time": now - timedelta(seconds=rng.randint(0, rows))}
+                for index in range(start, min(start + 50000, rows))
+            ])
+            db.commit()
+    finally:
+        db.close()
+
+
+def main():
+    parser = build_parser(__doc__)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--page", type=int, default=1000, help="测量的页码（从1开始）")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    print(f"database: {configure_database(args.database_url)}")
+
+    from fastapi.testclient import TestClient
+    from app.api.deps import get_current_user
+    from app.core.database import SessionLocal
+    from app.models.game_account import GameAccount, GameAssetRecord
+    from app.utils.pagination import NEXT_CURSOR_HEADER, encode_cursor
+    from main import app
+
+    seed(args.rows, args.seed)
+    print(f"seeded {args.rows:,} accounts and {args.rows:,} asset records, page {args.page} x {args.limit} rows")
+
+    app.dependency_overrides[get_current_user] = lambda: None
+    client = TestClient(app)
+    skip = (args.page - 1) * args.limit
+    cases = (
+        ("/api/v1/game-accounts/", [(GameAccount.updated_at, True), (GameAccount.id, True)], None),
+        (f"/api/v1/game-accounts/{ACCOUNT_ID}/asset-records",
+         [(GameAssetRecord.report_time, True), (GameAssetRecord.id, True)], GameAssetRecord.account_id == ACCOUNT_ID),
+    )
+    db = SessionLocal()
+    try:
+        for url, order, condition in cases:
+            model = order[-1][0].class_
+            query = db.query(model)
+            if condition is not None:
+                query = query.filter(condition)
+            # 上一页最后一行，即客户端翻到该页时手中的游标
+            previous = query.order_by(
+                *[column.desc() if descending else column.asc() for column, descending in order]
+            ).offset(skip - 1).first()
+            cursor = encode_cursor(previous, order)
+
+            by_offset = client.get(url, params={"skip": skip, "limit": args.limit})
+            by_cursor = client.get(url, params={"cursor": cursor, "limit": args.limit})
+            assert [row["id"] for row in by_offset.json()] == [row["id"] for row in by_cursor.json()]
+            assert by_cursor.headers.get(NEXT_CURSOR_HEADER)
+
+            offset_samples = measure(lambda: client.get(url, params={"skip": skip, "limit": args.limit}), args.repeat)
+            cursor_samples = measure(lambda: client.get(url, params={"cursor": cursor, "limit": args.limit}), args.repeat)
+            print(url)
+            print(f"  skip={skip:<9} {format_ms(offset_samples)}")
+            print(f"  cursor         {format_ms(cursor_samples)}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
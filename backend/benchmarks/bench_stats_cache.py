@@ -0,0 +1,112 @@
+"""
+统计接口响应缓存基准测试
+
+造 --rows 条任务执行记录并完成汇总后，模拟 --clients 个同时打开的管理后台，
+每轮并发请求 /statistics/dashboard、/terminals、/tasks，共 --rounds 轮，对比：
+  - 不缓存：每个请求都执行聚合查询
+  - 缓存：ttl 内直接命中，未命中时同一接口只计算一次（single-flight）
+  - 过期后返回旧值：ttl 短于轮询间隔，请求返回旧值并在后台刷新（stale-while-revalidate）
+
+    python -m benchmarks.bench_stats_cache
+    python -m benchmarks.bench_stats_cache --rows 1000000 --clients 100
+"""
+import asyncio
+import statistics
+import time
+from datetime import datetime, timedelta
+from benchmarks.common import build_parser, configure_database
+
+ENDPOINTS = ("dashboard", "terminals", "tasks")
+
+
+async def poll(app, clients: int, rounds: int, interval: float) -> list:
+    """每轮 clients 个客户端同时请求全部统计接口，返回每个请求的耗时"""
+    import httpx
+
+    latencies = []
+
+    async def fetch(client, endpoint):
+        start = time.perf_counter()
+        response = await client.get(f"/api/v1/statistics/{endpoint}")
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        for index in range(rounds):
+            if index:
+                await asyncio.sleep(interval)
+            await asyncio.gather(*(fetch(client, endpoint) for _ in range(clients) for endpoint in ENDPOINTS))
+    return latencies
+
+
+def main():
+    parser = build_parser(__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--clients", type=int, default=50, help="同时轮询的管理后台数")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--interval", type=float, default=1.0, help="轮询间隔（秒）")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    print(f"database: {configure_database(args.database_url)}")
+
+    from app.api.deps import get_current_user
+    from app.api.endpoints import stats as stats_endpoints
+    from app.core.cache import MemoryCacheBackend, ResponseCache
+    from app.core.database import SessionLocal
+    from app.services.rollup_service import ROLLUP_SOURCES, RollupService
+    from benchmarks.bench_stats_rollups import seed
+    from main import app
+
+    start = time.perf_counter()
+    seed(args.rows, args.days, 50, 1000, args.seed)
+    db = SessionLocal()
+    try:
+        executions = [source for source in ROLLUP_SOURCES if source.name == "task_executions"]
+        RollupService.run_sources(db, executions, now=datetime.utcnow() + timedelta(hours=1))
+    finally:
+        db.close()
+    print(f"seeded and rolled up {args.rows:,} executions in {time.perf_counter() - start:.1f}s")
+
+    app.dependency_overrides[get_current_user] = lambda: None
+    modes = (
+        ("no cache", 0, 0),
+        ("cache ttl=15s", 15, 60),
+        # ttl 短于轮询间隔，第一轮之后的请求都落在过期窗口内
+        (f"stale (ttl={args.interval / 2:g}s)", args.interval / 2, 60),
+    )
+    requests = args.clients * len(ENDPOINTS) * args.rounds
+    print(f"{args.clients} clients x {len(ENDPOINTS)} endpoints x {args.rounds} rounds = {requests} requests")
+    for label, ttl, stale in modes:
+        cache = ResponseCache(MemoryCacheBackend(256), ttl=ttl, stale=stale)
+        stats_endpoints.stats_cache = cache
+        computed = 0
+
+        def counting(original):
+            def compute(db):
+                nonlocal computed
+                computed += 1
+                return original(db)
+            return compute
+
+        originals = {name: getattr(stats_endpoints, name) for name in ("_dashboard_stats", "_terminal_stats", "_task_stats")}
+        for name, original in originals.items():
+            setattr(stats_endpoints, name, counting(original))
+        try:
+            latencies = asyncio.run(poll(app, args.clients, args.rounds, args.interval))
+        finally:
+            for name, original in originals.items():
+                setattr(stats_endpoints, name, original)
+        latencies.sort()
+        result = cache.stats()
+        print(
+            f"{label:<20} recomputes={computed:>5} hit_ratio={result['hit_ratio']:.3f} "
+            f"p50={statistics.median(latencies) * 1000:.1f}ms "
+            f"p95={latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f}ms "
+            f"max={latencies[-1] * 1000:.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
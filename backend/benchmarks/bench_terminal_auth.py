@@ -0,0 +1,128 @@
+"""
+终端上报认证基准测试
+
+对比终端上报接口的三种认证方式：
+  - basic（冷）：用户名密码Basic认证，每次都做bcrypt校验（清空凭据缓存）
+  - basic（缓存）：Basic认证命中凭据校验缓存
+  - signed：终端API密钥HMAC请求签名
+分别测量认证本身的耗时（--calls 次，bcrypt按 --bcrypt-calls 次）以及
+/assets-report 接口的请求延迟（各 --requests 次）。
+
+    python -m benchmarks.bench_terminal_auth
+    python -m benchmarks.bench_terminal_auth --requests 500
+"""
+import base64
+import json
+import os
+import statistics
+import time
+from benchmarks.common import build_parser, configure_database, reset_schema
+
+USERNAME = "bench"
+PASSWORD = "bench-password"
+TERMINAL_ID = "BENCH-TERMINAL"
+
+
+def seed() -> dict:
+    from app.core.database import SessionLocal
+    from app.core.security import get_password_hash
+    from app.models.game_account import GameAccount
+    from app.models.terminal import Terminal
+    from app.models.user import User
+    from app.services.terminal_key_service import TerminalKeyService
+
+    reset_schema()
+    db = SessionLocal()
+    try:
+        db.add(User(username=USERNAME, password_hash=get_password_hash(PASSWORD)))
+        db.add(Terminal(terminal_id=TERMINAL_ID, name="bench", status="online"))
+        db.add(GameAccount(account_id="bench-char"))
+        api_key = TerminalKeyService.issue(db, TERMINAL_ID)
+        db.commit()
+        return api_key
+    finally:
+        db.close()
+
+
+def timed(fn, repeat: int) -> list:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def report(label: str, samples: list) -> None:
+    print(f"  {label:<16} mean={statistics.mean(samples) * 1e6:>10.1f}us "
+          f"median={statistics.median(samples) * 1e6:>10.1f}us  n={len(samples)}")
+
+
+def main():
+    parser = build_parser(__doc__)
+    parser.add_argument("--calls", type=int, default=10000)
+    parser.add_argument("--bcrypt-calls", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    print(f"database: {configure_database(args.database_url)}")
+    os.environ.setdefault("TERMINAL_KEY_MASTER", "bench-terminal-key-master")
+
+    from fastapi.testclient import TestClient
+    from app.core.credential_cache import credential_cache
+    from app.core.database import SessionLocal
+    from app.core.security import get_password_hash, verify_password
+    from app.services.terminal_key_service import TerminalKeyService
+    from main import app
+
+    api_key = seed()
+    path = f"/open-api/v1/terminals/{TERMINAL_ID}/assets-report"
+    body = json.dumps({
+        "terminal_id": 1, "character_id": "bench-char", "gold": 100, "diamond": 10, "energy": 5,
+        "experience": 1000, "level": 10, "vip_level": 1, "report_time": "2026-01-01 00:00:00"
+    }).encode("utf-8")
+    password_hash = get_password_hash(PASSWORD)
+
+    def signed_headers() -> dict:
+        timestamp = str(int(time.time()))
+        return {
+            "Content-Type": "application/json",
+            "X-Terminal-Key-Id": api_key["key_id"],
+            "X-Timestamp": timestamp,
+            "X-Signature": TerminalKeyService.sign(api_key["secret"], "POST", path, timestamp, body),
+        }
+
+    basic_headers = {
+        "Content-Type": "application/json",
+        "Authorization": "Basic " + base64.b64encode(f"{USERNAME}:{PASSWORD}".encode()).decode(),
+    }
+
+    print("verification only")
+    report("bcrypt", timed(lambda: verify_password(PASSWORD, password_hash), args.bcrypt_calls))
+    credential_cache.remember(USERNAME, PASSWORD, password_hash)
+    report("credential cache", timed(lambda: credential_cache.is_verified(USERNAME, PASSWORD, password_hash),
+                                     args.calls))
+    db = SessionLocal()
+    try:
+        headers = signed_headers()
+        report("hmac signature", timed(lambda: TerminalKeyService.verify(
+            db, TERMINAL_ID, api_key["key_id"], headers["X-Timestamp"], headers["X-Signature"], "POST", path, body
+        ), args.calls))
+    finally:
+        db.close()
+
+    client = TestClient(app)
+
+    def basic_cold():
+        credential_cache.clear()
+        client.post(path, content=body, headers=basic_headers).raise_for_status()
+
+    print(f"endpoint {path}")
+    report("basic (cold)", timed(basic_cold, min(args.requests, args.bcrypt_calls * 5)))
+    report("basic (cached)", timed(lambda: client.post(path, content=body, headers=basic_headers).raise_for_status(),
+                                   args.requests))
+    report("signed", timed(lambda: client.post(path, content=body, headers=signed_headers()).raise_for_status(),
+                           args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+GET /terminals 在线状态计算基准测试
+
+对比逐终端三次查询的旧实现、整页集合查询上报记录表与读取内存在线状态注册表三种实现，
+以及按心跳时间查询与读取注册表统计在线终端数量，分别在100、1000、10000个终端规模下测量延迟。
+
+    python -m benchmarks.bench_terminal_presence [--sizes 100 1000 10000]
+"""
+from datetime import datetime, timedelta
+from benchmarks.common import build_parser, configure_database, reset_schema, measure, format_ms
+
+
+def legacy_refresh(db, terminals):
+    """旧实现：每个终端三次查询并逐行写回"""
+    from app.models.game_account import GameAssetRecord, GameInventoryRecord, GameLoginRecord
+
+    five_minutes_ago = datetime.utcnow() - timedelta(minutes=5)
+    for terminal in terminals:
+        latest_time = None
+        for model in (GameLoginRecord, GameAssetRecord, GameInventoryRecord):
+            record = db.query(model).filter(
+                model.terminal_id == terminal.terminal_id,
+                model.created_at >= five_minutes_ago
+            ).first()
+            if record and (not latest_time or record.created_at > latest_time):
+                latest_time = record.created_at
+        if latest_time:
+            terminal.status = "online"
+            if terminal.last_heartbeat != latest_time:
+                terminal.last_heartbeat = latest_time
+        else:
+            terminal.status = "offline"
+    db.commit()
+    return terminals
+
+
+def set_based_refresh(db, terminals):
+    """整页集合查询：每张上报记录表按终端分组取最新入库时间，合并后一次批量UPDATE写回状态变化"""
+    from sqlalchemy import func, select, union_all, update
+    from sqlalchemy.orm.attributes import set_committed_value
+    from app.models.game_account import GameAssetRecord, GameInventoryRecord, GameInventoryState, GameLoginRecord
+    from app.models.terminal import Terminal, TerminalStatus
+
+    since = datetime.utcnow() - timedelta(minutes=5)
+    terminal_ids = [terminal.terminal_id for terminal in terminals]
+    # 增量背包存储在背包未变化时不写记录，以背包状态表的更新时间代替
+    sources = (
+        (GameLoginRecord.terminal_id, GameLoginRecord.created_at),
+        (GameAssetRecord.terminal_id, GameAssetRecord.created_at),
+        (GameInventoryRecord.terminal_id, GameInventoryRecord.created_at),
+        (GameInventoryState.terminal_id, GameInventoryState.updated_at),
+    )
+    reports = union_all(*(
+        select(terminal_column.label("terminal_id"), func.max(time_column).label("latest_time"))
+        .where(terminal_column.in_(terminal_ids), time_column >= since)
+        .group_by(terminal_column)
+        for terminal_column, time_column in sources
+    )).subquery()
+    latest_times = dict(db.execute(
+        select(reports.c.terminal_id, func.max(reports.c.latest_time)).group_by(reports.c.terminal_id)
+    ).all())
+
+    changes = []
+    for terminal in terminals:
+        latest_time = latest_times.get(terminal.terminal_id)
+        status = TerminalStatus.online if latest_time else TerminalStatus.offline
+        heartbeat = latest_time or terminal.last_heartbeat
+        if terminal.status != status or terminal.last_heartbeat != heartbeat:
+            changes.append({"id": terminal.id, "status": status, "last_heartbeat": heartbeat})
+            # 同步内存中的对象，避免ORM再逐行产生UPDATE
+            set_committed_value(terminal, "status", status)
+            set_committed_value(terminal, "last_heartbeat", heartbeat)
+    if changes:
+        db.execute(update(Terminal), changes)
+    db.commit()
+    return terminals
+
+
+def seed(size: int):
+    from app.core.database import SessionLocal
+    from app.models.terminal import Terminal
+    from app.models.game_account import GameAssetRecord, GameLoginRecord
+
+    reset_schema()
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        # 近期有上报的终端同时有最近的心跳时间，注册表启动时据此加载
+        db.bulk_insert_mappings(Terminal, [
+            {"terminal_id": f"T{i:06d}", "name": f"Terminal-{i}", "status": "online" if i % 2 == 0 else "offline",
+             "last_heartbeat": now - timedelta(minutes=1 if i % 2 == 0 else 30)}
+            for i in range(size)
+        ])
+        # 一半终端近期有上报，另一半只有过期记录
+        db.bulk_insert_mappings(GameLoginRecord, [
+            {"terminal_id": f"T{i:06d}", "created_at": now - timedelta(minutes=1 if i % 2 == 0 else 30)}
+            for i in range(size)
+        ])
+        db.bulk_insert_mappings(GameAssetRecord, [
+            {"terminal_id": f"T{i:06d}", "created_at": now - timedelta(minutes=2 if i % 2 == 0 else 40)}
+            for i in range(size)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+def main():
+    parser = build_parser(__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    print(f"database: {configure_database(args.database_url)}")
+
+    from fastapi import Depends
+    from fastapi.testclient import TestClient
+    from app.api.deps import get_current_user
+    from app.core.database import SessionLocal, get_db
+    from app.models.terminal import Terminal
+    from app.services.presence_service import presence_registry
+    from main import app
+
+    @app.get("/bench/legacy-terminals")
+    def legacy_terminals(limit: int = 100, db=Depends(get_db)):
+        terminals = db.query(Terminal).limit(limit).all()
+        legacy_refresh(db, terminals)
+        return [terminal.id for terminal in terminals]
+
+    @app.get("/bench/set-based-terminals")
+    def set_based_terminals(limit: int = 100, db=Depends(get_db)):
+        terminals = db.query(Terminal).limit(limit).all()
+        set_based_refresh(db, terminals)
+        return [terminal.id for terminal in terminals]
+
+    app.dependency_overrides[get_current_user] = lambda: None
+    client = TestClient(app)
+
+    def count_by_heartbeat():
+        db = SessionLocal()
+        try:
+            return db.query(Terminal).filter(
+                Terminal.status == "online",
+                Terminal.last_heartbeat >= datetime.utcnow() - timedelta(minutes=5)
+            ).count()
+        finally:
+            db.close()
+
+    for size in args.sizes:
+        seed(size)
+        presence_registry.clear()
+        for label, url in (
+            ("legacy", f"/bench/legacy-terminals?limit={size}"),
+            ("set-based", f"/bench/set-based-terminals?limit={size}"),
+            ("registry", f"/api/v1/terminals/?limit={size}"),
+        ):
+            samples = measure(lambda: client.get(url).raise_for_status(), args.repeat)
+            print(f"terminals={size:<6} {label:<10} {format_ms(samples)}")
+        assert count_by_heartbeat() == presence_registry.count() == (size + 1) // 2
+        samples = measure(count_by_heartbeat, args.repeat)
+        print(f"terminals={size:<6} {'online count (heartbeat query)':<32} {format_ms(samples)}")
+        samples = measure(presence_registry.count, args.repeat)
+        print(f"terminals={size:<6} {'online count (registry)':<32} {format_ms(samples)}")
+
+
+if __name__ == "__main__":
+    main()
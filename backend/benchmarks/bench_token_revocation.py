@@ -0,0 +1,96 @@
+"""
+访问令牌吊销检查基准测试
+
+造 --revoked 条未过期的吊销记录，测量每次请求检查令牌是否已吊销的开销（各 --calls 次，一半命中吊销）：
+  - db：每次按jti查询 revoked_tokens 表（逐请求查库的做法）
+  - memory：查进程内吊销集合（get_current_user 的做法）
+并测量启动时加载全部吊销记录、以及后台同步无新增记录时一次轮询的耗时。
+
+    python -m benchmarks.bench_token_revocation
+    python -m benchmarks.bench_token_revocation --revoked 100000 --calls 50000
+"""
+import random
+import secrets
+import statistics
+import time
+from datetime import datetime, timedelta
+from benchmarks.common import build_parser, configure_database, format_ms, measure, reset_schema
+
+
+def seed(revoked: int) -> list:
+    from sqlalchemy import insert
+    from app.core.database import SessionLocal
+    from app.models.session import RevokedToken
+
+    reset_schema()
+    expires_at = datetime.utcnow() + timedelta(days=1)
+    jtis = [secrets.token_hex(16) for _ in range(revoked)]
+    db = SessionLocal()
+    try:
+        db.execute(insert(RevokedToken), [
+            {"jti": jti, "username": f"user{index % 100}", "expires_at": expires_at}
+            for index, jti in enumerate(jtis)
+        ])
+        db.commit()
+    finally:
+        db.close()
+    return jtis
+
+
+def report(label: str, samples: list) -> None:
+    print(f"  {label:<8} mean={statistics.mean(samples) * 1e6:>8.2f}us "
+          f"median={statistics.median(samples) * 1e6:>8.2f}us "
+          f"p99={sorted(samples)[int(len(samples) * 0.99)] * 1e6:>8.2f}us  n={len(samples)}")
+
+
+def main():
+    parser = build_parser(__doc__)
+    parser.add_argument("--revoked", type=int, default=10000)
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    print(f"database: {configure_database(args.database_url)}")
+
+    from app.core.database import SessionLocal
+    from app.models.session import RevokedToken
+    from app.services.token_revocation_service import TokenRevocationList
+
+    jtis = seed(args.revoked)
+    rng = random.Random(args.seed)
+    # 一半为已吊销令牌，一半为正常令牌
+    probes = [rng.choice(jtis) if index % 2 else secrets.token_hex(16) for index in range(args.calls)]
+    revocations = TokenRevocationList(interval_seconds=5)
+
+    def load():
+        revocations.clear()
+        db = SessionLocal()
+        try:
+            revocations.sync(db)
+        finally:
+            db.close()
+
+    print(f"{args.revoked:,} revoked tokens")
+    print(f"  load all: {format_ms(measure(load))}")
+    print(f"  sync (no new rows): {format_ms(measure(revocations.run_once, repeat=20))}")
+
+    def db_check(jti: str) -> bool:
+        db = SessionLocal()
+        try:
+            return db.query(RevokedToken.id).filter(RevokedToken.jti == jti).first() is not None
+        finally:
+            db.close()
+
+    print(f"per-request check: {args.calls:,} calls")
+    for label, check in (("db", db_check), ("memory", revocations.is_revoked)):
+        samples, hits = [], 0
+        for jti in probes:
+            start = time.perf_counter()
+            hits += check(jti)
+            samples.append(time.perf_counter() - start)
+        report(label, samples)
+        assert hits == args.calls // 2, hits
+    print(f"list: {revocations.stats()}")
+
+
+if __name__ == "__main__":
+    main()
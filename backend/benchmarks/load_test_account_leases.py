@@ -0,0 +1,186 @@
+"""
+账号租约分配并发测试
+
+造 --accounts 个空闲账号（平均分布在 --regions 个区域）和 --terminals 个终端，每个终端同时请求一次账号：
+  legacy   - 迁移前的做法：查询第一个未绑定账号后返回，不加锁也不绑定
+  endpoint - 同时发起 --terminals 个 POST /account-lease 请求（进程内ASGI传输）
+  threads  - --threads 个线程各自使用独立数据库会话，同时调用分配器共 --terminals 次；
+             线程轮流使用 --workers 个相互独立的分配器，模拟多个进程各自的空闲账号队列
+检查同一账号是否被分配给多个终端、每个终端是否只拿到一个账号，并统计每秒分配数；
+endpoint、threads 出现重复分配或一个终端绑定多个账号时以非零状态退出（legacy 只作对照）。
+
+    python -m benchmarks.load_test_account_leases
+    python -m benchmarks.load_test_account_leases --terminals 1000 --threads 16 --database-url mysql+pymysql://...
+"""
+import asyncio
+import base64
+import sys
+import threading
+import time
+from collections import Counter
+from benchmarks.common import build_parser, configure_database, reset_schema
+
+USERNAME = "bench"
+PASSWORD = "bench-password"
+
+
+def seed(accounts: int, regions: int, terminals: int) -> list:
+    from sqlalchemy import insert
+    from app.core.database import SessionLocal
+    from app.core.security import get_password_hash
+    from app.models.account_asset import AccountAsset
+    from app.models.terminal import Terminal
+    from app.models.user import User
+
+    reset_schema()
+    db = SessionLocal()
+    try:
+        db.add(User(username=USERNAME, password_hash=get_password_hash(PASSWORD)))
+        db.execute(insert(Terminal), [
+            {"terminal_id": f"T{index:05d}", "name": f"bench-{index}", "status": "online"} for index in range(terminals)
+        ])
+        db.execute(insert(AccountAsset), [
+            {"account": f"acct{index:05d}", "password": "x", "region_code": f"S{index % regions:03d}"}
+            for index in range(accounts)
+        ])
+        db.commit()
+        return [(row.id, row.terminal_id) for row in db.query(Terminal.id, Terminal.terminal_id).order_by(Terminal.id)]
+    finally:
+        db.close()
+
+
+def reset_leases() -> None:
+    from sqlalchemy import update
+    from app.core.database import SessionLocal
+    from app.models.account_asset import AccountAsset
+    from app.services.account_lease_service import account_lease_pool
+
+    db = SessionLocal()
+    try:
+        db.execute(update(AccountAsset).values(terminal_id=None, lease_expires_at=None))
+        db.commit()
+    finally:
+        db.close()
+    account_lease_pool.clear()
+
+
+def check(label: str, allocations: list, elapsed: float) -> bool:
+    """allocations: [(终端主键, 账号ID或None)]，没有重复分配且每个终端最多绑定一个账号时返回True"""
+    from app.core.database import SessionLocal
+    from app.models.account_asset import AccountAsset
+
+    granted = [account_id for _, account_id in allocations if account_id is not None]
+    duplicated = sum(count - 1 for count in Counter(granted).values() if count > 1)
+    db = SessionLocal()
+    try:
+        bound = Counter(terminal_id for (terminal_id,) in db.query(AccountAsset.terminal_id).filter(
+            AccountAsset.terminal_id.isnot(None)
+        ))
+    finally:
+        db.close()
+    multi_bound = sum(1 for count in bound.values() if count > 1)
+    print(f"  {label:<9} {len(granted) / elapsed:>8.1f} allocs/s  granted={len(granted)} "
+          f"distinct={len(set(granted))} duplicated={duplicated} "
+          f"terminals with >1 account={multi_bound}  elapsed={elapsed * 1000:.0f}ms")
+    return not duplicated and not multi_bound
+
+
+def main():
+    parser = build_parser(__doc__)
+    parser.add_argument("--accounts", type=int, default=1200)
+    parser.add_argument("--regions", type=int, default=3)
+    parser.add_argument("--terminals", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=8, help="threads 模式的线程数，应不超过数据库连接池大小")
+    parser.add_argument("--workers", type=int, default=4, help="threads 模式模拟的进程数")
+    args = parser.parse_args()
+    print(f"database: {configure_database(args.database_url)}")
+
+    import httpx
+    from app.core.database import SessionLocal
+    from app.models.account_asset import AccountAsset
+    from app.services.account_lease_service import AccountLeasePool, account_lease_pool
+    from main import app
+
+    terminals = seed(args.accounts, args.regions, args.terminals)
+    regions = [f"S{index % args.regions:03d}" for index in range(len(terminals))]
+    print(f"{args.accounts} accounts in {args.regions} regions, {len(terminals)} terminals requesting concurrently")
+
+    # 迁移前：每个请求查询第一个未绑定账号
+    def legacy(index: int):
+        db = SessionLocal()
+        try:
+            account = db.query(AccountAsset).filter(
+                AccountAsset.terminal_id.is_(None), AccountAsset.region_code == regions[index]
+            ).first()
+            return terminals[index][0], account.id if account else None
+        finally:
+            db.close()
+
+    start = time.perf_counter()
+    check("legacy", [legacy(index) for index in range(len(terminals))], time.perf_counter() - start)
+
+    # 接口：全部请求同时发起
+    headers = {"Authorization": "Basic " + base64.b64encode(f"{USERNAME}:{PASSWORD}".encode()).decode()}
+
+    async def storm() -> list:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver", timeout=None) as client:
+            # 预热凭据校验缓存，避免测量bcrypt
+            (await client.delete(f"/open-api/v1/terminals/{terminals[0][1]}/account-lease",
+                                 headers=headers)).raise_for_status()
+
+            async def request(index: int):
+                terminal_pk, terminal_id = terminals[index]
+                response = await client.post(f"/open-api/v1/terminals/{terminal_id}/account-lease",
+                                             params={"region_code": regions[index]}, headers=headers)
+                return terminal_pk, response.json()["account_asset_id"] if response.status_code == 200 else None
+
+            start = time.perf_counter()
+            results = await asyncio.gather(*(request(index) for index in range(len(terminals))))
+            return results, time.perf_counter() - start
+
+    reset_leases()
+    results, elapsed = asyncio.run(storm())
+    failures = []
+    if not check("endpoint", results, elapsed):
+        failures.append("endpoint")
+
+    # 线程：各线程同时开始，按序号分摊请求
+    reset_leases()
+    pools = [account_lease_pool] + [
+        AccountLeasePool(account_lease_pool.lease.total_seconds(), account_lease_pool.interval,
+                         account_lease_pool.prefetch)
+        for _ in range(args.workers - 1)
+    ]
+    results = [None] * len(terminals)
+    barrier = threading.Barrier(args.threads + 1)
+
+    def worker(offset: int):
+        barrier.wait()
+        for index in range(offset, len(terminals), args.threads):
+            db = SessionLocal()
+            try:
+                pool = pools[offset % len(pools)]
+                account = pool.allocate(db, terminals[index][0], regions[index])
+                results[index] = (terminals[index][0], account.id if account else None)
+            finally:
+                db.close()
+
+    workers = [threading.Thread(target=worker, args=(offset,)) for offset in range(args.threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    if not check("threads", results, time.perf_counter() - start):
+        failures.append("threads")
+    for index, pool in enumerate(pools):
+        print(f"pool {index}: {pool.stats()}")
+    if failures:
+        print(f"FAILED: duplicate or multiple allocations in {', '.join(failures)}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+登录风暴负载测试
+
+--concurrency 个客户端同时发起共 --logins 次登录，期间另一个客户端每隔 --probe-interval 秒请求 /health，
+对比两种bcrypt执行方式下登录吞吐、登录延迟，以及风暴期间其他接口的响应延迟：
+  inline - async def 端点内直接调用bcrypt（迁移前的写法，阻塞事件循环）
+  pool   - /auth/login，bcrypt在密码哈希线程池中执行
+
+在进程内通过ASGI传输发起请求，事件循环阻塞会直接体现在 /health 的延迟上。
+
+    python -m benchmarks.load_test_login
+    python -m benchmarks.load_test_login --logins 400 --concurrency 100 --max-pending 32
+"""
+import asyncio
+import statistics
+import time
+from benchmarks.common import build_parser, configure_database, reset_schema
+
+USERNAME = "bench"
+PASSWORD = "bench-password"
+
+
+def seed() -> None:
+    from app.core.database import SessionLocal
+    from app.core.security import get_password_hash
+    from app.models.user import User
+
+    reset_schema()
+    db = SessionLocal()
+    try:
+        db.add(User(username=USERNAME, password_hash=get_password_hash(PASSWORD)))
+        db.commit()
+    finally:
+        db.close()
+
+
+def percentile(samples: list, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)] if ordered else 0.0
+
+
+async def storm(app, url: str, logins: int, concurrency: int, probe_interval: float) -> dict:
+    import httpx
+
+    login_latencies, probe_latencies = [], []
+    statuses = {}
+    semaphore = asyncio.Semaphore(concurrency)
+    done = asyncio.Event()
+
+    async def login(client):
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post(url, data={"username": USERNAME, "password": PASSWORD})
+            login_latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    async def probe(client):
+        while not done.is_set():
+            start = time.perf_counter()
+            (await client.get("/health")).raise_for_status()
+            probe_latencies.append(time.perf_counter() - start)
+            await asyncio.sleep(probe_interval)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver", timeout=None) as client:
+        prober = asyncio.create_task(probe(client))
+        start = time.perf_counter()
+        await asyncio.gather(*(login(client) for _ in range(logins)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await prober
+    return {"elapsed": elapsed, "logins": login_latencies, "probes": probe_latencies, "statuses": statuses}
+
+
+def main():
+    parser = build_parser(__doc__)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--probe-interval", type=float, default=0.01, help="/health 请求间隔（秒）")
+    parser.add_argument("--max-pending", type=int, default=None, help="密码哈希线程池的最大排队数，默认取配置")
+    args = parser.parse_args()
+    print(f"database: {configure_database(args.database_url)}")
+
+    from fastapi import Depends, HTTPException
+    from fastapi.security import OAuth2PasswordRequestForm
+    from app.core.database import get_db
+    from app.core.password_pool import password_pool
+    from app.core.security import create_access_token, verify_password
+    from app.models.user import User
+    from main import app
+
+    @app.post("/bench/inline-login")
+    async def inline_login(form_data: OAuth2PasswordRequestForm = Depends(), db=Depends(get_db)):
+        user = db.query(User).filter(User.username == form_data.username).first()
+        db.close()
+        if not user or not verify_password(form_data.password, user.password_hash):
+            raise HTTPException(status_code=401)
+        return {"access_token": create_access_token(subject=user.username), "token_type": "bearer"}
+
+    if args.max_pending is not None:
+        password_pool.max_pending = args.max_pending
+    seed()
+    print(f"{args.logins} logins, concurrency {args.concurrency}, "
+          f"pool workers={password_pool.workers} max_pending={password_pool.max_pending}")
+    for label, url in (
+        ("inline", "/bench/inline-login"),
+        ("pool", "/api/v1/auth/login"),
+    ):
+        result = asyncio.run(storm(app, url, args.logins, args.concurrency, args.probe_interval))
+        logins, probes = result["logins"], result["probes"]
+        ok = result["statuses"].get(200, 0)
+        print(f"  {label:<7} {ok / result['elapsed']:>6.1f} logins/s  statuses={result['statuses']}  "
+              f"login p50={statistics.median(logins) * 1000:.0f}ms p95={percentile(logins, 0.95) * 1000:.0f}ms")
+        print(f"  {'':<7} /health during storm: n={len(probes)} p50={statistics.median(probes) * 1000:.1f}ms "
+              f"p99={percentile(probes, 0.99) * 1000:.1f}ms max={max(probes) * 1000:.1f}ms")
+    print(f"pool: {password_pool.stats()}")
+    password_pool.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+开放API上报接口并发负载测试
+
+对比同一份上报逻辑在两种数据库访问方式下的并发吞吐：
+  sync  - async def 端点内直接使用同步Session（迁移前的写法，阻塞事件循环）
+  async - AsyncSession + run_sync（当前 /assets-report 的实现）
+
+默认在进程内通过ASGI传输发起请求；事件循环阻塞的影响随数据库往返延迟放大，
+建议使用 --database-url 指向MySQL测量。
+
+    python -m benchmarks.load_test_reports --requests 2000 --concurrency 50
+"""
+import asyncio
+import base64
+import time
+from benchmarks.common import build_parser, configure_database, reset_schema
+
+USERNAME = "bench"
+PASSWORD = "bench-password"
+TERMINAL_ID = "BENCH-TERMINAL"
+
+
+def seed():
+    from app.core.database import SessionLocal
+    from app.core.security import get_password_hash
+    from app.models.game_account import GameAccount
+    from app.models.terminal import Terminal
+    from app.models.user import User
+
+    reset_schema()
+    db = SessionLocal()
+    try:
+        db.add(User(username=USERNAME, password_hash=get_password_hash(PASSWORD)))
+        db.add(Terminal(terminal_id=TERMINAL_ID, name="bench", status="online"))
+        db.add(GameAccount(account_id="bench-char"))
+        db.commit()
+    finally:
+        db.close()
+
+
+def register_sync_route(app):
+    """注册迁移前写法的对照端点"""
+    from fastapi import Depends
+    from app.api.open_api_deps import verify_user_credentials
+    from app.core.database import get_db
+    from app.models.terminal import Terminal
+    from app.schemas.terminal import AssetsReportData
+    from app.services.report_service import ReportService
+
+    @app.post("/bench/{terminal_id}/assets-report-sync", status_code=201)
+    async def report_assets_sync(
+        terminal_id: str,
+        assets_data: AssetsReportData,
+        db=Depends(get_db),
+        current_user=Depends(verify_user_credentials)
+    ):
+        terminal = db.query(Terminal).filter(Terminal.terminal_id == terminal_id).first()
+        ReportService.save_assets_report(db, terminal, assets_data)
+        db.commit()
+        return {"message": "资产信息上报成功"}
+
+
+async def run_load(client, url: str, total: int, concurrency: int) -> float:
+    headers = {"Authorization": "Basic " + base64.b64encode(f"{USERNAME}:{PASSWORD}".encode()).decode()}
+    payload = {
+        "terminal_id": 1, "gold": 100, "diamond": 10, "energy": 5, "experience": 1000,
+        "level": 10, "vip_level": 1, "report_time": "2025-01-01T00:00:00", "character_id": "bench-char"
+    }
+    queue: asyncio.Queue = asyncio.Queue()
+    for _ in range(total):
+        queue.put_nowait(None)
+
+    async def worker():
+        while not queue.empty():
+            queue.get_nowait()
+            response = await client.post(url, json=payload, headers=headers)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start
+
+
+async def main_async(args):
+    import httpx
+
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=60)
+        targets = [("server", f"/open-api/v1/terminals/{TERMINAL_ID}/assets-report")]
+    else:
+        from main import app
+        register_sync_route(app)
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+        targets = [
+            ("sync", f"/bench/{TERMINAL_ID}/assets-report-sync"),
+            ("async", f"/open-api/v1/terminals/{TERMINAL_ID}/assets-report"),
+        ]
+
+    async with client:
+        for label, url in targets:
+            # 预热：建立连接池并填充凭据缓存
+            await run_load(client, url, args.concurrency, args.concurrency)
+            elapsed = await run_load(client, url, args.requests, args.concurrency)
+            print(f"{label:<7} requests={args.requests} concurrency={args.concurrency} "
+                  f"elapsed={elapsed:.2f}s throughput={args.requests / elapsed:.1f} req/s")
+
+
+def main():
+    parser = build_parser(__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--base-url", default=None, help="压测已运行的服务，例如 http://localhost:8002（需提前准备测试数据）")
+    args = parser.parse_args()
+    print(f"database: {configure_database(args.database_url)}")
+    if not args.base_url:
+        seed()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
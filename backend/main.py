@@ -6,6 +6,15 @@ from fastapi.responses import JSONResponse
 from app.api.router import api_router
 from app.api.open_api_router import open_api_router
 from app.core.config import settings
+from app.core.password_pool import PasswordPoolBusy, password_pool
+from app.services.account_lease_service import account_lease_pool
+from app.services.ingest_queue import report_queue
+from app.services.partition_service import partition_scheduler
+from app.services.presence_service import presence_registry
+from app.services.retention_service import retention_scheduler
+from app.services.rollup_service import rollup_scheduler
+from app.services.token_revocation_service import token_revocations
+from app.utils.pagination import NEXT_CURSOR_HEADER
 
 # 配置日志
 log_dir = "logs"
@@ -35,6 +44,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # 前端需读取分页游标响应头
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # 添加UTF-8编码中间件
@@ -45,12 +56,42 @@ async def add_charset_header(request, call_next):
         response.headers["content-type"] = "application/json; charset=utf-8"
     return response
 
+# 密码哈希线程池排队已满时返回503，客户端稍后重试
+@app.exception_handler(PasswordPoolBusy)
+async def password_pool_busy_handler(request, exc):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "认证请求过多，请稍后重试"},
+        headers={"Retry-After": "1"}
+    )
+
 # 包含API路由
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 # 包含开放API路由（无需认证）
 app.include_router(open_api_router, prefix="/open-api/v1")
 
+@app.on_event("startup")
+async def start_background_workers():
+    report_queue.start()
+    token_revocations.start()
+    presence_registry.start()
+    partition_scheduler.start()
+    retention_scheduler.start()
+    rollup_scheduler.start()
+    account_lease_pool.start()
+
+@app.on_event("shutdown")
+async def stop_background_workers():
+    account_lease_pool.stop()
+    rollup_scheduler.stop()
+    retention_scheduler.stop()
+    partition_scheduler.stop()
+    presence_registry.stop()
+    token_revocations.stop()
+    report_queue.stop()
+    password_pool.stop()
+
 @app.get("/")
 async def root():
     return {"message": "游戏脚本中间件管理系统 API"}
@@ -0,0 +1,13 @@
+-- 账号租约分配：终端请求账号时按区域领取空闲账号并设置租约，到期未续期自动回收
+USE wlweb_game_middleware;
+
+-- 租约到期时间，为空表示管理员手动绑定的长期绑定
+ALTER TABLE account_assets
+    ADD COLUMN lease_expires_at TIMESTAMP NULL COMMENT '租约到期时间，为空表示长期绑定' AFTER terminal_id;
+
+-- 按区域查找空闲账号（terminal_id IS NULL）、按到期时间回收租约
+CREATE INDEX idx_account_assets_region_terminal ON account_assets (region_code, terminal_id);
+CREATE INDEX idx_account_assets_lease_expires ON account_assets (lease_expires_at);
+
+-- 验证表结构
+DESCRIBE account_assets;
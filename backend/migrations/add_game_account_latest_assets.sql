@@ -0,0 +1,37 @@
+-- 新增游戏账户最新资产快照表，并从历史资产记录回填
+USE wlweb_game_middleware;
+
+-- 游戏账户最新资产快照表（每个账户一行，资产上报时upsert）
+CREATE TABLE game_account_latest_assets (
+    account_id VARCHAR(100) PRIMARY KEY COMMENT '账户ID',
+    record_id INT NOT NULL COMMENT '对应的资产记录ID',
+    terminal_id VARCHAR(100) NOT NULL COMMENT '终端设备ID',
+    region_code VARCHAR(20) COMMENT '区域编码',
+    gold BIGINT COMMENT '金子数量',
+    diamond BIGINT COMMENT '元宝/钻石数量',
+    energy INT COMMENT '体力值',
+    experience BIGINT COMMENT '经验值',
+    level INT COMMENT '等级',
+    vip_level INT COMMENT 'VIP等级',
+    report_time TIMESTAMP NULL COMMENT '上报时间',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '快照更新时间',
+    FOREIGN KEY (account_id) REFERENCES game_accounts(account_id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='游戏账户最新资产快照表';
+
+-- 回填：每个账户取report_time最新的一条资产记录（同一时间取id最大者）
+INSERT INTO game_account_latest_assets (
+    account_id, record_id, terminal_id, region_code, gold, diamond, energy,
+    experience, level, vip_level, report_time, updated_at
+)
+SELECT account_id, id, terminal_id, region_code, gold, diamond, energy,
+       experience, level, vip_level, report_time, created_at
+FROM (
+    SELECT r.*,
+           ROW_NUMBER() OVER (PARTITION BY account_id ORDER BY report_time DESC, id DESC) AS rn
+    FROM game_asset_records r
+) ranked
+WHERE rn = 1
+ON DUPLICATE KEY UPDATE record_id = record_id;
+
+-- 验证回填结果
+SELECT COUNT(*) AS snapshot_rows FROM game_account_latest_assets;
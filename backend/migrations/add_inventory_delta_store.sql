@@ -0,0 +1,86 @@
+-- 新增增量背包存储表，并以每个账户最近一次背包快照初始化当前背包
+USE wlweb_game_middleware;
+
+-- 游戏账户背包状态表（增量背包存储，每个账户一行）
+CREATE TABLE game_inventory_states (
+    account_id VARCHAR(100) PRIMARY KEY COMMENT '账户ID',
+    terminal_id VARCHAR(100) NOT NULL COMMENT '最近上报的终端设备ID',
+    region_code VARCHAR(20) COMMENT '区域编码',
+    item_count INT NOT NULL DEFAULT 0 COMMENT '当前物品种类数',
+    report_time TIMESTAMP NULL COMMENT '最近上报时间',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '状态更新时间',
+    INDEX idx_terminal_id (terminal_id),
+    FOREIGN KEY (account_id) REFERENCES game_accounts(account_id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='游戏账户背包状态表';
+
+-- 游戏账户当前背包物品表（每个账户每种物品一行）
+CREATE TABLE game_inventory_items (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    account_id VARCHAR(100) NOT NULL COMMENT '账户ID',
+    item_id VARCHAR(100) NOT NULL COMMENT '物品ID',
+    item_name VARCHAR(200) NOT NULL COMMENT '物品名称',
+    item_type VARCHAR(50) NOT NULL COMMENT '物品类型',
+    quantity INT NOT NULL COMMENT '数量',
+    quality VARCHAR(50) COMMENT '品质',
+    description TEXT COMMENT '描述',
+    updated_at TIMESTAMP NULL COMMENT '最后变化的上报时间',
+    UNIQUE KEY uq_inventory_item_account_item (account_id, item_id),
+    FOREIGN KEY (account_id) REFERENCES game_accounts(account_id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='游戏账户当前背包物品表';
+
+-- 游戏背包变化记录表（仅在上报与当前背包不同时追加）
+CREATE TABLE game_inventory_changes (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    account_id VARCHAR(100) NOT NULL COMMENT '账户ID',
+    terminal_id VARCHAR(100) NOT NULL COMMENT '终端设备ID',
+    item_id VARCHAR(100) NOT NULL COMMENT '物品ID',
+    item_name VARCHAR(200) NOT NULL COMMENT '物品名称',
+    item_type VARCHAR(50) NOT NULL COMMENT '物品类型',
+    quality VARCHAR(50) COMMENT '品质',
+    description TEXT COMMENT '描述',
+    change_type VARCHAR(20) NOT NULL COMMENT '变化类型：added/removed/changed',
+    quantity_delta INT NOT NULL COMMENT '数量变化',
+    quantity_after INT NOT NULL COMMENT '变化后数量',
+    report_time TIMESTAMP NOT NULL COMMENT '上报时间',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_inventory_change_account_time (account_id, report_time),
+    FOREIGN KEY (account_id) REFERENCES game_accounts(account_id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='游戏背包变化记录表';
+
+-- 每个账户最近一次快照上报的时间
+CREATE TEMPORARY TABLE tmp_latest_inventory AS
+SELECT account_id, MAX(report_time) AS report_time
+FROM game_inventory_records
+WHERE account_id IS NOT NULL AND report_time IS NOT NULL
+GROUP BY account_id;
+
+-- 初始化当前背包（同一快照中重复的物品合并数量）
+INSERT INTO game_inventory_items (account_id, item_id, item_name, item_type, quantity, quality, description, updated_at)
+SELECT r.account_id, r.item_id, MAX(r.item_name), MAX(r.item_type), SUM(r.quantity),
+       MAX(r.quality), MAX(r.description), r.report_time
+FROM game_inventory_records r
+JOIN tmp_latest_inventory l ON l.account_id = r.account_id AND l.report_time = r.report_time
+GROUP BY r.account_id, r.item_id, r.report_time;
+
+-- 为初始背包写入added变化记录，使按时间重建背包时包含这些物品
+INSERT INTO game_inventory_changes (
+    account_id, terminal_id, item_id, item_name, item_type, quality, description,
+    change_type, quantity_delta, quantity_after, report_time
+)
+SELECT r.account_id, MAX(r.terminal_id), r.item_id, MAX(r.item_name), MAX(r.item_type),
+       MAX(r.quality), MAX(r.description), 'added', SUM(r.quantity), SUM(r.quantity), r.report_time
+FROM game_inventory_records r
+JOIN tmp_latest_inventory l ON l.account_id = r.account_id AND l.report_time = r.report_time
+GROUP BY r.account_id, r.item_id, r.report_time;
+
+INSERT INTO game_inventory_states (account_id, terminal_id, region_code, item_count, report_time, updated_at)
+SELECT r.account_id, MAX(r.terminal_id), MAX(r.region_code), COUNT(DISTINCT r.item_id), r.report_time, NOW()
+FROM game_inventory_records r
+JOIN tmp_latest_inventory l ON l.account_id = r.account_id AND l.report_time = r.report_time
+GROUP BY r.account_id, r.report_time;
+
+DROP TEMPORARY TABLE tmp_latest_inventory;
+
+-- 验证初始化结果
+SELECT COUNT(*) AS states FROM game_inventory_states;
+SELECT COUNT(*) AS items FROM game_inventory_items;
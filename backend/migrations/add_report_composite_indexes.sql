@@ -0,0 +1,52 @@
+-- 为上报相关表添加与查询路径匹配的组合索引，并移除被组合索引覆盖的单列索引
+-- 依赖 partition_report_tables.sql 已移除这些表的外键（外键列需要索引）
+-- 在线添加索引：ALGORITHM=INPLACE, LOCK=NONE 期间不阻塞读写
+USE wlweb_game_middleware;
+
+-- 资产记录：按账户查询按上报时间排序；在线判断按终端和入库时间
+ALTER TABLE game_asset_records
+    ADD INDEX idx_asset_account_report_time (account_id, report_time),
+    ADD INDEX idx_asset_terminal_created (terminal_id, created_at),
+    ALGORITHM=INPLACE, LOCK=NONE;
+ALTER TABLE game_asset_records
+    DROP INDEX idx_account_id,
+    DROP INDEX idx_terminal_id;
+
+-- 背包记录
+ALTER TABLE game_inventory_records
+    ADD INDEX idx_inventory_account_report_time (account_id, report_time),
+    ADD INDEX idx_inventory_terminal_created (terminal_id, created_at),
+    ALGORITHM=INPLACE, LOCK=NONE;
+ALTER TABLE game_inventory_records
+    DROP INDEX idx_account_id,
+    DROP INDEX idx_terminal_id;
+
+-- 登录记录：按账户查询按登录时间排序
+ALTER TABLE game_login_records
+    ADD INDEX idx_login_account_login_time (account_id, login_time),
+    ADD INDEX idx_login_terminal_created (terminal_id, created_at),
+    ALGORITHM=INPLACE, LOCK=NONE;
+ALTER TABLE game_login_records
+    DROP INDEX idx_account_id,
+    DROP INDEX idx_terminal_id;
+
+-- 终端数据：按终端（及数据类型）查询按时间倒序
+ALTER TABLE terminal_data
+    ADD INDEX idx_terminal_data_terminal_type_created (terminal_id, data_type, created_at),
+    ADD INDEX idx_terminal_data_terminal_created (terminal_id, created_at),
+    ALGORITHM=INPLACE, LOCK=NONE;
+ALTER TABLE terminal_data
+    DROP INDEX idx_terminal_id,
+    DROP INDEX idx_data_type;
+
+-- 游戏账户列表按更新时间倒序
+ALTER TABLE game_accounts ADD INDEX idx_game_accounts_updated_at (updated_at), ALGORITHM=INPLACE, LOCK=NONE;
+
+-- 入库时间索引与模型同名（SQLite中索引名全库唯一，模型按表加前缀），只修改元数据
+ALTER TABLE game_asset_records RENAME INDEX idx_created_at TO idx_asset_created_at;
+ALTER TABLE game_inventory_records RENAME INDEX idx_created_at TO idx_inventory_created_at;
+ALTER TABLE game_login_records RENAME INDEX idx_created_at TO idx_login_created_at;
+
+-- 验证索引
+SHOW INDEX FROM game_asset_records;
+SHOW INDEX FROM terminal_data;
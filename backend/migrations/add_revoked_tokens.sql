@@ -0,0 +1,18 @@
+-- 以令牌吊销列表取代用户会话表：登录不再写会话记录，登出时按令牌ID（jti）吊销访问令牌
+USE wlweb_game_middleware;
+
+-- 吊销记录在令牌过期后由保留清理删除
+CREATE TABLE revoked_tokens (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    jti VARCHAR(64) UNIQUE NOT NULL COMMENT '令牌ID',
+    username VARCHAR(50) NULL COMMENT '令牌主体',
+    expires_at TIMESTAMP NOT NULL COMMENT '令牌过期时间',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_revoked_tokens_expires (expires_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='访问令牌吊销表';
+
+-- 用户会话表不再使用
+DROP TABLE IF EXISTS user_sessions;
+
+-- 验证表结构
+DESCRIBE revoked_tokens;
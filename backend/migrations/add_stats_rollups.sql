@@ -0,0 +1,72 @@
+-- 新增统计汇总表，/statistics 接口改为读取汇总表
+-- 汇总由后台任务按水位（system_configs 中的 rollup_watermark.* 配置）增量维护，
+-- 首次运行时从各源表最早的数据开始汇总全部历史
+USE wlweb_game_middleware;
+
+-- 任务执行按小时/天汇总表（仅统计已结束的执行，由 RollupService 按水位增量维护）
+-- dimension: total 为全部执行（dimension_id=0），task/terminal 按任务ID/终端主键ID分组且只按天汇总
+CREATE TABLE task_execution_rollups (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    granularity VARCHAR(10) NOT NULL COMMENT '汇总粒度：hour/day',
+    bucket_start DATETIME NOT NULL COMMENT '时间段起点（UTC）',
+    dimension VARCHAR(10) NOT NULL COMMENT '分组维度：total/task/terminal',
+    dimension_id INT NOT NULL DEFAULT 0 COMMENT '任务ID或终端主键ID，total为0',
+    status VARCHAR(20) NOT NULL COMMENT '执行结果：success/failed',
+    execution_count INT NOT NULL DEFAULT 0 COMMENT '执行次数',
+    duration_count INT NOT NULL DEFAULT 0 COMMENT '有开始时间的执行次数',
+    duration_seconds DOUBLE NOT NULL DEFAULT 0 COMMENT '执行耗时合计（秒）',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_task_execution_rollup (granularity, dimension, bucket_start, dimension_id, status)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='任务执行汇总表';
+
+-- 终端上报次数按小时/天汇总表
+CREATE TABLE terminal_report_rollups (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    granularity VARCHAR(10) NOT NULL COMMENT '汇总粒度：hour/day',
+    bucket_start DATETIME NOT NULL COMMENT '时间段起点（UTC）',
+    terminal_id VARCHAR(100) NOT NULL COMMENT '终端设备ID',
+    report_type VARCHAR(20) NOT NULL COMMENT '上报类型：login/assets/inventory',
+    report_count INT NOT NULL DEFAULT 0 COMMENT '上报次数',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_terminal_report_rollup (granularity, bucket_start, terminal_id, report_type),
+    INDEX idx_terminal_report_rollup_terminal (granularity, terminal_id, bucket_start)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='终端上报汇总表';
+
+-- 账户金子/元宝变化按小时/天汇总表
+CREATE TABLE account_asset_rollups (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    granularity VARCHAR(10) NOT NULL COMMENT '汇总粒度：hour/day',
+    bucket_start DATETIME NOT NULL COMMENT '时间段起点（UTC）',
+    account_id VARCHAR(100) NOT NULL COMMENT '账户ID',
+    region_code VARCHAR(20) NOT NULL DEFAULT '' COMMENT '游戏区域代码，未知为空串',
+    report_count INT NOT NULL DEFAULT 0 COMMENT '资产上报次数',
+    gold_delta BIGINT NOT NULL DEFAULT 0 COMMENT '金子变化合计',
+    diamond_delta BIGINT NOT NULL DEFAULT 0 COMMENT '元宝/钻石变化合计',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_account_asset_rollup (granularity, account_id, region_code, bucket_start),
+    INDEX idx_account_asset_rollup_region (granularity, region_code, bucket_start),
+    INDEX idx_account_asset_rollup_bucket (granularity, bucket_start)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='账户资产变化汇总表';
+
+-- 资产记录保存相对上一次上报的金子/元宝变化，供汇总累加（MySQL 8.0 可即时添加列）
+ALTER TABLE game_asset_records
+    ADD COLUMN gold_delta BIGINT NULL COMMENT '相对该账户上一次上报的金子变化' AFTER vip_level,
+    ADD COLUMN diamond_delta BIGINT NULL COMMENT '相对该账户上一次上报的元宝/钻石变化' AFTER gold_delta,
+    ALGORITHM=INSTANT;
+
+-- 回填历史资产记录的变化值（可选，数据量大时耗时较长，可在低峰期执行）
+UPDATE game_asset_records r
+JOIN (
+    SELECT id, created_at,
+           gold - LAG(gold) OVER (PARTITION BY account_id ORDER BY report_time, id) AS gold_delta,
+           diamond - LAG(diamond) OVER (PARTITION BY account_id ORDER BY report_time, id) AS diamond_delta
+    FROM game_asset_records
+    WHERE account_id IS NOT NULL
+) d ON r.id = d.id AND r.created_at = d.created_at
+SET r.gold_delta = d.gold_delta, r.diamond_delta = d.diamond_delta;
+
+-- 汇总任务按结束时间增量读取已结束的任务执行（模型中对应 completed_at）
+ALTER TABLE task_executions ADD INDEX idx_end_time (end_time), ALGORITHM=INPLACE, LOCK=NONE;
+
+-- 验证
+SHOW TABLES LIKE '%_rollups';
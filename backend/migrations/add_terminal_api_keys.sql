@@ -0,0 +1,15 @@
+-- 新增终端API密钥表：终端上报接口可使用按终端签发的密钥进行HMAC请求签名认证
+USE wlweb_game_middleware;
+
+-- 只保存密钥ID，签名密钥由服务端主密钥（SECRET_KEY）对密钥ID计算HMAC得到
+CREATE TABLE terminal_api_keys (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    key_id VARCHAR(32) UNIQUE NOT NULL COMMENT '密钥ID',
+    terminal_id VARCHAR(100) NOT NULL COMMENT '终端设备ID',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    revoked_at TIMESTAMP NULL COMMENT '吊销时间，为空表示有效',
+    INDEX idx_terminal_api_keys_terminal (terminal_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='终端API密钥表';
+
+-- 验证表结构
+DESCRIBE terminal_api_keys;
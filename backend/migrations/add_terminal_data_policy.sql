@@ -0,0 +1,16 @@
+-- 终端原始数据支持压缩存储，并添加按数据类型的保存策略配置
+USE wlweb_game_middleware;
+
+ALTER TABLE terminal_data
+MODIFY COLUMN data_content JSON NULL COMMENT '原样保存的JSON数据',
+ADD COLUMN data_compressed MEDIUMBLOB NULL COMMENT 'zlib压缩的JSON数据' AFTER data_content;
+
+-- 默认策略：已写入类型化表的上报不再重复保存原始数据，已存在的配置保持不变
+INSERT IGNORE INTO system_configs (config_key, config_value, description) VALUES
+('terminal_data_policy.login_report', 'off', '登录上报原始数据保存策略：off/sampled[:比例]/full/compressed'),
+('terminal_data_policy.assets_report', 'off', '资产上报原始数据保存策略：off/sampled[:比例]/full/compressed'),
+('terminal_data_policy.inventory_report', 'off', '背包上报原始数据保存策略：off/sampled[:比例]/full/compressed'),
+('terminal_data_policy.auto_report', 'compressed', '终端自动上报原始数据保存策略：off/sampled[:比例]/full/compressed');
+
+-- 验证表结构
+DESCRIBE terminal_data;
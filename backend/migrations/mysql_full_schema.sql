@@ -34,6 +34,16 @@ CREATE TABLE terminals (
     INDEX idx_last_heartbeat (last_heartbeat)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='终端设备表';
 
+-- 终端API密钥表（只保存密钥ID，签名密钥由服务端主密钥对密钥ID计算HMAC得到）
+CREATE TABLE terminal_api_keys (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    key_id VARCHAR(32) UNIQUE NOT NULL COMMENT '密钥ID',
+    terminal_id VARCHAR(100) NOT NULL COMMENT '终端设备ID',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    revoked_at TIMESTAMP NULL COMMENT '吊销时间，为空表示有效',
+    INDEX idx_terminal_api_keys_terminal (terminal_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='终端API密钥表';
+
 -- 任务表
 CREATE TABLE tasks (
     id INT AUTO_INCREMENT PRIMARY KEY,
@@ -64,34 +74,37 @@ CREATE TABLE task_executions (
     FOREIGN KEY (terminal_id) REFERENCES terminals(id) ON DELETE CASCADE,
     INDEX idx_task_id (task_id),
     INDEX idx_terminal_id (terminal_id),
-    INDEX idx_start_time (start_time)
+    INDEX idx_start_time (start_time),
+    INDEX idx_end_time (end_time)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='任务执行记录表';
 
 -- 终端数据表
 CREATE TABLE terminal_data (
-    id INT AUTO_INCREMENT PRIMARY KEY,
+    id INT AUTO_INCREMENT,
     terminal_id INT NOT NULL,
     data_type VARCHAR(50) NOT NULL,
-    data_content JSON NOT NULL,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (terminal_id) REFERENCES terminals(id) ON DELETE CASCADE,
-    INDEX idx_terminal_id (terminal_id),
-    INDEX idx_data_type (data_type),
+    data_content JSON NULL COMMENT '原样保存的JSON数据',
+    data_compressed MEDIUMBLOB NULL COMMENT 'zlib压缩的JSON数据',
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, created_at),
+    INDEX idx_terminal_data_terminal_type_created (terminal_id, data_type, created_at),
+    INDEX idx_terminal_data_terminal_created (terminal_id, created_at),
     INDEX idx_created_at (created_at)
-) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='终端数据表';
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='终端数据表'
+-- 按created_at范围分区（外键与分区不兼容，已移除），分区由 PartitionService 维护
+PARTITION BY RANGE (UNIX_TIMESTAMP(created_at)) (
+    PARTITION pmax VALUES LESS THAN MAXVALUE
+);
 
--- 用户会话表
-CREATE TABLE user_sessions (
+-- 访问令牌吊销表（登出时按令牌ID吊销，令牌过期后由保留清理删除）
+CREATE TABLE revoked_tokens (
     id INT AUTO_INCREMENT PRIMARY KEY,
-    user_id INT NOT NULL,
-    session_token VARCHAR(255) UNIQUE NOT NULL,
-    expires_at TIMESTAMP NOT NULL,
+    jti VARCHAR(64) UNIQUE NOT NULL COMMENT '令牌ID',
+    username VARCHAR(50) NULL COMMENT '令牌主体',
+    expires_at TIMESTAMP NOT NULL COMMENT '令牌过期时间',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-    INDEX idx_user_id (user_id),
-    INDEX idx_session_token (session_token),
-    INDEX idx_expires_at (expires_at)
-) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='用户会话表';
+    INDEX idx_revoked_tokens_expires (expires_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='访问令牌吊销表';
 
 -- 系统配置表
 CREATE TABLE system_configs (
@@ -124,6 +137,7 @@ CREATE TABLE account_assets (
     password TEXT NOT NULL COMMENT '密码',
     region_code VARCHAR(20) NOT NULL COMMENT '所属区域编码，如S110、S130等',
     terminal_id INT NULL COMMENT '绑定的终端ID',
+    lease_expires_at TIMESTAMP NULL COMMENT '租约到期时间，为空表示长期绑定',
     description TEXT NULL COMMENT '备注描述',
     server_name VARCHAR(100) NULL COMMENT '服务器名称',
     level INT NULL COMMENT '角色等级',
@@ -135,6 +149,8 @@ CREATE TABLE account_assets (
     INDEX idx_account (account),
     INDEX idx_region_code (region_code),
     INDEX idx_terminal_id (terminal_id),
+    INDEX idx_account_assets_region_terminal (region_code, terminal_id),
+    INDEX idx_account_assets_lease_expires (lease_expires_at),
     INDEX idx_created_at (created_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='账号资产表';
 
@@ -150,12 +166,13 @@ CREATE TABLE game_accounts (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     INDEX idx_account_id (account_id),
-    INDEX idx_last_terminal_id (last_terminal_id)
+    INDEX idx_last_terminal_id (last_terminal_id),
+    INDEX idx_game_accounts_updated_at (updated_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='游戏账户信息表';
 
 -- 游戏资产记录表
 CREATE TABLE game_asset_records (
-    id INT AUTO_INCREMENT PRIMARY KEY,
+    id INT AUTO_INCREMENT,
     account_id VARCHAR(100) NOT NULL COMMENT '账户ID',
     terminal_id VARCHAR(100) NOT NULL COMMENT '终端设备ID',
     region_code VARCHAR(20) COMMENT '区域编码',
@@ -166,18 +183,41 @@ CREATE TABLE game_asset_records (
     experience BIGINT COMMENT '经验值',
     level INT COMMENT '等级',
     vip_level INT COMMENT 'VIP等级',
+    gold_delta BIGINT COMMENT '相对该账户上一次上报的金子变化',
+    diamond_delta BIGINT COMMENT '相对该账户上一次上报的元宝/钻石变化',
     report_time TIMESTAMP NULL COMMENT '上报时间',
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    INDEX idx_account_id (account_id),
-    INDEX idx_terminal_id (terminal_id),
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, created_at),
+    INDEX idx_asset_account_report_time (account_id, report_time),
+    INDEX idx_asset_terminal_created (terminal_id, created_at),
     INDEX idx_region_code (region_code),
-    INDEX idx_created_at (created_at),
+    INDEX idx_asset_created_at (created_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='游戏资产记录表'
+-- 按created_at范围分区（外键与分区不兼容，已移除），分区由 PartitionService 维护
+PARTITION BY RANGE (UNIX_TIMESTAMP(created_at)) (
+    PARTITION pmax VALUES LESS THAN MAXVALUE
+);
+
+-- 游戏账户最新资产快照表（每个账户一行，资产上报时upsert）
+CREATE TABLE game_account_latest_assets (
+    account_id VARCHAR(100) PRIMARY KEY COMMENT '账户ID',
+    record_id INT NOT NULL COMMENT '对应的资产记录ID',
+    terminal_id VARCHAR(100) NOT NULL COMMENT '终端设备ID',
+    region_code VARCHAR(20) COMMENT '区域编码',
+    gold BIGINT COMMENT '金子数量',
+    diamond BIGINT COMMENT '元宝/钻石数量',
+    energy INT COMMENT '体力值',
+    experience BIGINT COMMENT '经验值',
+    level INT COMMENT '等级',
+    vip_level INT COMMENT 'VIP等级',
+    report_time TIMESTAMP NULL COMMENT '上报时间',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '快照更新时间',
     FOREIGN KEY (account_id) REFERENCES game_accounts(account_id) ON DELETE CASCADE
-) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='游戏资产记录表';
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='游戏账户最新资产快照表';
 
 -- 游戏背包物品记录表
 CREATE TABLE game_inventory_records (
-    id INT AUTO_INCREMENT PRIMARY KEY,
+    id INT AUTO_INCREMENT,
     account_id VARCHAR(100) NOT NULL COMMENT '账户ID',
     terminal_id VARCHAR(100) NOT NULL COMMENT '终端设备ID',
     region_code VARCHAR(20) COMMENT '区域编码',
@@ -189,18 +229,68 @@ CREATE TABLE game_inventory_records (
     quality VARCHAR(50) COMMENT '品质',
     description TEXT COMMENT '描述',
     report_time TIMESTAMP NULL COMMENT '上报时间',
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    INDEX idx_account_id (account_id),
-    INDEX idx_terminal_id (terminal_id),
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, created_at),
+    INDEX idx_inventory_account_report_time (account_id, report_time),
+    INDEX idx_inventory_terminal_created (terminal_id, created_at),
     INDEX idx_region_code (region_code),
     INDEX idx_item_type (item_type),
-    INDEX idx_created_at (created_at),
+    INDEX idx_inventory_created_at (created_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='游戏背包物品记录表'
+-- 按created_at范围分区（外键与分区不兼容，已移除），分区由 PartitionService 维护
+PARTITION BY RANGE (UNIX_TIMESTAMP(created_at)) (
+    PARTITION pmax VALUES LESS THAN MAXVALUE
+);
+
+-- 游戏账户背包状态表（增量背包存储，每个账户一行）
+CREATE TABLE game_inventory_states (
+    account_id VARCHAR(100) PRIMARY KEY COMMENT '账户ID',
+    terminal_id VARCHAR(100) NOT NULL COMMENT '最近上报的终端设备ID',
+    region_code VARCHAR(20) COMMENT '区域编码',
+    item_count INT NOT NULL DEFAULT 0 COMMENT '当前物品种类数',
+    report_time TIMESTAMP NULL COMMENT '最近上报时间',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '状态更新时间',
+    INDEX idx_terminal_id (terminal_id),
+    FOREIGN KEY (account_id) REFERENCES game_accounts(account_id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='游戏账户背包状态表';
+
+-- 游戏账户当前背包物品表（每个账户每种物品一行）
+CREATE TABLE game_inventory_items (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    account_id VARCHAR(100) NOT NULL COMMENT '账户ID',
+    item_id VARCHAR(100) NOT NULL COMMENT '物品ID',
+    item_name VARCHAR(200) NOT NULL COMMENT '物品名称',
+    item_type VARCHAR(50) NOT NULL COMMENT '物品类型',
+    quantity INT NOT NULL COMMENT '数量',
+    quality VARCHAR(50) COMMENT '品质',
+    description TEXT COMMENT '描述',
+    updated_at TIMESTAMP NULL COMMENT '最后变化的上报时间',
+    UNIQUE KEY uq_inventory_item_account_item (account_id, item_id),
+    FOREIGN KEY (account_id) REFERENCES game_accounts(account_id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='游戏账户当前背包物品表';
+
+-- 游戏背包变化记录表（仅在上报与当前背包不同时追加）
+CREATE TABLE game_inventory_changes (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    account_id VARCHAR(100) NOT NULL COMMENT '账户ID',
+    terminal_id VARCHAR(100) NOT NULL COMMENT '终端设备ID',
+    item_id VARCHAR(100) NOT NULL COMMENT '物品ID',
+    item_name VARCHAR(200) NOT NULL COMMENT '物品名称',
+    item_type VARCHAR(50) NOT NULL COMMENT '物品类型',
+    quality VARCHAR(50) COMMENT '品质',
+    description TEXT COMMENT '描述',
+    change_type VARCHAR(20) NOT NULL COMMENT '变化类型：added/removed/changed',
+    quantity_delta INT NOT NULL COMMENT '数量变化',
+    quantity_after INT NOT NULL COMMENT '变化后数量',
+    report_time TIMESTAMP NOT NULL COMMENT '上报时间',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_inventory_change_account_time (account_id, report_time),
     FOREIGN KEY (account_id) REFERENCES game_accounts(account_id) ON DELETE CASCADE
-) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='游戏背包物品记录表';
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='游戏背包变化记录表';
 
 -- 游戏登录记录表
 CREATE TABLE game_login_records (
-    id INT AUTO_INCREMENT PRIMARY KEY,
+    id INT AUTO_INCREMENT,
     account_id VARCHAR(100) NOT NULL COMMENT '账户ID',
     terminal_id VARCHAR(100) NOT NULL COMMENT '终端设备ID',
     region_code VARCHAR(20) COMMENT '区域编码',
@@ -212,14 +302,63 @@ CREATE TABLE game_login_records (
     game_server VARCHAR(100) COMMENT '游戏服务器',
     login_status VARCHAR(20) COMMENT '登录状态',
     server_info JSON COMMENT '服务器信息',
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    INDEX idx_account_id (account_id),
-    INDEX idx_terminal_id (terminal_id),
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, created_at),
+    INDEX idx_login_account_login_time (account_id, login_time),
+    INDEX idx_login_terminal_created (terminal_id, created_at),
     INDEX idx_region_code (region_code),
     INDEX idx_login_time (login_time),
-    INDEX idx_created_at (created_at),
-    FOREIGN KEY (account_id) REFERENCES game_accounts(account_id) ON DELETE CASCADE
-) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='游戏登录记录表';
+    INDEX idx_login_created_at (created_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='游戏登录记录表'
+-- 按created_at范围分区（外键与分区不兼容，已移除），分区由 PartitionService 维护
+PARTITION BY RANGE (UNIX_TIMESTAMP(created_at)) (
+    PARTITION pmax VALUES LESS THAN MAXVALUE
+);
+
+-- 任务执行按小时/天汇总表（仅统计已结束的执行，由 RollupService 按水位增量维护）
+-- dimension: total 为全部执行（dimension_id=0），task/terminal 按任务ID/终端主键ID分组且只按天汇总
+CREATE TABLE task_execution_rollups (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    granularity VARCHAR(10) NOT NULL COMMENT '汇总粒度：hour/day',
+    bucket_start DATETIME NOT NULL COMMENT '时间段起点（UTC）',
+    dimension VARCHAR(10) NOT NULL COMMENT '分组维度：total/task/terminal',
+    dimension_id INT NOT NULL DEFAULT 0 COMMENT '任务ID或终端主键ID，total为0',
+    status VARCHAR(20) NOT NULL COMMENT '执行结果：success/failed',
+    execution_count INT NOT NULL DEFAULT 0 COMMENT '执行次数',
+    duration_count INT NOT NULL DEFAULT 0 COMMENT '有开始时间的执行次数',
+    duration_seconds DOUBLE NOT NULL DEFAULT 0 COMMENT '执行耗时合计（秒）',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_task_execution_rollup (granularity, dimension, bucket_start, dimension_id, status)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='任务执行汇总表';
+
+-- 终端上报次数按小时/天汇总表
+CREATE TABLE terminal_report_rollups (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    granularity VARCHAR(10) NOT NULL COMMENT '汇总粒度：hour/day',
+    bucket_start DATETIME NOT NULL COMMENT '时间段起点（UTC）',
+    terminal_id VARCHAR(100) NOT NULL COMMENT '终端设备ID',
+    report_type VARCHAR(20) NOT NULL COMMENT '上报类型：login/assets/inventory',
+    report_count INT NOT NULL DEFAULT 0 COMMENT '上报次数',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_terminal_report_rollup (granularity, bucket_start, terminal_id, report_type),
+    INDEX idx_terminal_report_rollup_terminal (granularity, terminal_id, bucket_start)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='终端上报汇总表';
+
+-- 账户金子/元宝变化按小时/天汇总表
+CREATE TABLE account_asset_rollups (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    granularity VARCHAR(10) NOT NULL COMMENT '汇总粒度：hour/day',
+    bucket_start DATETIME NOT NULL COMMENT '时间段起点（UTC）',
+    account_id VARCHAR(100) NOT NULL COMMENT '账户ID',
+    region_code VARCHAR(20) NOT NULL DEFAULT '' COMMENT '游戏区域代码，未知为空串',
+    report_count INT NOT NULL DEFAULT 0 COMMENT '资产上报次数',
+    gold_delta BIGINT NOT NULL DEFAULT 0 COMMENT '金子变化合计',
+    diamond_delta BIGINT NOT NULL DEFAULT 0 COMMENT '元宝/钻石变化合计',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_account_asset_rollup (granularity, account_id, region_code, bucket_start),
+    INDEX idx_account_asset_rollup_region (granularity, region_code, bucket_start),
+    INDEX idx_account_asset_rollup_bucket (granularity, bucket_start)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='账户资产变化汇总表';
 
 -- 插入默认数据
 
@@ -251,7 +390,11 @@ INSERT INTO regions (region_code, region_name, description) VALUES
 INSERT INTO system_configs (config_key, config_value, description) VALUES
 ('default_region', 'CN', '默认区域设置'),
 ('max_accounts_per_region', '100', '每个区域最大账号数量'),
-('region_auto_assign', 'true', '是否自动分配区域');
+('region_auto_assign', 'true', '是否自动分配区域'),
+('terminal_data_policy.login_report', 'off', '登录上报原始数据保存策略：off/sampled[:比例]/full/compressed'),
+('terminal_data_policy.assets_report', 'off', '资产上报原始数据保存策略：off/sampled[:比例]/full/compressed'),
+('terminal_data_policy.inventory_report', 'off', '背包上报原始数据保存策略：off/sampled[:比例]/full/compressed'),
+('terminal_data_policy.auto_report', 'compressed', '终端自动上报原始数据保存策略：off/sampled[:比例]/full/compressed');
 
 -- 创建完成提示
 SELECT 'MySQL数据库结构创建完成！' AS message;
\ No newline at end of file
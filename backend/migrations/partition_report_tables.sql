@@ -0,0 +1,52 @@
+-- 将上报历史表改为按 created_at 范围分区（MySQL）
+-- 分区表不支持外键，且主键必须包含分区列，因此移除外键并将主键改为 (id, created_at)。
+-- 迁移后仅有 pmax 一个分区；PartitionService 首次维护时从 pmax 中拆分出按天/月的分区，
+-- 已有数据量大时该次拆分会复制 pmax 中的数据，建议在低峰期执行。
+-- 外键名为MySQL默认生成的名称，如有不同请先用 SHOW CREATE TABLE 确认。
+USE wlweb_game_middleware;
+
+-- 终端数据表
+ALTER TABLE terminal_data DROP FOREIGN KEY terminal_data_ibfk_1;
+ALTER TABLE terminal_data
+    MODIFY COLUMN created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (id, created_at);
+ALTER TABLE terminal_data PARTITION BY RANGE (UNIX_TIMESTAMP(created_at)) (
+    PARTITION pmax VALUES LESS THAN MAXVALUE
+);
+
+-- 游戏资产记录表
+ALTER TABLE game_asset_records DROP FOREIGN KEY game_asset_records_ibfk_1;
+ALTER TABLE game_asset_records
+    MODIFY COLUMN created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (id, created_at);
+ALTER TABLE game_asset_records PARTITION BY RANGE (UNIX_TIMESTAMP(created_at)) (
+    PARTITION pmax VALUES LESS THAN MAXVALUE
+);
+
+-- 游戏背包物品记录表
+ALTER TABLE game_inventory_records DROP FOREIGN KEY game_inventory_records_ibfk_1;
+ALTER TABLE game_inventory_records
+    MODIFY COLUMN created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (id, created_at);
+ALTER TABLE game_inventory_records PARTITION BY RANGE (UNIX_TIMESTAMP(created_at)) (
+    PARTITION pmax VALUES LESS THAN MAXVALUE
+);
+
+-- 游戏登录记录表
+ALTER TABLE game_login_records DROP FOREIGN KEY game_login_records_ibfk_1;
+ALTER TABLE game_login_records
+    MODIFY COLUMN created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (id, created_at);
+ALTER TABLE game_login_records PARTITION BY RANGE (UNIX_TIMESTAMP(created_at)) (
+    PARTITION pmax VALUES LESS THAN MAXVALUE
+);
+
+-- 验证分区
+SELECT table_name, partition_name, partition_description, table_rows
+FROM information_schema.PARTITIONS
+WHERE table_schema = DATABASE()
+  AND table_name IN ('terminal_data', 'game_asset_records', 'game_inventory_records', 'game_login_records');
@@ -0,0 +1,21 @@
+import os
+import tempfile
+
+import pytest
+
+# 必须在导入app模块之前设置，测试使用临时SQLite文件
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="wlweb_test_"), "test.db")
+
+
+@pytest.fixture
+def db():
+    from app.core.database import Base, SessionLocal, engine
+    import app.models  # noqa: F401  注册所有模型
+
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
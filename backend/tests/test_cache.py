@@ -0,0 +1,44 @@
+import threading
+import time
+
+import fakeredis
+
+from app.core.cache import CacheEntry, RedisCacheBackend, ResponseCache
+from app.core.shared_state import RedisSharedState
+
+
+def redis_backend(server) -> RedisCacheBackend:
+    return RedisCacheBackend(RedisSharedState("", prefix="cache:", client=fakeredis.FakeRedis(server=server)))
+
+
+def test_redis_backend_round_trip():
+    backend = redis_backend(fakeredis.FakeServer())
+    backend.set("summary?page=1", CacheEntry({"total": 3}, 100.0), expire=60)
+    assert backend.get("summary?page=1") == CacheEntry({"total": 3}, 100.0)
+    backend.clear()
+    assert backend.get("summary?page=1") is None
+
+
+def test_one_worker_computes_per_key():
+    server = fakeredis.FakeServer()
+    caches = [ResponseCache(redis_backend(server), ttl=60, stale=0) for _ in range(4)]
+    calls = []
+    barrier = threading.Barrier(len(caches))
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"total": 1}
+
+    def worker(cache):
+        barrier.wait()
+        results.append(cache.get_or_compute("summary", compute))
+
+    results = []
+    threads = [threading.Thread(target=worker, args=(cache,)) for cache in caches]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [{"total": 1}] * len(caches)
+    assert len(calls) == 1
@@ -0,0 +1,74 @@
+import json
+import os
+
+import pytest
+
+from app.schemas.terminal import LoginReportData
+from app.services.ingest_queue import ReportIngestQueue
+
+
+def login(terminal_id, username):
+    return LoginReportData(terminal_id=terminal_id, username=username, login_time="2026-01-01 00:00:00",
+                           login_ip="127.0.0.1", login_device="pc", game_server="S1")
+
+
+@pytest.fixture
+def saved(monkeypatch):
+    """替换写库逻辑：记录写入的上报，用户名为 bad 的上报写入失败"""
+    rows = []
+
+    def save_batch(db, batch):
+        for item in batch:
+            if item["payload"]["username"] == "bad":
+                raise RuntimeError("写入失败")
+        rows.extend(item["payload"]["username"] for item in batch)
+
+    monkeypatch.setattr(ReportIngestQueue, "_save_batch", staticmethod(save_batch))
+    return rows
+
+
+def make_queue(spool_path, **kwargs):
+    options = dict(enabled=True, maxsize=100, flush_interval_ms=10, flush_batch_size=100, spool_path=spool_path)
+    options.update(kwargs)
+    return ReportIngestQueue(**options)
+
+
+def spool_files(spool_path):
+    directory = os.path.dirname(spool_path)
+    return sorted(name for name in os.listdir(directory) if name != os.path.basename(spool_path) + ".dead")
+
+
+def test_flushed_segments_are_deleted_and_failures_dead_lettered(tmp_path, saved):
+    spool_path = str(tmp_path / "reports.spool")
+    queue = make_queue(spool_path, segment_bytes=200)
+    queue.start()
+    for index in range(5):
+        assert queue.submit_many("T1", [("login", login(1, f"user-{index}"))])
+    assert queue.submit_many("T1", [("login", login(1, "bad"))])
+    queue.stop()
+
+    assert saved == [f"user-{index}" for index in range(5)]
+    assert spool_files(spool_path) == []
+    with open(f"{spool_path}.dead", encoding="utf-8") as dead:
+        dead_letters = [json.loads(line) for line in dead]
+    assert [item["payload"]["username"] for item in dead_letters] == ["bad"]
+    assert queue.stats()["failed"] == 1
+
+
+def test_replays_remaining_segments_on_start(tmp_path, saved):
+    spool_path = str(tmp_path / "reports.spool")
+    item = {"report_type": "login", "terminal_id": "T1", "payload": login(1, "user-0").dict()}
+    with open(spool_path, "w", encoding="utf-8") as legacy:
+        legacy.write(json.dumps(item) + "\n")
+    item["payload"]["username"] = "user-1"
+    with open(f"{spool_path}.00000003", "w", encoding="utf-8") as segment:
+        segment.write(json.dumps(item) + "\n")
+
+    queue = make_queue(spool_path)
+    queue.start()
+    assert queue.submit_many("T1", [("login", login(1, "user-2"))])
+    queue.stop()
+
+    assert saved == ["user-0", "user-1", "user-2"]
+    assert not os.path.exists(spool_path)
+    assert spool_files(spool_path) == []
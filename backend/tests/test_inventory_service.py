@@ -0,0 +1,113 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.core.database import SessionLocal, engine
+from app.models.game_account import GameAccount, GameInventoryChange, GameInventoryItem, GameInventoryState
+from app.schemas.terminal import InventoryItem
+from app.services.inventory_service import InventoryService
+
+
+def items(*quantities):
+    return [
+        InventoryItem(item_id=f"item-{index}", item_name=f"物品{index}", item_type="material",
+                      quantity=quantity, quality="white")
+        for index, quantity in enumerate(quantities)
+    ]
+
+
+@pytest.fixture
+def slow_item_reads():
+    """读取当前背包后暂停，让并发上报都在对方写入之前读取"""
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "FROM game_inventory_items" in statement:
+            time.sleep(0.2)
+
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+    yield
+    event.remove(engine, "after_cursor_execute", after_cursor_execute)
+
+
+def test_apply_report_writes_only_differences(db):
+    db.add(GameAccount(account_id="A1"))
+    db.commit()
+    now = datetime.utcnow()
+
+    assert InventoryService.apply_report(db, "A1", "T1", "S1", items(5, 1), now) == 2
+    assert InventoryService.apply_report(db, "A1", "T1", "S1", items(5, 1), now + timedelta(minutes=1)) == 0
+    assert InventoryService.apply_report(db, "A1", "T1", "S1", items(6), now + timedelta(minutes=2)) == 2
+    # 乱序到达的旧上报不改变当前背包
+    assert InventoryService.apply_report(db, "A1", "T1", "S1", items(1, 1, 1), now) is None
+    db.commit()
+
+    state, current = InventoryService.get_current(db, "A1")
+    assert state.item_count == 1
+    assert [(item.item_id, item.quantity) for item in current] == [("item-0", 6)]
+
+
+def test_apply_report_writes_in_chunks(db, monkeypatch):
+    monkeypatch.setattr(settings, "REPORT_INSERT_CHUNK_SIZE", 2)
+    db.add(GameAccount(account_id="A1"))
+    db.commit()
+    now = datetime.utcnow()
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        keyword = statement.lstrip().split(None, 1)[0].upper()
+        if keyword in ("INSERT", "UPDATE", "DELETE"):
+            statements.append((statement.split()[2], len(parameters) if executemany else 1))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        InventoryService.apply_report(db, "A1", "T1", "S1", items(1, 1, 1, 1, 1), now)
+        InventoryService.apply_report(db, "A1", "T1", "S1", items(2, 2, 2), now + timedelta(minutes=1))
+        db.commit()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    # 每条语句最多写入 REPORT_INSERT_CHUNK_SIZE 行
+    assert all(rows <= 2 for _, rows in statements)
+    assert sum(rows for table, rows in statements if table == "game_inventory_changes") == 10
+    _, current = InventoryService.get_current(db, "A1")
+    assert [item.quantity for item in current] == [2, 2, 2]
+
+
+def test_concurrent_first_reports(db, slow_item_reads):
+    db.add(GameAccount(account_id="A1"))
+    db.commit()
+    now = datetime.utcnow()
+    reports = [items(5, 1), items(7)]
+    barrier = threading.Barrier(len(reports))
+    errors = []
+
+    def report(index):
+        session = SessionLocal()
+        try:
+            barrier.wait()
+            InventoryService.apply_report(session, "A1", f"T{index}", "S1", reports[index],
+                                          now + timedelta(seconds=index))
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            errors.append(e)
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=report, args=(index,)) for index in range(len(reports))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    db.expire_all()
+    # 两次上报依次应用，当前背包为较新的上报：较旧的上报先到时新上报与它比较（共4条变化），
+    # 后到时作为乱序上报忽略（1条变化）
+    current = db.query(GameInventoryItem).filter(GameInventoryItem.account_id == "A1").all()
+    assert [(item.item_id, item.quantity) for item in current] == [("item-0", 7)]
+    assert db.get(GameInventoryState, "A1").item_count == 1
+    assert db.query(GameInventoryChange).count() in (1, 4)
@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta
+
+import fakeredis
+import pytest
+
+from app.core.shared_state import MemorySharedState, RedisSharedState
+from app.models.terminal import Terminal, TerminalStatus
+from app.services.presence_service import PresenceRegistry
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+def redis_state(server) -> RedisSharedState:
+    return RedisSharedState("", prefix="test:", client=fakeredis.FakeRedis(server=server))
+
+
+@pytest.fixture(params=["memory", "redis"])
+def shared(request, server):
+    return MemorySharedState() if request.param == "memory" else redis_state(server)
+
+
+def registry(shared) -> PresenceRegistry:
+    return PresenceRegistry(shared, timeout_seconds=300, interval_seconds=10, persist_interval_seconds=60)
+
+
+def test_members(shared):
+    shared.touch_member("online", "T1", 10.0)
+    shared.touch_member("online", "T2", 20.0)
+    # 加入 error 时从 exclusive 中的 online 移除
+    shared.touch_member("error", "T1", 30.0, exclusive=["online", "error"])
+    assert shared.scores("online", ["T1", "T2", "T3"]) == {"T2": 20.0}
+    assert shared.scores("error", ["T1"]) == {"T1": 30.0}
+    assert shared.count("online") == 1
+
+    assert shared.add_if_absent("online", {"T2": 99.0, "T3": 5.0}) == 1
+    assert shared.scores("online", ["T2", "T3"]) == {"T2": 20.0, "T3": 5.0}
+
+    shared.remove_member(["online", "error"], "T1")
+    assert shared.scores("error", ["T1"]) == {}
+    assert sorted(shared.pop_expired("online", 10.0)) == ["T3"]
+    assert shared.members("online") == ["T2"]
+
+
+def test_values_and_counters(shared):
+    shared.set("known", "1", 60)
+    assert shared.get("known") == "1"
+    shared.delete("known")
+    assert shared.get("known") is None
+
+    shared.incr("touches", 3)
+    shared.incr("touches")
+    assert shared.counters(["touches", "swept"]) == {"touches": 4, "swept": 0}
+
+
+def test_locks(shared):
+    token = shared.acquire_lock("lock:stats", 60)
+    assert token
+    assert shared.acquire_lock("lock:stats", 60) is None
+    # 令牌不匹配时不释放
+    shared.release_lock("lock:stats", "other")
+    assert shared.acquire_lock("lock:stats", 60) is None
+    shared.release_lock("lock:stats", token)
+    assert shared.acquire_lock("lock:stats", 60)
+
+
+def test_redis_state_is_shared_between_clients(server):
+    first, second = redis_state(server), redis_state(server)
+    first.touch_member("online", "T1", 10.0)
+    first.set("known", "1", 60)
+    assert second.scores("online", ["T1"]) == {"T1": 10.0}
+    assert second.get("known") == "1"
+
+    second.clear()
+    assert first.count("online") == 0
+    assert first.get("known") is None
+
+
+def test_discard_is_seen_by_other_workers(db, server):
+    db.add(Terminal(terminal_id="T1", name="t1", status=TerminalStatus.online))
+    db.commit()
+    worker_a, worker_b = registry(redis_state(server)), registry(redis_state(server))
+
+    worker_a.touch("T1")
+    assert worker_a.exists(db, "T1")
+    assert worker_b.exists(db, "T1")
+
+    # 终端由 worker_b 删除
+    db.query(Terminal).filter(Terminal.terminal_id == "T1").delete()
+    db.commit()
+    worker_b.discard("T1")
+
+    # worker_a 本进程仍有该终端的写回记录，但不再认为终端存在
+    assert not worker_a.exists(db, "T1")
+    assert not worker_b.exists(db, "T1")
+    assert worker_a.lookup("T1") is None
+
+
+def test_touch_is_visible_to_other_workers(db, server):
+    worker_a, worker_b = registry(redis_state(server)), registry(redis_state(server))
+    seen_at = datetime.utcnow()
+
+    worker_a.touch("T1", seen_at=seen_at)
+    worker_a.touch("T2", status=TerminalStatus.error, seen_at=seen_at - timedelta(seconds=1))
+
+    status, last_seen, _ = worker_b.lookup("T1")
+    assert status == TerminalStatus.online
+    assert abs((last_seen - seen_at).total_seconds()) < 1e-3
+    assert worker_b.count(TerminalStatus.online) == 1
+    assert worker_b.count(TerminalStatus.error) == 1
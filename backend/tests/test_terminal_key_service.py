@@ -0,0 +1,51 @@
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.models.terminal import Terminal
+from app.services import terminal_key_service
+from app.services.terminal_key_service import TerminalKeyService
+
+
+@pytest.fixture
+def master_key(monkeypatch):
+    monkeypatch.setattr(settings, "TERMINAL_KEY_MASTER", "test-terminal-key-master")
+
+
+def signed_verify(db, api_key, terminal_id="T1"):
+    timestamp = str(int(time.time()))
+    signature = TerminalKeyService.sign(api_key["secret"], "POST", "/report", timestamp, b"{}")
+    return TerminalKeyService.verify(db, terminal_id, api_key["key_id"], timestamp, signature, "POST", "/report", b"{}")
+
+
+def test_refuses_keys_without_master_key(db, monkeypatch):
+    monkeypatch.setattr(settings, "TERMINAL_KEY_MASTER", "")
+    db.add(Terminal(terminal_id="T1", name="t1"))
+    db.commit()
+
+    with pytest.raises(ValueError):
+        TerminalKeyService.issue(db, "T1")
+    assert TerminalKeyService.ensure_key(db, "T1") is None
+    with pytest.raises(ValueError):
+        TerminalKeyService.verify(db, "T1", "key", str(int(time.time())), "00", "POST", "/report", b"{}")
+
+
+def test_secret_does_not_depend_on_secret_key(db, master_key, monkeypatch):
+    secret = TerminalKeyService.derive_secret("key")
+    monkeypatch.setattr(settings, "SECRET_KEY", "rotated")
+    assert TerminalKeyService.derive_secret("key") == secret
+
+
+def test_revocation_is_seen_through_shared_state(db, master_key):
+    db.add(Terminal(terminal_id="T1", name="t1"))
+    db.commit()
+    api_key = TerminalKeyService.issue(db, "T1")
+    db.commit()
+    assert not signed_verify(db, api_key).revoked
+
+    # 模拟其他进程吊销：本进程缓存仍是未吊销状态，只能通过共享状态得知
+    TerminalKeyService.revoke(db, "T1")
+    terminal_key_service._key_cache.set(api_key["key_id"], terminal_key_service.CachedKey("T1", False))
+    with pytest.raises(ValueError, match="吊销"):
+        signed_verify(db, api_key)